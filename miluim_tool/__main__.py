@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""python -m miluim_tool ... - שורת הפקודה (cli.py)"""
+
+import os
+import sys
+
+# המודולים בתיקייה מייבאים זה את זה ישירות (כמו בהרצה מתוך התיקייה)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cli import main
+
+# התנאי נדרש: תהליכי הקריאה המקבילית מייבאים את המודול הזה מחדש
+if __name__ == "__main__":
+    sys.exit(main())
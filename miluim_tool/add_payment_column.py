@@ -6,10 +6,10 @@
 
 from openpyxl import load_workbook
 from openpyxl.styles import Font, PatternFill, Alignment
-from datetime import datetime
-import shutil
 import os
 
+from backup_store import BackupStore, describe
+
 SYSTEM_FILE = r"C:\Projects\LitayPandaMiluim\מערכת_מילואים_מלאה.xlsx"
 
 # צבעי ליטאי
@@ -30,12 +30,8 @@ def add_payment_column():
         return
     
     # גיבוי
-    backup_dir = os.path.join(os.path.dirname(SYSTEM_FILE), "backups")
-    os.makedirs(backup_dir, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_path = os.path.join(backup_dir, f"backup_before_add_column_{timestamp}.xlsx")
-    shutil.copy2(SYSTEM_FILE, backup_path)
-    print(f"\n💾 גיבוי: {os.path.basename(backup_path)}")
+    backup = BackupStore(SYSTEM_FILE).snapshot("הוספת עמודת תשלום")
+    print(f"\n💾 גיבוי: {describe(backup)}")
     
     # טעינה
     wb = load_workbook(SYSTEM_FILE)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+הרצת פעולה בתהליכון רקע כך שהחלון נשאר חי
+התהליכון לא נוגע ב-tkinter: התקדמות, תוצאה ושגיאה עוברות בתור,
+והחלון קורא את התור ב-root.after. חלונות החלטה (מיפוי שמות, כפילויות)
+נפתחים בתהליכון הממשק דרך call_in_ui, והתהליכון ממתין לתשובה.
+"""
+
+import queue
+import threading
+
+from operations import OperationCancelled, Progress
+
+POLL_MS = 50
+
+
+class BackgroundTask:
+    """
+    work(progress) רץ ברקע. on_progress(phase, done, total, rate), on_done(result),
+    on_error(exception) ו-on_cancelled() נקראים בתהליכון הממשק.
+    """
+
+    def __init__(self, root, work, on_progress, on_done, on_error, on_cancelled):
+        self.root = root
+        self.work = work
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_cancelled = on_cancelled
+        self.progress = Progress(self._post_progress)
+        self._events = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self.root.after(POLL_MS, self._poll)
+
+    def cancel(self):
+        self.progress.cancel()
+
+    def call_in_ui(self, fn, *args):
+        """הרצת fn בתהליכון הממשק (חלון החלטה) והמתנה לתוצאה"""
+        reply = {}
+        done = threading.Event()
+        self._events.put(('call', (fn, args, reply, done)))
+        done.wait()
+        if 'error' in reply:
+            raise reply['error']
+        return reply['value']
+
+    def _post_progress(self, *event):
+        self._events.put(('progress', event))
+
+    def _run(self):
+        try:
+            result = self.work(self.progress)
+        except OperationCancelled:
+            self._events.put(('cancelled', None))
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            self._events.put(('error', e))
+        else:
+            self._events.put(('done', result))
+
+    def _poll(self):
+        while True:
+            try:
+                kind, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                self.on_progress(*payload)
+            elif kind == 'call':
+                fn, args, reply, done = payload
+                try:
+                    reply['value'] = fn(*args)
+                except Exception as e:
+                    reply['error'] = e
+                done.set()
+            elif kind == 'done':
+                self.on_done(payload)
+                return
+            elif kind == 'error':
+                self.on_error(payload)
+                return
+            elif kind == 'cancelled':
+                self.on_cancelled()
+                return
+        self.root.after(POLL_MS, self._poll)
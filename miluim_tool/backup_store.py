@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+מאגר גיבויים לקובץ המערכת
+- כל גיבוי נשמר לפי טביעת SHA-256 של התוכן: קובץ זהה לגיבוי קיים לא נשמר שוב
+- דחיסה ברקע (LZMA על התוכן הפנימי של ה-xlsx) אחרי שהעותק כבר נשמר
+- מדיניות שמירה: כל הגיבויים מהיום, אחד ליום בחודש האחרון, אחד לחודש לפני כן
+- אינדקס JSON אחד לרשימת הגיבויים - בלי לפתוח את הקבצים עצמם. כל רשומה שומרת את
+  הקובץ שגובה (source): הרשימה, השחזור והמדיניות - לכל קובץ בנפרד
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import zipfile
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+DAILY_DAYS = 30
+RAW_MEMBER = "raw"  # קובץ שאינו xlsx (מאגר SQLite) נדחס כחלק יחיד
+
+_LOCK = threading.Lock()           # קריאה/כתיבה של האינדקס
+_COMPRESS_LOCK = threading.Lock()  # דחיסה אחת בכל פעם
+
+
+def source_key(path):
+    """מזהה הקובץ שגובה - הנתיב המלא"""
+    return os.path.normcase(os.path.abspath(path))
+
+
+def select_retained(entries, now=None, daily_days=DAILY_DAYS):
+    """
+    הגיבויים שנשארים לפי מדיניות השמירה, לכל קובץ מקור בנפרד: כל מה שמהיום,
+    האחרון של כל יום ב-daily_days הימים האחרונים, והאחרון של כל חודש לפני כן.
+    """
+    now = now or datetime.now()
+    daily_from = (now - timedelta(days=daily_days)).date()
+    retained = []
+    seen_buckets = set()
+    for entry in sorted(entries, key=lambda e: e['time'], reverse=True):
+        taken = datetime.strptime(entry['time'], TIME_FORMAT)
+        if taken.date() == now.date():
+            retained.append(entry)
+            continue
+        bucket = (entry.get('source'),
+                  taken.date() if taken.date() >= daily_from else (taken.year, taken.month))
+        if bucket not in seen_buckets:
+            seen_buckets.add(bucket)
+            retained.append(entry)
+    return retained
+
+
+class BackupStore:
+    """מאגר הגיבויים בתיקיית backups שליד קובץ המערכת (או ב-root)"""
+
+    def __init__(self, system_file, daily_days=DAILY_DAYS, root=None):
+        self.system_file = system_file
+        self.source = source_key(system_file)
+        self.daily_days = daily_days
+        self.root = root or os.path.join(os.path.dirname(system_file), "backups")
+        self.objects_dir = os.path.join(self.root, "store")
+        self.index_path = os.path.join(self.root, "index.json")
+
+    # --- אינדקס ---
+
+    def _read_index(self):
+        if not os.path.exists(self.index_path):
+            return []
+        with open(self.index_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_index(self, entries):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.index_path)
+
+    def list_backups(self):
+        """רשימת הגיבויים של קובץ המערכת מהאינדקס, מהחדש לישן"""
+        with _LOCK:
+            entries = [entry for entry in self._read_index() if entry.get('source') == self.source]
+        return sorted(entries, key=lambda e: e['time'], reverse=True)
+
+    # --- גיבוי ---
+
+    def snapshot(self, label=""):
+        """
+        גיבוי של קובץ המערכת. אם תוכן זהה כבר במאגר - מחזיר את הגיבוי הקיים.
+        מחזיר את רשומת האינדקס, או None אם אין קובץ מערכת.
+        """
+        if not os.path.exists(self.system_file):
+            return None
+        with open(self.system_file, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+
+        with _LOCK:
+            entries = self._read_index()
+            for entry in entries:
+                if entry['id'] == digest and entry.get('source') == self.source:
+                    return entry
+
+            # אותו תוכן מקובץ אחר - העותק השמור משותף
+            stored = next((entry for entry in entries if entry['id'] == digest), None)
+            if stored is not None:
+                stored_file, stored_size = stored['file'], stored['stored_size']
+            else:
+                os.makedirs(self.objects_dir, exist_ok=True)
+                extension = os.path.splitext(self.system_file)[1] or '.raw'
+                stored_file, stored_size = f"{digest}{extension}", len(data)
+                with open(os.path.join(self.objects_dir, stored_file), 'wb') as f:
+                    f.write(data)
+            entry = {
+                'id': digest,
+                'source': self.source,
+                'time': datetime.now().strftime(TIME_FORMAT),
+                'label': label,
+                'size': len(data),
+                'file': stored_file,
+                'stored_size': stored_size,
+            }
+            entries.append(entry)
+            entries = self._apply_retention(entries)
+            self._write_index(entries)
+
+        # לא daemon: תהליך קצר (שורת פקודה, סקריפט) ממתין לסיום הדחיסה לפני היציאה
+        threading.Thread(target=self.compress_pending).start()
+        return entry
+
+    def _apply_retention(self, entries):
+        retained = select_retained(entries, daily_days=self.daily_days)
+        kept_files = {entry['file'] for entry in retained}
+        for entry in entries:
+            if entry['file'] not in kept_files:
+                path = os.path.join(self.objects_dir, entry['file'])
+                if os.path.exists(path):
+                    os.remove(path)
+        return retained
+
+    # --- דחיסה ---
+
+    def compress_pending(self):
+        """דחיסת כל הגיבויים שעדיין לא נדחסו (רץ ברקע אחרי כל גיבוי)"""
+        with _COMPRESS_LOCK:
+            with _LOCK:
+                pending = {entry['file']: entry['id'] for entry in self._read_index()
+                           if not entry['file'].endswith('.lz')}
+            for raw_name, digest in pending.items():
+                try:
+                    self._compress(digest, raw_name)
+                except (OSError, zipfile.BadZipFile) as e:
+                    # העותק המלא נשאר במאגר - ננסה שוב בגיבוי הבא
+                    logger.warning("Backup compress error: %s", e)
+
+    def _compress(self, digest, raw_name):
+        raw_path = os.path.join(self.objects_dir, raw_name)
+        packed_name = f"{digest}.lz"
+        packed_path = os.path.join(self.objects_dir, packed_name)
+        if not os.path.exists(raw_path):
+            return
+
+        # ה-xlsx כבר דחוס ב-deflate לכל חלק בנפרד; LZMA על ה-XML עצמו קטן בהרבה
+        tmp_path = packed_path + ".tmp"
+        with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_LZMA) as target:
+            if zipfile.is_zipfile(raw_path):
+                with zipfile.ZipFile(raw_path) as source:
+                    for info in source.infolist():
+                        target.writestr(info.filename, source.read(info))
+            else:
+                target.write(raw_path, RAW_MEMBER)
+        os.replace(tmp_path, packed_path)
+
+        with _LOCK:
+            entries = self._read_index()
+            found = False
+            for entry in entries:
+                if entry['file'] == raw_name:
+                    entry['file'] = packed_name
+                    entry['stored_size'] = os.path.getsize(packed_path)
+                    found = True
+            self._write_index(entries)
+            # גיבוי שנמחק במדיניות השמירה בזמן הדחיסה
+            for path in ([raw_path] if found else [raw_path, packed_path]):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    # --- שחזור ---
+
+    def restore(self, digest, target=None):
+        """
+        שחזור גיבוי לקובץ המערכת (או ל-target). לפני ההחלפה נשמר גיבוי
+        של המצב הנוכחי, כך שגם השחזור עצמו הפיך.
+        """
+        target = target or self.system_file
+        with _COMPRESS_LOCK:
+            # רק גיבוי של הקובץ הזה - לא גיבוי של קובץ מערכת אחר באותה תיקייה
+            entry = next((e for e in self.list_backups() if e['id'] == digest), None)
+            if entry is None:
+                raise Exception(f"גיבוי לא נמצא: {digest}")
+            path = os.path.join(self.objects_dir, entry['file'])
+            if zipfile.is_zipfile(path):
+                with zipfile.ZipFile(path) as source:
+                    parts = [(info.filename, source.read(info)) for info in source.infolist()]
+            else:
+                with open(path, 'rb') as f:
+                    parts = [(RAW_MEMBER, f.read())]
+
+        if target == self.system_file:
+            self.snapshot("לפני שחזור")
+
+        tmp_path = target + ".restore.tmp"
+        if [name for name, _ in parts] == [RAW_MEMBER]:
+            with open(tmp_path, 'wb') as out:
+                out.write(parts[0][1])
+        else:
+            with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED) as out:
+                for name, data in parts:
+                    out.writestr(name, data)
+        os.replace(tmp_path, target)
+        return entry
+
+
+def describe(entry):
+    """שורת תיאור לגיבוי - לתצוגה ולהודעות"""
+    if entry is None:
+        return "-"
+    label = f" | {entry['label']}" if entry.get('label') else ""
+    return f"{entry['time']}{label} | {entry['size'] / 1024:,.0f} KB | {entry['id'][:10]}"
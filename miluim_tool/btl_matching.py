@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+מנוע התאמה בין תקופות מילואים לתשלומי ב"ל
+התאמה לפי שם עובד + תאריך התחלה + תאריך סיום, באמצעות hash join במקום סינון לכל תקופה
+"""
+
+import pandas as pd
+
+from normalize import normalize_name, parse_date
+
+KEY_COLUMNS = ['_key_emp', '_key_start', '_key_end']
+
+BTL_AMOUNT_COLUMNS = ['תגמול ₪', 'פיצוי 20% ₪', 'תוספת 40% ₪']
+
+
+def add_match_keys(df, name_col='שם עובד', start_col='תאריך התחלה', end_col='תאריך סיום'):
+    """עותק של הטבלה עם עמודות מפתח מנורמלות - נרמול אחד לכל שורה"""
+    keyed = df.copy()
+    keyed['_key_emp'] = df[name_col].map(normalize_name)
+    keyed['_key_start'] = pd.to_datetime(df[start_col].map(parse_date))
+    keyed['_key_end'] = pd.to_datetime(df[end_col].map(parse_date))
+    return keyed
+
+
+def _matchable(keyed):
+    """שורות שאפשר להתאים - תאריך שלא פוענח לא מתאים לאף שורה"""
+    return keyed[keyed['_key_start'].notna() & keyed['_key_end'].notna()]
+
+
+def _aggregate_btl(btl, amount_cols, payment_date_col=None):
+    """סיכום ב"ל לפי מפתח (שם, התחלה, סיום) - groupby אחד"""
+    grouped = btl.groupby(KEY_COLUMNS, sort=False)
+    totals = grouped[amount_cols].sum()
+    totals['_matches'] = grouped.size()
+    if payment_date_col:
+        # מועד תשלום - האחרון שאינו ריק (לפי סדר השורות בגיליון)
+        totals['_last_payment'] = grouped[payment_date_col].last()
+    return totals
+
+
+def _join_totals(periods, totals, amount_cols):
+    joined = periods[KEY_COLUMNS].join(totals, on=KEY_COLUMNS)
+    result = joined[list(totals.columns)].copy()
+    for col in amount_cols + ['_matches']:
+        result[col] = result[col].fillna(0).astype(totals[col].dtype)
+    return result
+
+
+def match_btl_to_periods(df_periods, df_btl, amount_cols=BTL_AMOUNT_COLUMNS):
+    """
+    סיכום תשלומי ב"ל לכל תקופה - groupby אחד על ב"ל ו-join לתקופות.
+    מחזיר טבלה באותו אינדקס של df_periods עם סכום לכל עמודת סכום
+    ועמודת '_matches' (מספר שורות ב"ל שהותאמו).
+    """
+    periods = add_match_keys(df_periods)
+    btl = _matchable(add_match_keys(df_btl))
+    totals = _aggregate_btl(btl, amount_cols)
+    return _join_totals(periods, totals, amount_cols)
+
+
+def reconcile_btl_with_periods(df_periods, df_btl, amount_cols=BTL_AMOUNT_COLUMNS,
+                               payment_date_col='תאריך תשלום'):
+    """
+    התאמה דו-כיוונית במעבר אחד (outer join על המפתחות).
+    מחזיר (period_totals, orphan_btl_index):
+    - period_totals: באינדקס של df_periods - סכומים, '_matches' ו-'_last_payment'
+      (תקופה עם 0 התאמות = תקופה ללא ב"ל)
+    - orphan_btl_index: אינדקס שורות ב"ל ללא תקופה תואמת, לפי סדר הגיליון
+    """
+    periods = add_match_keys(df_periods)
+    btl = add_match_keys(df_btl)
+    btl_matchable = _matchable(btl)
+
+    totals = _aggregate_btl(btl_matchable, amount_cols, payment_date_col)
+
+    period_keys = _matchable(periods)[KEY_COLUMNS].drop_duplicates()
+    merged = period_keys.merge(totals.reset_index()[KEY_COLUMNS], on=KEY_COLUMNS,
+                               how='outer', indicator=True)
+    orphan_keys = merged.loc[merged['_merge'] == 'right_only', KEY_COLUMNS]
+
+    # שורת ב"ל יתומה: מפתח שאין לו תקופה, או תאריך שלא פוענח
+    is_orphan = btl[KEY_COLUMNS].merge(orphan_keys.assign(_orphan=True), on=KEY_COLUMNS,
+                                       how='left')['_orphan'].fillna(False).to_numpy(dtype=bool)
+    is_orphan |= ~(btl['_key_start'].notna() & btl['_key_end'].notna()).to_numpy()
+    orphan_btl_index = btl.index[is_orphan]
+
+    period_totals = _join_totals(periods, totals, amount_cols)
+    period_totals['_last_payment'] = period_totals['_last_payment'].astype(object).where(
+        period_totals['_last_payment'].notna(), None)
+    return period_totals, orphan_btl_index
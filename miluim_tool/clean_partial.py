@@ -7,23 +7,18 @@
 """
 
 from openpyxl import load_workbook
-from datetime import datetime
-import shutil
-import os
+
+from backup_store import BackupStore, describe
+from row_writer import truncate_sheet
 
 SYSTEM_FILE = r"C:\Projects\LitayPandaMiluim\מערכת_מילואים_מלאה.xlsx"
 
 def backup_file():
-    """יצירת גיבוי"""
-    if os.path.exists(SYSTEM_FILE):
-        backup_dir = os.path.join(os.path.dirname(SYSTEM_FILE), "backups")
-        os.makedirs(backup_dir, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_path = os.path.join(backup_dir, f"backup_before_clean_{timestamp}.xlsx")
-        shutil.copy2(SYSTEM_FILE, backup_path)
-        print(f"✅ גיבוי נוצר: {backup_path}")
-        return backup_path
-    return None
+    """יצירת גיבוי במאגר הגיבויים"""
+    backup = BackupStore(SYSTEM_FILE).snapshot("ניקוי חלקי")
+    if backup:
+        print(f"✅ גיבוי נוצר: {describe(backup)}")
+    return describe(backup)
 
 def clean_summary_and_payments():
     """מחיקת דוח מסכם ורשימת תשלומים בלבד"""
@@ -58,8 +53,7 @@ def clean_summary_and_payments():
     print(f"\n🗑️ נמחקים:")
     print(f"   📊 דוח מסכם: {summary_rows} שורות")
     
-    for row in range(ws_summary.max_row, 1, -1):
-        ws_summary.delete_rows(row)
+    truncate_sheet(ws_summary)
     
     # 3. מחיקת רשימת תשלומים
     ws_payments = wb['💵 רשימת תשלומים']
@@ -67,8 +61,7 @@ def clean_summary_and_payments():
     
     print(f"   💵 רשימת תשלומים: {payments_rows} מנות")
     
-    for row in range(ws_payments.max_row, 1, -1):
-        ws_payments.delete_rows(row)
+    truncate_sheet(ws_payments)
     
     # שמירה
     wb.save(SYSTEM_FILE)
@@ -80,7 +73,7 @@ def clean_summary_and_payments():
     print("   1. הפעל את מערכת המילואים")
     print("   2. לחץ על 'חישוב מלא'")
     print("   3. הדוח המסכם ורשימת התשלומים יחושבו מחדש")
-    print(f"\n💾 גיבוי נשמר ב:\n   {backup_path}")
+    print(f"\n💾 גיבוי:\n   {backup_path}")
     
     input("\nלחץ Enter לסגירה...")
 
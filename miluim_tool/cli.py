@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+הפעלת פעולות המערכת משורת הפקודה - בלי חלון (בלי tkinter), להרצה מתוזמנת או מסקריפט
+אותן פעולות כמו בממשק (operations.py). הסיכום מודפס כ-JSON ב-stdout,
+הודעות והתקדמות - ב-stderr.
+
+דוגמאות:
+    python -m miluim_tool import-mecano mecano.xlsx --names suggest --mapping map.csv
+    python -m miluim_tool import-btl mana_101.xlsx mana_102.xlsx --duplicates update
+    python -m miluim_tool calculate
+    python -m miluim_tool sync
+    python -m miluim_tool unpaid-report
+
+שמות לא מוכרים (--names): skip - דילוג (ברירת מחדל), new - עובד חדש,
+suggest - ההתאמה המוצעת אם יש (אחרת דילוג). --mapping - קובץ מיפוי מוכן, קודם לכל מדיניות.
+רשומת ב"ל קיימת עם סכום אחר (--duplicates): skip (ברירת מחדל) או update.
+קוד יציאה: 0 - הצלחה, 1 - שגיאה (הסיכום: {"error": ...}), 130 - בוטל (Ctrl+C).
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import time
+from datetime import date, datetime
+
+from name_resolution import NEW, SKIP
+from operations import MiluimOperations, OperationCancelled, Progress
+from sqlite_store import SYSTEM_FILE
+
+NAME_POLICIES = ('skip', 'new', 'suggest')
+DUPLICATE_POLICIES = ('skip', 'update')
+
+
+def name_policy(policy):
+    """תשובה לא אינטראקטיבית למיפוי שמות, לפי המדיניות"""
+    def ask(names, suggestions, system_names):
+        if policy == 'new':
+            return {name: NEW for name in names}
+        if policy == 'suggest':
+            return {name: suggestions.get(name) or SKIP for name in names}
+        return {name: SKIP for name in names}
+    return ask
+
+
+def duplicate_policy(policy):
+    return lambda employee_name, start_date, existing_amount, new_amount: policy
+
+
+def to_json_value(value):
+    """ערך סיכום כ-JSON תקין: תאריכים ב-ISO, numpy לערך פייתון, NaN ל-null"""
+    if isinstance(value, dict):
+        return {str(key): to_json_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json_value(item) for item in value]
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, 'item'):  # numpy
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def _print_progress(phase, done, total, rate):
+    if done:
+        count = f"{done:,}/{total:,}" if total else f"{done:,}"
+        print(f"   {phase}: {count} ({rate:,.0f} rows/sec)", file=sys.stderr)
+    else:
+        print(f"▶ {phase}", file=sys.stderr)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m miluim_tool",
+                                     description="Miluim System - headless operations")
+    parser.add_argument('--system-file', default=SYSTEM_FILE,
+                        help="system workbook (default: %(default)s)")
+    parser.add_argument('--store-file',
+                        help="SQLite store (default: next to the system file, used if it exists)")
+    parser.add_argument('--progress', action='store_true',
+                        help="print progress and operation messages to stderr")
+    parser.add_argument('--indent', type=int, default=None, help="indent the JSON summary")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    mecano = commands.add_parser('import-mecano', help="import MECANO attendance files / folders")
+    mecano.add_argument('files', nargs='+')
+    mecano.add_argument('--names', choices=NAME_POLICIES, default='skip')
+    mecano.add_argument('--mapping', help="name mapping file (CSV / Excel)")
+
+    btl = commands.add_parser('import-btl', help="import BTL payment files / folders (one save)")
+    btl.add_argument('files', nargs='+')
+    btl.add_argument('--duplicates', choices=DUPLICATE_POLICIES, default='skip')
+
+    bonus = commands.add_parser('import-40', help="import 40%% bonus files / folders (one save)")
+    bonus.add_argument('files', nargs='+')
+
+    commands.add_parser('calculate', help="full calculation (summary report)")
+    commands.add_parser('sync', help="sync BTL payments to the periods sheet")
+
+    report = commands.add_parser('unpaid-report', help="unpaid differences report")
+    report.add_argument('--output-dir', help="default: next to the system file")
+
+    export = commands.add_parser('export-excel', help="export the SQLite store to Excel")
+    export.add_argument('output')
+
+    commands.add_parser('undo', help="undo the last operation")
+
+    clear = commands.add_parser('clear', help="delete all data except the employee list")
+    clear.add_argument('--yes', action='store_true', required=True,
+                       help="confirm (a backup is taken first)")
+    return parser
+
+
+def run(args, ops):
+    """הפעולה שנבחרה - מחזיר את הסיכום"""
+    if args.command == 'import-mecano':
+        return ops.import_mecano(args.files, name_policy(args.names), args.mapping)
+    if args.command == 'import-btl':
+        return ops.import_btl(args.files, duplicate_policy(args.duplicates))
+    if args.command == 'import-40':
+        return ops.import_40_percent(args.files)
+    if args.command == 'calculate':
+        return ops.calculate_all()
+    if args.command == 'sync':
+        return ops.sync_btl_to_periods()
+    if args.command == 'unpaid-report':
+        return ops.unpaid_report(args.output_dir)
+    if args.command == 'export-excel':
+        return ops.export_excel(args.output)
+    if args.command == 'undo':
+        return ops.undo_last()
+    if args.command == 'clear':
+        return ops.clear_all()
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # JSON בעברית גם בקונסולת Windows (שאינה UTF-8 כברירת מחדל)
+    for stream in (sys.stdout, sys.stderr):
+        if hasattr(stream, 'reconfigure'):
+            stream.reconfigure(encoding='utf-8')
+    # הודעות הפעולות (logging) - ל-stderr; סיכום הסנכרון וכו' רק עם --progress
+    logging.basicConfig(stream=sys.stderr, format="%(message)s",
+                        level=logging.INFO if args.progress else logging.WARNING)
+    store_file = args.store_file or os.path.splitext(args.system_file)[0] + ".sqlite"
+    progress = Progress(_print_progress if args.progress else None)
+    ops = MiluimOperations(args.system_file, store_file, progress)
+
+    started = time.perf_counter()
+    exit_code = 0
+    try:
+        summary = run(args, ops)
+    except (KeyboardInterrupt, OperationCancelled):
+        summary, exit_code = {'cancelled': True}, 130
+    except Exception as e:
+        summary, exit_code = {'error': str(e)}, 1
+
+    summary = dict(summary, command=args.command,
+                   seconds=round(time.perf_counter() - started, 3))
+    print(json.dumps(to_json_value(summary), ensure_ascii=False, indent=args.indent))
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,8 +10,8 @@ from openpyxl.worksheet.datavalidation import DataValidation
 from datetime import datetime
 import os
 
-def create_template():
-    """יצירת תבנית חדשה"""
+def build_template():
+    """חוברת התבנית בזיכרון - גם פורמט הייצוא ממאגר SQLite"""
     
     wb = Workbook()
     
@@ -202,6 +202,13 @@ def create_template():
     
     ws_help.column_dimensions['A'].width = 80
     
+    return wb
+
+def create_template():
+    """יצירת תבנית חדשה"""
+    
+    wb = build_template()
+    
     # שמירה
     output_path = "מערכת_מילואים_תבנית_חדשה.xlsx"
     wb.save(output_path)
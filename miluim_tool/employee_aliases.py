@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+טבלת כינויי עובדים - מיפוי קבוע של כתיב ממקאנו / ב"ל ומספרי ת.ז. לשם המלא ברשימת העובדים
+נשמרת בגיליון מוסתר בקובץ המערכת, ונטענת פעם אחת לכל סשן
+"""
+
+from datetime import datetime
+
+import pandas as pd
+from openpyxl.styles import Font, PatternFill, Alignment
+
+from normalize import normalize_name
+
+ALIAS_SHEET = '🔗 כינויי עובדים'
+ALIAS_HEADERS = ['כינוי', 'סוג', 'שם מלא', 'מקור', 'תאריך עדכון']
+
+KIND_NAME = 'שם'
+KIND_ID = 'ת.ז.'
+
+EMPLOYEES_SHEET = '1️⃣ רשימת עובדים'
+
+
+def normalize_id(value):
+    """ת.ז. להשוואה: ספרות בלבד, בלי אפסים מובילים ובלי '.0' של Excel"""
+    if value is None or pd.isna(value):
+        return ""
+    text = str(value).strip()
+    if text.endswith('.0'):
+        text = text[:-2]
+    return text.lstrip('0')
+
+
+class AliasTable:
+    """
+    מילון כינויים בזיכרון: שם → שם מלא, ת.ז. → שם מלא.
+    ת.ז. מרשימת העובדים נטענות כמיפוי מובנה; כינויים חדשים נכתבים לגיליון ב-write.
+    """
+
+    def __init__(self):
+        self.by_name = {}
+        self.by_id = {}
+        self.known_names = set()
+        self._new_rows = []
+
+    @classmethod
+    def from_session(cls, session):
+        table = cls()
+        if EMPLOYEES_SHEET in session:
+            df_employees = session.frame(EMPLOYEES_SHEET)
+            table.known_names = set(df_employees['שם מלא'].map(normalize_name)) - {''}
+            if 'ת.ז.' in df_employees.columns:
+                for id_number, full_name in zip(df_employees['ת.ז.'], df_employees['שם מלא']):
+                    id_key, full_name = normalize_id(id_number), normalize_name(full_name)
+                    if id_key and full_name:
+                        table.by_id[id_key] = full_name
+        if ALIAS_SHEET in session:
+            for alias, kind, full_name in session.rows(ALIAS_SHEET, max_col=3):
+                full_name = normalize_name(full_name)
+                if not full_name:
+                    continue
+                if kind == KIND_ID:
+                    table.by_id[normalize_id(alias)] = full_name
+                elif normalize_name(alias):
+                    table.by_name[normalize_name(alias)] = full_name
+        return table
+
+    def resolve(self, name, id_number=None):
+        """השם המלא לפי ת.ז. (אם ידועה), אחרת לפי כינוי, אחרת השם עצמו"""
+        id_key = normalize_id(id_number)
+        if id_key and id_key in self.by_id:
+            return self.by_id[id_key]
+        name = normalize_name(name)
+        return self.by_name.get(name, name)
+
+    def add(self, alias, full_name, kind=KIND_NAME, source=''):
+        """רישום כינוי חדש (נשמר לגיליון ב-write)"""
+        if kind == KIND_ID:
+            key, table = normalize_id(alias), self.by_id
+        else:
+            key, table = normalize_name(alias), self.by_name
+        if not key or key == full_name or table.get(key) == full_name:
+            return
+        table[key] = full_name
+        self._new_rows.append((key, kind, full_name, source, datetime.now().strftime('%d/%m/%Y')))
+
+    def learn_id(self, id_number, full_name, source=''):
+        """ת.ז. שעדיין לא ידועה של עובד שזוהה בשם - נרשמת לפעם הבאה"""
+        id_key = normalize_id(id_number)
+        if id_key and id_key not in self.by_id and full_name in self.known_names:
+            self.add(id_key, full_name, KIND_ID, source)
+
+    def write(self, session):
+        """הוספת הכינויים החדשים לגיליון המוסתר (יוצר אותו אם חסר)"""
+        if not self._new_rows:
+            return 0
+        if ALIAS_SHEET not in session:
+            ws = session.wb.create_sheet(ALIAS_SHEET)
+            if session.journal:
+                session.journal.created_sheet(ws)
+            ws.sheet_state = 'hidden'
+            ws.sheet_view.rightToLeft = True
+            header_fill = PatternFill(start_color="528163", end_color="528163", fill_type="solid")
+            header_font = Font(name='Arial', size=11, bold=True, color="FFFFFF")
+            for col, header in enumerate(ALIAS_HEADERS, 1):
+                cell = ws.cell(1, col)
+                cell.value = header
+                cell.font = header_font
+                cell.fill = header_fill
+                cell.alignment = Alignment(horizontal='right', vertical='center')
+                ws.column_dimensions[cell.column_letter].width = 22
+        session.writer(ALIAS_SHEET, len(ALIAS_HEADERS)).append_rows(self._new_rows, None)
+        written = len(self._new_rows)
+        self._new_rows = []
+        return written
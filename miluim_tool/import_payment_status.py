@@ -5,30 +5,21 @@
 מעדכן: תוספת 40%, מועד תשלום ב"ל, חודש ביצוע תשלום, הערות
 """
 
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
-from datetime import datetime
-import shutil
 import os
 
+from backup_store import BackupStore, describe
+from row_writer import ROW_NEW, ROW_UPDATED, RowWriter
+from workbook_session import WorkbookSession
+
 SYSTEM_FILE = r"C:\Projects\LitayPandaMiluim\מערכת_מילואים_מלאה.xlsx"
 IMPORT_FILE = r"C:\Projects\LitayPandaMiluim\ריכוז_תשלומים_ועדכוני_סטטוס_רטרו.xlsx"
 
-# צבעים
-COLOR_NEW = PatternFill(start_color="D4EDDA", end_color="D4EDDA", fill_type="solid")  # ירוק
-COLOR_UPDATED = PatternFill(start_color="FFF3CD", end_color="FFF3CD", fill_type="solid")  # כתום
-
 def backup_file():
-    """יצירת גיבוי"""
-    if os.path.exists(SYSTEM_FILE):
-        backup_dir = os.path.join(os.path.dirname(SYSTEM_FILE), "backups")
-        os.makedirs(backup_dir, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_path = os.path.join(backup_dir, f"backup_before_payment_import_{timestamp}.xlsx")
-        shutil.copy2(SYSTEM_FILE, backup_path)
-        print(f"✅ גיבוי נוצר: {backup_path}")
-        return backup_path
-    return None
+    """יצירת גיבוי במאגר הגיבויים"""
+    backup = BackupStore(SYSTEM_FILE).snapshot("ייבוא סטטוס תשלומים")
+    if backup:
+        print(f"✅ גיבוי נוצר: {describe(backup)}")
+    return describe(backup)
 
 def import_payment_data():
     """ייבוא נתוני תשלומים"""
@@ -44,20 +35,17 @@ def import_payment_data():
     # גיבוי
     backup_path = backup_file()
     
-    # טעינת קבצים - עם data_only כדי לקבל ערכים מחושבים
+    # טעינת קבצים - קובץ הייבוא לקריאה בלבד, עם data_only כדי לקבל ערכים מחושבים
     print("\n📂 טוען קבצים...")
-    wb_system = load_workbook(SYSTEM_FILE)
-    wb_import = load_workbook(IMPORT_FILE, data_only=True)  # קריאת ערכים מחושבים
+    system = WorkbookSession(SYSTEM_FILE, use_cache=True)
+    source = WorkbookSession(IMPORT_FILE, read_only=True, data_only=True)
     
     # שם הגיליון במערכת - צריך לבדוק אם זה שם ישן או חדש
-    if '📊 מעקב מילואים ותשלומים' in wb_system.sheetnames:
-        ws_system = wb_system['📊 מעקב מילואים ותשלומים']
+    if '📊 מעקב מילואים ותשלומים' in system:
         sheet_name = '📊 מעקב מילואים ותשלומים'
     else:
-        ws_system = wb_system['2️⃣ תקופות מילואים']
         sheet_name = '2️⃣ תקופות מילואים'
-    
-    ws_import = wb_import['גיליון1']
+    ws_system = system[sheet_name]
     
     print(f"   ✅ מערכת: {sheet_name}")
     print(f"   ✅ קובץ ייבוא: גיליון1")
@@ -65,8 +53,7 @@ def import_payment_data():
     # בניית מילון מזהי תקופות במערכת
     print("\n🔍 בודק מזהי תקופות במערכת...")
     system_periods = {}
-    for row in range(2, ws_system.max_row + 1):
-        period_id = ws_system.cell(row, 1).value
+    for row, (period_id,) in enumerate(system.rows(sheet_name, max_col=1), 2):
         if period_id:
             system_periods[str(period_id).strip()] = row
     
@@ -77,9 +64,11 @@ def import_payment_data():
     new_count = 0
     updated_count = 0
     skipped_count = 0
+    writer = RowWriter(ws_system, width=20)
+    new_rows = []
     
-    for row in range(2, ws_import.max_row + 1):
-        period_id = ws_import.cell(row, 1).value  # עמודה A - מזהה תקופה
+    for values in source.rows('גיליון1', max_col=20):
+        period_id = values[0]  # עמודה A - מזהה תקופה
         
         if not period_id:
             skipped_count += 1
@@ -88,49 +77,43 @@ def import_payment_data():
         period_id = str(period_id).strip()
         
         # נתוני התשלומים מהקובץ
-        bonus_40 = ws_import.cell(row, 15).value  # עמודה O - תוספת 40%
-        total_btl = ws_import.cell(row, 16).value  # עמודה P - סה"כ תגמול מב"ל
-        btl_date = ws_import.cell(row, 17).value  # עמודה Q - מועד תשלום ב"ל
-        diff_amount = ws_import.cell(row, 18).value  # עמודה R - הפרשים
-        payment_month = ws_import.cell(row, 19).value  # עמודה S - חודש ביצוע תשלום
-        notes = ws_import.cell(row, 20).value  # עמודה T - הערות
+        bonus_40 = values[14]  # עמודה O - תוספת 40%
+        total_btl = values[15]  # עמודה P - סה"כ תגמול מב"ל
+        btl_date = values[16]  # עמודה Q - מועד תשלום ב"ל
+        diff_amount = values[17]  # עמודה R - הפרשים
+        payment_month = values[18]  # עמודה S - חודש ביצוע תשלום
+        notes = values[19]  # עמודה T - הערות
         
         if period_id in system_periods:
             # עדכון שורה קיימת
             system_row = system_periods[period_id]
             
-            # עמודות לעדכון - כולל תגמול ופיצוי!
-            ws_system.cell(system_row, 13).value = ws_import.cell(row, 13).value  # תשלום מעסיק
-            ws_system.cell(system_row, 14).value = ws_import.cell(row, 14).value  # פיצוי 20%
-            ws_system.cell(system_row, 15).value = bonus_40  # תוספת 40%
-            ws_system.cell(system_row, 16).value = total_btl  # סה"כ תגמול
-            ws_system.cell(system_row, 17).value = btl_date  # מועד תשלום ב"ל
-            ws_system.cell(system_row, 18).value = diff_amount  # הפרשים
-            ws_system.cell(system_row, 19).value = payment_month  # חודש ביצוע
-            ws_system.cell(system_row, 20).value = notes  # הערות
-            
-            # צביעה בכתום
-            for col in range(1, 21):
-                ws_system.cell(system_row, col).fill = COLOR_UPDATED
+            # עמודות לעדכון - כולל תגמול ופיצוי! צביעה בכתום
+            writer.update(system_row, {
+                13: values[12],  # תשלום מעסיק
+                14: values[13],  # פיצוי 20%
+                15: bonus_40,  # תוספת 40%
+                16: total_btl,  # סה"כ תגמול
+                17: btl_date,  # מועד תשלום ב"ל
+                18: diff_amount,  # הפרשים
+                19: payment_month,  # חודש ביצוע
+                20: notes,  # הערות
+            }, ROW_UPDATED)
             
             updated_count += 1
             
         else:
-            # הוספת שורה חדשה
-            new_row = ws_system.max_row + 1
-            
-            # העתקת כל העמודות
-            for col in range(1, 21):
-                value = ws_import.cell(row, col).value
-                ws_system.cell(new_row, col).value = value
-                ws_system.cell(new_row, col).fill = COLOR_NEW
-            
+            # שורה חדשה - העתקת כל העמודות
+            new_rows.append(values)
             new_count += 1
     
+    # הוספת השורות החדשות בירוק - בבת אחת
+    writer.append_rows(new_rows, ROW_NEW)
+    
     # שמירה
-    wb_system.save(SYSTEM_FILE)
-    wb_system.close()
-    wb_import.close()
+    system.save()
+    system.close()
+    source.close()
     
     print("\n" + "=" * 60)
     print("✅ ייבוא הושלם בהצלחה!")
@@ -140,7 +123,7 @@ def import_payment_data():
     print(f"   🔄 שורות מעודכנות (כתום): {updated_count}")
     print(f"   ⏭️  שורות דלגו: {skipped_count}")
     
-    print(f"\n💾 גיבוי נשמר ב:\n   {backup_path}")
+    print(f"\n💾 גיבוי:\n   {backup_path}")
     
     print("\n📝 עמודות שעודכנו:")
     print("   • תשלום מעסיק (א-ה)")
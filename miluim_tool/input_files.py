@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+קריאת קבצי הקלט (מקאנו, ב"ל, תוספת 40%) - כל קובץ לטבלת רשומות קומפקטית ומנורמלת
+כמה קבצים נקראים במקביל בתהליכים נפרדים (pd.read_excel חוסם מעבד אחד לכל קובץ);
+המיזוג לקובץ המערכת נעשה רק בתהליך הראשי.
+"""
+
+import os
+import re
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+import normalize
+
+INPUT_EXTENSIONS = ('.xlsx', '.xls', '.xla')
+
+# קובץ ב"ל / 40% אחרי קריאה: מספר מנה, תאריך תשלום ורשומות (עמודות BTL_COLUMNS / BONUS_COLUMNS)
+PaymentBatch = namedtuple('PaymentBatch', 'file mana payment_date records')
+
+BTL_COLUMNS = ['tz', 'name', 'start', 'end', 'claim_type', 'tagmul', 'pitzuy']
+BONUS_COLUMNS = ['tz', 'name', 'start', 'end', 'bonus']
+
+MECANO_COLUMNS = ['שם עובד', 'מחלקה', 'תאריך']
+
+# קובץ ב"ל: המבנה מזוהה מהשורות הראשונות בלבד; עמודות הטקסט נקראות כטקסט
+PEEK_ROWS = 40
+ID_HEADER = 'זהות'
+TEXT_COLUMNS = {ID_HEADER: str, 'שם פרטי': str, 'שם משפחה': str, 'סוג תביעה': str}
+LABEL_MAX_WORDS = 4
+
+
+def expand_files(paths, extensions=INPUT_EXTENSIONS):
+    """
+    קבצי הקלט: נתיב אחד או רשימה; תיקייה - כל קבצי האקסל שבה (לפי שם).
+    קובץ שמופיע פעמיים נקרא פעם אחת
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.lower().endswith(extensions) and not name.startswith('~$'))
+        else:
+            files.append(path)
+    unique = list(dict.fromkeys(os.path.abspath(path) for path in files))
+    if not unique:
+        raise Exception("No input files found!")
+    return unique
+
+
+def _is_label(cell, label_words):
+    """
+    תא תווית: כל המילים מופיעות כמילים שלמות, גם עם ה' הידיעה ('מספר מנה', 'מנה:',
+    'תאריך התשלום' - כן; 'מנהל', 'הזמנה' - לא), בתא קצר (תווית ולא משפט)
+    """
+    if not isinstance(cell, str):
+        return False
+    words = re.findall(r"[\w'\"]+", cell)
+    return len(words) <= LABEL_MAX_WORDS and all(
+        word in words or 'ה' + word in words for word in label_words)
+
+
+def _label_value(peek, label_words, above_row):
+    """הערך שמימין לתווית (התא הראשון שאינו ריק) בשורות שמעל הכותרת, או None"""
+    for r in range(above_row):
+        row = peek.iloc[r].tolist()
+        for c, cell in enumerate(row):
+            if _is_label(cell, label_words):
+                for value in row[c + 1:]:
+                    if pd.notna(value) and str(value).strip():
+                        return value
+    return None
+
+
+def detect_payment_layout(file_path):
+    """
+    זיהוי מבנה קובץ ב"ל מקריאת PEEK_ROWS השורות הראשונות בלבד:
+    שורת הכותרת (השורה עם 'זהות'), מספר המנה ותאריך התשלום לפי התוויות שלהם.
+    תווית שלא נמצאה - המיקום הקבוע של הפורמט המוכר. מחזיר (שורת כותרת, מנה, תאריך)
+    """
+    peek = pd.read_excel(file_path, header=None, nrows=PEEK_ROWS)
+    header_row = next((r for r in range(len(peek))
+                       if any(str(cell).strip() == ID_HEADER for cell in peek.iloc[r])), None)
+    if header_row is None:
+        raise Exception(f"'{ID_HEADER}' header not found in the first {PEEK_ROWS} rows")
+
+    mana_number = _label_value(peek, ('מנה',), header_row)
+    if mana_number is None:
+        mana_number = peek.iloc[2, 1]
+    payment_date = _label_value(peek, ('תאריך', 'תשלום'), header_row)
+    if payment_date is None:
+        payment_date = peek.iloc[9, 1]
+    return header_row, mana_number, payment_date
+
+
+def _read_payment_file(file_path):
+    """קובץ ב"ל: (מספר מנה, תאריך תשלום, טבלת הרשומות) - רק אזור הנתונים נקרא כטבלה"""
+    header_row, mana_number, payment_date = detect_payment_layout(file_path)
+    data = pd.read_excel(file_path, skiprows=header_row, header=0, dtype=TEXT_COLUMNS)
+    data = data.dropna(subset=[ID_HEADER])
+    return mana_number, payment_date, data
+
+
+def _person_columns(data):
+    """ת.ז., שם (כמו בקובץ) ותאריכי שירות מנורמלים"""
+    return {
+        'tz': data['זהות'].map(lambda value: str(value).strip()),
+        'name': data['שם פרטי'].map(str) + ' ' + data['שם משפחה'].map(str),
+        'start': data['תאריך שרות'].map(normalize.normalize_date),
+        'end': data['תאריך סיום שרות'].map(normalize.normalize_date),
+    }
+
+
+def read_btl_file(file_path):
+    """קובץ תשלום ב"ל לרשומות BTL_COLUMNS (סכומים עם סימן - תיקון שלילי נשמר)"""
+    mana_number, payment_date, data = _read_payment_file(file_path)
+    records = pd.DataFrame(dict(
+        _person_columns(data),
+        claim_type=data['סוג תביעה'].map(lambda value: str(value).strip()),
+        tagmul=normalize.parse_amounts(data['תגמול']),
+        pitzuy=normalize.parse_amounts(data['פיצוי %20 למעסיק']),
+    ), columns=BTL_COLUMNS)
+    return PaymentBatch(file_path, mana_number, payment_date, records.reset_index(drop=True))
+
+
+def read_bonus_file(file_path):
+    """קובץ תוספת 40% לרשומות BONUS_COLUMNS (הסכום מ'תגמול נדרש', אחרת 'תגמול')"""
+    mana_number, payment_date, data = _read_payment_file(file_path)
+    if 'תגמול נדרש' in data.columns:
+        bonus = data['תגמול נדרש']
+    else:
+        bonus = data.get('תגמול', pd.Series(0, index=data.index))
+    records = pd.DataFrame(dict(_person_columns(data), bonus=normalize.parse_amounts(bonus)),
+                           columns=BONUS_COLUMNS)
+    return PaymentBatch(file_path, mana_number, payment_date, records.reset_index(drop=True))
+
+
+def read_mecano_file(file_path):
+    """קובץ מקאנו לימי נוכחות: MECANO_COLUMNS עם 'תאריך' מפוענח"""
+    df = pd.read_excel(file_path)
+    df['תאריך'] = pd.to_datetime(df['תאריך'], format='%d.%m.%Y')
+    return df[MECANO_COLUMNS]
+
+
+def parse_files(reader, file_paths, progress, phase="Reading files"):
+    """
+    reader(path) לכל קובץ - כמה קבצים במקביל בתהליכים נפרדים.
+    מחזיר את התוצאות לפי סדר הקבצים; שגיאה מציינת את שם הקובץ
+    """
+    progress.phase(phase, len(file_paths))
+    if len(file_paths) == 1:
+        result = _read_one(reader, file_paths[0])
+        progress.advance()
+        return [result]
+
+    results = {}
+    workers = min(len(file_paths), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(reader, path): path for path in file_paths}
+        try:
+            while pending:
+                done, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = pending.pop(future)
+                    try:
+                        results[path] = future.result()
+                    except Exception as e:
+                        raise Exception(f"{os.path.basename(path)}: {e}") from e
+                    progress.advance()
+                progress.check()
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+    return [results[path] for path in file_paths]
+
+
+def _read_one(reader, file_path):
+    try:
+        return reader(file_path)
+    except Exception as e:
+        raise Exception(f"{os.path.basename(file_path)}: {e}") from e
@@ -16,7 +16,7 @@ if %errorlevel% neq 0 (
 )
 
 echo Installing required packages...
-pip install pandas openpyxl --quiet
+pip install pandas "openpyxl>=3.1,<3.2" --quiet
 
 echo Starting application...
 python miluim_manager.py
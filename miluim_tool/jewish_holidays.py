@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+לוח חגים ישראלי מחושב - לכל שנה גרגוריאנית, ללא רשת
+חישוב אלגוריתמי של הלוח העברי (מולד + דחיות ראש השנה)
+"""
+
+from datetime import date
+from functools import lru_cache
+
+# R.D. (= date.toordinal) של א' תשרי שנה 1
+HEBREW_EPOCH = -1373427
+
+# ימים מא' ניסן עד א' תשרי שאחריו: ניסן 30, אייר 29, סיוון 30, תמוז 29, אב 30, אלול 29
+NISAN_TO_TISHREI = 177
+
+HOLIDAY_NAMES = {
+    'rosh_hashana_1': 'ראש השנה א',
+    'rosh_hashana_2': 'ראש השנה ב',
+    'yom_kippur': 'יום כיפור',
+    'sukkot': 'סוכות',
+    'shemini_atzeret': 'שמיני עצרת',
+    'pesach': 'פסח',
+    'pesach_7': 'שביעי של פסח',
+    'atzmaut': 'יום העצמאות',
+    'shavuot': 'שבועות',
+}
+
+
+def _hebrew_elapsed_days(year):
+    """ימים מתחילת הלוח ועד מולד תשרי של השנה (כולל דחיית מולד זקן / לא אד"ו)"""
+    months = (235 * year - 234) // 19
+    parts = 12084 + 13753 * months
+    day = months * 29 + parts // 25920
+    if (3 * (day + 1)) % 7 < 3:
+        day += 1
+    return day
+
+
+def _hebrew_year_delay(year):
+    """דחיות גטר"ד / בטו תקפט - שמירה על אורך שנה חוקי"""
+    ny0 = _hebrew_elapsed_days(year - 1)
+    ny1 = _hebrew_elapsed_days(year)
+    ny2 = _hebrew_elapsed_days(year + 1)
+    if ny2 - ny1 == 356:
+        return 2
+    if ny1 - ny0 == 382:
+        return 1
+    return 0
+
+
+def rosh_hashana(hebrew_year):
+    """ordinal של א' תשרי בשנה העברית"""
+    return HEBREW_EPOCH + _hebrew_elapsed_days(hebrew_year) + _hebrew_year_delay(hebrew_year)
+
+
+def _atzmaut(nisan_1):
+    """יום העצמאות - ה' אייר עם הקדמה/דחייה לפי יום בשבוע"""
+    day = nisan_1 + 30 + 4
+    weekday = date.fromordinal(day).weekday()  # 0 = שני
+    if weekday == 4:      # שישי → חמישי
+        return day - 1
+    if weekday == 5:      # שבת → חמישי
+        return day - 2
+    if weekday == 0:      # שני → שלישי
+        return day + 1
+    return day
+
+
+@lru_cache(maxsize=None)
+def _year_table(year):
+    """(חגים, ערבי חג) לשנה גרגוריאנית - מילונים ordinal → שם"""
+    tishrei_1 = rosh_hashana(year + 3761)   # ראש השנה בסתיו של השנה
+    nisan_1 = tishrei_1 - NISAN_TO_TISHREI  # ניסן באביב של אותה שנה
+    atzmaut = _atzmaut(nisan_1)
+
+    holidays = {
+        nisan_1 + 14: 'pesach',
+        nisan_1 + 20: 'pesach_7',
+        atzmaut: 'atzmaut',
+        nisan_1 + 64: 'shavuot',
+        tishrei_1: 'rosh_hashana_1',
+        tishrei_1 + 1: 'rosh_hashana_2',
+        tishrei_1 + 9: 'yom_kippur',
+        tishrei_1 + 14: 'sukkot',
+        tishrei_1 + 21: 'shemini_atzeret',
+    }
+    eves = {
+        nisan_1 + 13: 'pesach',
+        nisan_1 + 19: 'pesach_7',
+        atzmaut - 1: 'atzmaut',
+        nisan_1 + 63: 'shavuot',
+        tishrei_1 - 1: 'rosh_hashana_1',
+        tishrei_1 + 8: 'yom_kippur',
+        tishrei_1 + 13: 'sukkot',
+        tishrei_1 + 20: 'shemini_atzeret',
+    }
+    return holidays, eves
+
+
+@lru_cache(maxsize=None)
+def _year_masks(year):
+    """ביטמאסק לשנה: ביט n = היום ה-n בשנה (0 = 1 בינואר)"""
+    jan_1 = date(year, 1, 1).toordinal()
+    holidays, eves = _year_table(year)
+    holiday_mask = sum(1 << (d - jan_1) for d in holidays)
+    eve_mask = sum(1 << (d - jan_1) for d in eves)
+    return jan_1, holiday_mask, eve_mask
+
+
+def holiday_ordinals(year):
+    """קבוצת ordinals של ימי החג בשנה הגרגוריאנית"""
+    return frozenset(_year_table(year)[0])
+
+
+def holiday_eve_ordinals(year):
+    """קבוצת ordinals של ערבי החג בשנה הגרגוריאנית"""
+    return frozenset(_year_table(year)[1])
+
+
+def holidays_for_year(year):
+    """רשימת (תאריך, שם) של ימי החג בשנה, לפי סדר"""
+    holidays, _ = _year_table(year)
+    return [(date.fromordinal(d), HOLIDAY_NAMES[key]) for d, key in sorted(holidays.items())]
+
+
+def is_holiday(day):
+    jan_1, holiday_mask, _ = _year_masks(day.year)
+    return bool((holiday_mask >> (day.toordinal() - jan_1)) & 1)
+
+
+def is_holiday_eve(day):
+    jan_1, _, eve_mask = _year_masks(day.year)
+    return bool((eve_mask >> (day.toordinal() - jan_1)) & 1)
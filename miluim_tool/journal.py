@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+יומן פעולות - מה כל פעולה שינתה בקובץ המערכת, לביטול הפעולה האחרונה
+נשמרים רק התאים ששונו (ערך וצבע קודמים), השורות שנוספו והשורות שנמחקו -
+במקום עותק מלא של הקובץ. הביטול מחזיר אותם בטעינה ושמירה אחת.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from datetime import date, datetime, time
+
+from openpyxl import load_workbook
+from openpyxl.cell.cell import MergedCell
+from openpyxl.styles import Alignment, Border, Color, Font, PatternFill, Protection
+from openpyxl.styles.fills import Fill
+from openpyxl.xml.functions import fromstring, tostring
+
+from openpyxl_compat import apply_style, drop_rows, style_key, style_of
+
+
+def _source(system_file):
+    return os.path.normcase(os.path.abspath(system_file))
+
+
+def journal_dir(system_file):
+    """תיקיית יומן לכל קובץ מערכת (לפי הנתיב) - יומן של קובץ אחד לא חל על אחר"""
+    source = _source(system_file)
+    stem = os.path.splitext(os.path.basename(source))[0]
+    tag = hashlib.sha1(source.encode('utf-8')).hexdigest()[:10]
+    return os.path.join(os.path.dirname(source), "backups", "journal", f"{stem}_{tag}")
+
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+# --- ערכים וצבעים בפורמט JSON ---
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {'$datetime': value.isoformat()}
+    if isinstance(value, date):
+        return {'$date': value.isoformat()}
+    if isinstance(value, time):
+        return {'$time': value.isoformat()}
+    if hasattr(value, 'item'):  # numpy
+        return value.item()
+    return str(value)
+
+
+def _decode(obj):
+    if '$datetime' in obj:
+        return datetime.fromisoformat(obj['$datetime'])
+    if '$date' in obj:
+        return date.fromisoformat(obj['$date'])
+    if '$time' in obj:
+        return time.fromisoformat(obj['$time'])
+    return obj
+
+
+def _fill_tag(cell):
+    """צבע הרקע של תא כ-dict קטן (או None - בלי רקע)"""
+    fill = cell.fill
+    if not fill or not fill.fill_type:
+        return None
+    color = fill.fgColor
+    tag = {'type': fill.fill_type, 'tint': color.tint}
+    if color.type == 'theme':
+        tag['theme'] = color.theme
+    elif color.type == 'indexed':
+        tag['indexed'] = color.indexed
+    else:
+        tag['rgb'] = color.rgb
+    return tag
+
+
+def _apply_fill(cell, tag):
+    if tag is None:
+        cell.fill = PatternFill()
+        return
+    color = Color(rgb=tag.get('rgb'), theme=tag.get('theme'), indexed=tag.get('indexed'),
+                  tint=tag.get('tint', 0))
+    cell.fill = PatternFill(fill_type=tag['type'], start_color=color, end_color=color)
+
+
+_STYLE_PARTS = (('font', Font), ('fill', Fill), ('border', Border),
+                ('alignment', Alignment), ('protection', Protection))
+
+
+def _style_record(cell):
+    """הסגנון המלא של תא (גופן, רקע, גבולות, יישור, הגנה, תבנית מספר) בפורמט JSON"""
+    record = {name: tostring(getattr(cell, name).to_tree()).decode('utf-8')
+              for name, _ in _STYLE_PARTS}
+    record['number_format'] = cell.number_format
+    return record
+
+
+def _apply_style_record(cell, record):
+    for name, part in _STYLE_PARTS:
+        setattr(cell, name, part.from_tree(fromstring(record[name])))
+    cell.number_format = record['number_format']
+
+
+class Journal:
+    """
+    רישום השינויים של פעולה אחת. נקרא לפני כל שינוי:
+    cell - תא שעומד להשתנות, appended - שורה שנוספה בסוף הגיליון,
+    removed_rows - שורות שעומדות להימחק, created_sheet - גיליון חדש.
+    """
+
+    def __init__(self, label):
+        self.label = label
+        self.entries = []
+        self._cells = set()
+
+    def cell(self, ws, row, col):
+        key = (ws.title, row, col)
+        if key in self._cells:
+            return  # הערך הקודם כבר נרשם
+        self._cells.add(key)
+        cell = ws.cell(row, col)
+        self.entries.append({'op': 'cell', 'sheet': ws.title, 'row': row, 'col': col,
+                             'old': cell.value, 'fill': _fill_tag(cell)})
+
+    def appended(self, ws, row):
+        last = self.entries[-1] if self.entries else None
+        if last and last['op'] == 'append' and last['sheet'] == ws.title \
+                and last['first'] + last['count'] == row:
+            last['count'] += 1
+        else:
+            self.entries.append({'op': 'append', 'sheet': ws.title, 'first': row, 'count': 1})
+
+    def removed_rows(self, ws, first_row):
+        # כל סגנון נשמר פעם אחת בטבלה; כל תא - (ערך, מספר הסגנון או None)
+        styles, style_ids = [], {}
+        rows = []
+        for cells in ws.iter_rows(min_row=first_row):
+            row = []
+            for cell in cells:
+                key = style_key(cell)
+                if key is not None and key not in style_ids:
+                    style_ids[key] = len(styles)
+                    styles.append(_style_record(cell))
+                row.append((cell.value, style_ids.get(key)))
+            rows.append(row)
+        if rows:
+            self.entries.append({'op': 'rows', 'sheet': ws.title, 'first': first_row,
+                                 'rows': rows, 'styles': styles})
+
+    def created_sheet(self, ws):
+        self.entries.append({'op': 'sheet', 'sheet': ws.title})
+
+    def commit(self, system_file):
+        """שמירת היומן אחרי שמירת קובץ המערכת (עם טביעת הקובץ שנשמר)"""
+        after_hash = file_hash(system_file)
+        folder = journal_dir(system_file)
+        if not self.entries:
+            # פעולה בלי שינויים - היומן הקודם עדיין מתאר את הקובץ
+            _retarget_latest(folder, system_file, after_hash)
+            return None
+        os.makedirs(folder, exist_ok=True)
+        name = f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.json.gz"
+        record = {'label': self.label, 'time': datetime.now().strftime('%d/%m/%Y %H:%M'),
+                  'source': _source(system_file), 'after_hash': after_hash,
+                  'entries': self.entries}
+        with gzip.open(os.path.join(folder, name), 'wt', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False, default=_encode)
+        return name
+
+
+def _journal_files(folder):
+    if not os.path.isdir(folder):
+        return []
+    return sorted(name for name in os.listdir(folder) if name.endswith('.json.gz'))
+
+
+def _read(folder, name):
+    with gzip.open(os.path.join(folder, name), 'rt', encoding='utf-8') as f:
+        return json.load(f, object_hook=_decode)
+
+
+def _belongs(record, system_file):
+    return record.get('source') == _source(system_file)
+
+
+def _retarget_latest(folder, system_file, after_hash):
+    names = _journal_files(folder)
+    if not names:
+        return
+    record = _read(folder, names[-1])
+    if not _belongs(record, system_file):
+        return
+    record['after_hash'] = after_hash
+    with gzip.open(os.path.join(folder, names[-1]), 'wt', encoding='utf-8') as f:
+        json.dump(record, f, ensure_ascii=False, default=_encode)
+
+
+def last_operation(system_file):
+    """(שם הפעולה, זמן) של הפעולה האחרונה שאפשר לבטל, או None"""
+    folder = journal_dir(system_file)
+    names = _journal_files(folder)
+    if not names:
+        return None
+    record = _read(folder, names[-1])
+    if not _belongs(record, system_file):
+        return None
+    return record['label'], record['time']
+
+
+def _restore_rows(ws, entry):
+    """החזרת שורות שנמחקו - כל סגנון נבנה פעם אחת ומועתק לשאר התאים שלו"""
+    styles = entry.get('styles')
+    built = {}
+    for row_offset, cells in enumerate(entry['rows']):
+        for col, saved in enumerate(cells, 1):
+            cell = ws.cell(entry['first'] + row_offset, col)
+            if isinstance(cell, MergedCell):
+                continue  # חלק מתא ממוזג - הערך נמצא בתא הראשון שלו
+            if styles is None:
+                # יומן בפורמט הקודם: ערך, רקע ותבנית מספר
+                value, fill, number_format = saved
+                cell.number_format = number_format
+                _apply_fill(cell, fill)
+            else:
+                value, style_id = saved
+                if style_id in built:
+                    apply_style(cell, built[style_id])
+                elif style_id is not None:
+                    _apply_style_record(cell, styles[style_id])
+                    built[style_id] = style_of(cell)
+            cell.value = value
+
+
+def undo_last(system_file):
+    """
+    ביטול הפעולה האחרונה לפי היומן שלה. נכשל אם הקובץ השתנה מאז
+    (למשל שחזור גיבוי או סקריפט חיצוני). מחזיר את שם הפעולה שבוטלה.
+    """
+    folder = journal_dir(system_file)
+    names = _journal_files(folder)
+    if not names:
+        raise Exception("אין פעולה לביטול")
+    record = _read(folder, names[-1])
+    if not _belongs(record, system_file):
+        raise Exception("היומן האחרון שייך לקובץ מערכת אחר - אי אפשר לבטל")
+    if file_hash(system_file) != record['after_hash']:
+        raise Exception("קובץ המערכת השתנה מאז הפעולה האחרונה - אי אפשר לבטל.\n"
+                        "אפשר לשחזר מגיבוי.")
+
+    wb = load_workbook(system_file)
+    for entry in reversed(record['entries']):
+        if entry['sheet'] not in wb.sheetnames:
+            continue
+        if entry['op'] == 'sheet':
+            del wb[entry['sheet']]
+            continue
+        ws = wb[entry['sheet']]
+        if entry['op'] == 'cell':
+            cell = ws.cell(entry['row'], entry['col'])
+            cell.value = entry['old']
+            _apply_fill(cell, entry['fill'])
+        elif entry['op'] == 'append':
+            drop_rows(ws, entry['first'], entry['first'] + entry['count'] - 1)
+        elif entry['op'] == 'rows':
+            _restore_rows(ws, entry)
+    wb.save(system_file)
+    wb.close()
+
+    os.remove(os.path.join(folder, names[-1]))
+    # הפעולה הקודמת מתארת עכשיו את הקובץ אחרי הביטול
+    _retarget_latest(folder, system_file, file_hash(system_file))
+    return record['label']
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+עיבוד קובץ נוכחות ממקאנו לתקופות מילואים - בפעולות וקטוריות
+קיבוץ ימים רצופים לכל עובד ופיצול התקופות לפי חודשים קלנדריים
+"""
+
+import numpy as np
+import pandas as pd
+
+from normalize import normalize_name
+
+PERIOD_COLUMNS = ['עובד', 'מחלקה', 'התחלה', 'סיום', 'ימים']
+
+
+def group_consecutive_days(df):
+    """
+    קיבוץ ימים רצופים: מיון לפי עובד ותאריך, זיהוי שבירה לפי הפרש תאריכים,
+    מספור רצפים ב-cumsum ו-groupby אחד. המחלקה היא של השורה הראשונה של העובד.
+    מחזיר טבלה עם 'עובד', 'מחלקה', 'התחלה', 'סיום'.
+    """
+    # מיון לפי השם המנורמל - שם שנכתב עם רווחים שונים הוא אותו עובד
+    df = df.assign(_employee=df['שם עובד'].map(normalize_name)).sort_values(['_employee', 'תאריך'])
+    employees = df['_employee']
+    valid = (employees != '') & df['תאריך'].notna()
+    df, employees = df[valid], employees[valid]
+
+    dates = df['תאריך']
+    new_employee = employees.ne(employees.shift()).to_numpy()
+    gap = dates.diff().dt.days.ne(1).to_numpy()
+    run_id = np.cumsum(new_employee | gap)
+
+    positions = np.arange(len(df))
+    employee_start = np.maximum.accumulate(np.where(new_employee, positions, 0))
+    departments = df['מחלקה'].to_numpy()[employee_start]
+
+    runs = pd.DataFrame({
+        'עובד': employees.to_numpy(),
+        'מחלקה': departments,
+        'תאריך': dates.to_numpy(),
+        'run': run_id,
+    })
+    return runs.groupby('run', sort=False).agg(
+        עובד=('עובד', 'first'),
+        מחלקה=('מחלקה', 'first'),
+        התחלה=('תאריך', 'min'),
+        סיום=('תאריך', 'max'),
+    ).reset_index(drop=True)
+
+
+def split_periods_by_month(starts, ends):
+    """
+    פיצול תקופות לפי חודשים קלנדריים על מערכים שלמים.
+    מחזיר (source_index, starts, ends, days) - שורה לכל חלק חודשי, לפי הסדר.
+    """
+    start_days = pd.to_datetime(pd.Series(starts)).to_numpy(dtype='datetime64[D]')
+    end_days = pd.to_datetime(pd.Series(ends)).to_numpy(dtype='datetime64[D]')
+
+    start_months = start_days.astype('datetime64[M]')
+    end_months = end_days.astype('datetime64[M]')
+    months_spanned = np.maximum((end_months - start_months).astype(np.int64) + 1, 0)
+    months_spanned[end_days < start_days] = 0
+
+    source_index = np.repeat(np.arange(len(start_days)), months_spanned)
+    offsets = np.arange(len(source_index)) - np.repeat(
+        np.cumsum(months_spanned) - months_spanned, months_spanned)
+    months = start_months[source_index] + offsets.astype('timedelta64[M]')
+
+    split_starts = np.maximum(start_days[source_index], months.astype('datetime64[D]'))
+    month_ends = (months + np.timedelta64(1, 'M')).astype('datetime64[D]') - np.timedelta64(1, 'D')
+    split_ends = np.minimum(end_days[source_index], month_ends)
+    days = (split_ends - split_starts).astype(np.int64) + 1
+
+    return source_index, split_starts, split_ends, days
+
+
+def mecano_periods(df):
+    """מקובץ מקאנו (עם 'תאריך' מפוענח) לטבלת תקופות חודשיות: PERIOD_COLUMNS"""
+    raw_periods = group_consecutive_days(df)
+    source_index, starts, ends, days = split_periods_by_month(
+        raw_periods['התחלה'], raw_periods['סיום'])
+    return pd.DataFrame({
+        'עובד': raw_periods['עובד'].to_numpy()[source_index],
+        'מחלקה': raw_periods['מחלקה'].to_numpy()[source_index],
+        'התחלה': pd.to_datetime(starts),
+        'סיום': pd.to_datetime(ends),
+        'ימים': days,
+    }, columns=PERIOD_COLUMNS)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+פתרון שמות עובדים שלא נמצאו ברשימת העובדים - באצווה אחת
+איסוף כל השמות הלא מוכרים מראש, הצעת התאמה לכל שם, וטעינת מיפוי מוכן מקובץ
+"""
+
+import difflib
+import os
+
+import pandas as pd
+
+from normalize import normalize_name
+
+# ערכי החלטה למיפוי: שם קיים ברשימה, עובד חדש, או דילוג
+NEW = "NEW"
+SKIP = None
+
+_NEW_VALUES = {'new', 'חדש'}
+_SKIP_VALUES = {'', 'skip', 'דלג', 'דילוג'}
+
+
+def collect_unknown_names(names, system_names):
+    """שמות שלא ברשימת העובדים - כל שם פעם אחת, לפי סדר ההופעה"""
+    unknown = []
+    seen = set()
+    for name in names:
+        if name and name not in system_names and name not in seen:
+            seen.add(name)
+            unknown.append(name)
+    return unknown
+
+
+# הצעה לפי דמיון: עם מילה משותפת (שם פרטי / משפחה) - דמיון גבוה, בלי מילה משותפת -
+# רק שגיאת כתיב קלה. שם משפחה משותף לבדו אינו התאמה (בני משפחה)
+SHARED_TOKEN_CUTOFF = 0.8
+TYPO_CUTOFF = 0.9
+
+
+def suggest_match(name, system_names):
+    """
+    הצעת שם קיים: אותן מילים בסדר אחר, שם שמכיל את כל המילים (שם אמצעי נוסף),
+    אחרת השם הדומה ביותר לפי הסף. בלי התאמה בטוחה - None (דילוג)
+    """
+    words = name.split()
+    tokens = set(words)
+    best, best_score = None, 0
+    for candidate in sorted(system_names):
+        candidate_words = candidate.split()
+        candidate_tokens = set(candidate_words)
+        if sorted(candidate_words) == sorted(words):
+            return candidate
+        ratio = difflib.SequenceMatcher(None, name, candidate).ratio()
+        shared = candidate_tokens & tokens
+        if len(shared) >= 2 and shared in (tokens, candidate_tokens):
+            score = 1 + ratio  # כל המילים של השם הקצר - לפני התאמה לפי דמיון
+        elif ratio >= (SHARED_TOKEN_CUTOFF if shared else TYPO_CUTOFF):
+            score = ratio
+        else:
+            continue
+        if score > best_score:
+            best, best_score = candidate, score
+    return best
+
+
+def load_mapping_file(path):
+    """
+    קובץ מיפוי מוכן (CSV / Excel): עמודה ראשונה - השם בקובץ המקור,
+    עמודה שנייה - שם ברשימת העובדים, 'NEW'/'חדש' לעובד חדש, או ריק/'SKIP' לדילוג.
+    """
+    if os.path.splitext(path)[1].lower() in ('.xlsx', '.xls'):
+        df = pd.read_excel(path, dtype=str)
+    else:
+        df = pd.read_csv(path, dtype=str, encoding='utf-8-sig')
+
+    mapping = {}
+    for source, target in zip(df.iloc[:, 0], df.iloc[:, 1]):
+        source = normalize_name(source)
+        if not source:
+            continue
+        target = normalize_name(target)
+        if target.lower() in _NEW_VALUES:
+            mapping[source] = NEW
+        elif target.lower() in _SKIP_VALUES:
+            mapping[source] = SKIP
+        else:
+            mapping[source] = target
+    return mapping
+
+
+def resolve_names(unknown_names, system_names, preset=None, ask=None):
+    """
+    החלטה לכל שם לא מוכר: קודם מהמיפוי המוכן (preset), ואת השאר -
+    בקריאה אחת ל-ask(names, suggestions) שמחזירה {שם: החלטה}, או None לביטול.
+    בלי ask (ריצה ללא ממשק) שם שלא במיפוי מדולג.
+    מחזיר {שם: שם קיים / NEW / SKIP}, או None אם המשתמש ביטל.
+    """
+    preset = preset or {}
+    decisions = {}
+    pending = []
+    for name in unknown_names:
+        if name in preset and (preset[name] in (NEW, SKIP) or preset[name] in system_names):
+            decisions[name] = preset[name]
+        else:
+            pending.append(name)
+
+    if pending and ask is not None:
+        suggestions = {name: suggest_match(name, system_names) for name in pending}
+        answers = ask(pending, suggestions)
+        if answers is None:
+            return None
+        decisions.update(answers)
+
+    for name in pending:
+        decisions.setdefault(name, SKIP)
+    return decisions
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+נרמול שמות ותאריכים - משותף לכל הפעולות במערכת
+"""
+
+import pandas as pd
+from datetime import datetime
+
+
+def normalize_name(name):
+    if pd.isna(name):
+        return ""
+    return ' '.join(str(name).strip().split())
+
+
+def format_date(date_val):
+    if pd.isna(date_val):
+        return ""
+    if isinstance(date_val, datetime):
+        return date_val.strftime('%d/%m/%Y')
+    date_str = str(date_val).strip()
+    if len(date_str) == 10 and date_str[2] == '.' and date_str[5] == '.':
+        parts = date_str.split('.')
+        return f"{parts[0]}/{parts[1]}/{parts[2]}"
+    if len(date_str) == 8 and date_str[2] == '/' and date_str[5] == '/':
+        parts = date_str.split('/')
+        year = '20' + parts[2] if int(parts[2]) < 50 else '19' + parts[2]
+        return f"{parts[0]}/{parts[1]}/{year}"
+    if hasattr(date_val, 'strftime'):
+        return date_val.strftime('%d/%m/%Y')
+    return date_str
+
+
+def normalize_date(date_val):
+    formatted = format_date(date_val)
+    return formatted.strip() if formatted else ""
+
+
+def parse_date(date_str):
+    if pd.isna(date_str) or not date_str:
+        return None
+    if isinstance(date_str, datetime):
+        return date_str
+    try:
+        parts = str(date_str).split('/')
+        if len(parts) == 3:
+            return datetime(int(parts[2]), int(parts[1]), int(parts[0]))
+    except:
+        pass
+    return None
+
+
+def parse_amounts(values):
+    """
+    עמודת סכומים (כמו בקבצי ב"ל) למספרים עם סימן - בפעולה אחת על כל העמודה:
+    '4,000' / '800+' / '-300' / '300-' / '(300)' / 1200. ריק - 0, טקסט שאינו מספר - NaN
+    """
+    values = pd.Series(values)
+    text = values.where(values.notna(), '').map(str).str.replace(r'[\s,₪]', '', regex=True)
+    negative = (text.str.startswith('-') | text.str.endswith('-')
+                | (text.str.startswith('(') & text.str.endswith(')')))
+    digits = text.str.strip('+-()')
+    amounts = pd.to_numeric(digits, errors='coerce').astype(float).abs()
+    amounts[digits == ''] = 0.0
+    return amounts.where(~negative, -amounts)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+כל הגישה לפנימיות של openpyxl במקום אחד (ws._cells, cell._style, wb._fills,
+הארכיון של גיליון לקריאה בלבד) - הן מהירות בהרבה מה-API הציבורי לכתיבה ומחיקה
+בבת אחת, אבל אינן חלק מהממשק ויכולות להשתנות בין גרסאות.
+נבדקו מול openpyxl 3.1; בכל גרסה אחרת נעשה שימוש ב-API הציבורי בלבד (איטי יותר).
+"""
+
+import warnings
+from copy import copy
+from xml.etree.ElementTree import iterparse
+
+import openpyxl
+from openpyxl.utils import get_column_letter
+
+TESTED_VERSIONS = ((3, 1),)
+
+
+def _major_minor(version):
+    try:
+        return tuple(int(part) for part in version.split('.')[:2])
+    except ValueError:
+        return None
+
+
+FAST_PATH = _major_minor(openpyxl.__version__) in TESTED_VERSIONS
+if not FAST_PATH:
+    warnings.warn(f"openpyxl {openpyxl.__version__} was not tested - using the public API only "
+                  f"(slower bulk writes)")
+else:
+    from openpyxl.styles.cell_style import StyleArray
+
+
+# --- סגנונות ---
+
+def style_of(cell):
+    """הסגנון המלא של תא, להחלה על תאים אחרים באותה חוברת (apply_style)"""
+    if FAST_PATH:
+        return copy(cell._style)
+    return (copy(cell.font), copy(cell.fill), copy(cell.border), copy(cell.alignment),
+            cell.number_format, copy(cell.protection))
+
+
+def apply_style(cell, style):
+    if FAST_PATH:
+        cell._style = copy(style)
+    else:
+        cell.font, cell.fill, cell.border, cell.alignment, cell.number_format, cell.protection = style
+
+
+def fill_handle(wb, fill):
+    """רישום fill בחוברת פעם אחת - הערך המוחזר משמש את set_fill"""
+    if FAST_PATH:
+        return wb._fills.add(fill)
+    return fill
+
+
+def set_fill(cell, handle):
+    """צביעת תא - שאר הסגנון נשמר"""
+    if FAST_PATH:
+        if not cell._style:
+            cell._style = StyleArray()
+        cell._style.fillId = handle
+    else:
+        cell.fill = handle
+
+
+def style_key(cell):
+    """
+    מפתח hashable לסגנון התא (תא רגיל או תא לקריאה בלבד) - לשמירת סגנון פעם אחת.
+    תא בלי סגנון - None
+    """
+    if not getattr(cell, 'has_style', False):
+        return None
+    if FAST_PATH:
+        return tuple(cell._style if hasattr(cell, '_style') else cell.style_array)
+    # תא רגיל מחזיר StyleProxy (לא hashable) - העותק הוא אובייקט הסגנון עצמו
+    return (copy(cell.font), copy(cell.fill), copy(cell.border), copy(cell.alignment),
+            cell.number_format, copy(cell.protection))
+
+
+# --- שורות ---
+
+def drop_rows(ws, first_row, last_row=None):
+    """
+    מחיקת התאים בשורות first_row..last_row (כולל; None - עד סוף הגיליון) בפעולה אחת.
+    רק לשורות שאין אחריהן נתונים - שורות שמתחת לא מוזזות למעלה
+    """
+    if FAST_PATH:
+        for key in [key for key in ws._cells
+                    if key[0] >= first_row and (last_row is None or key[0] <= last_row)]:
+            del ws._cells[key]
+        return
+    last_row = ws.max_row if last_row is None else last_row
+    if last_row >= first_row:
+        ws.delete_rows(first_row, last_row - first_row + 1)
+
+
+# --- גיליון לקריאה בלבד ---
+
+def read_only_layout(ws):
+    """
+    רוחב עמודות, כיוון מימין לשמאל והקפאת כותרת של גיליון לקריאה בלבד - מתחילת
+    ה-XML של הגיליון, בלי לקרוא את הנתונים. בלי גישה לארכיון - ברירות מחדל
+    """
+    widths, right_to_left, freeze = {}, False, None
+    if not FAST_PATH:
+        return widths, right_to_left, freeze
+    with ws.parent._archive.open(ws._worksheet_path) as source:
+        for _, element in iterparse(source, events=('start',)):
+            tag = element.tag.rsplit('}', 1)[-1]
+            if tag == 'sheetView':
+                right_to_left = element.get('rightToLeft') in ('1', 'true')
+            elif tag == 'pane' and element.get('state') == 'frozen':
+                freeze = element.get('topLeftCell')
+            elif tag == 'col' and element.get('width'):
+                for col in range(int(element.get('min')), int(element.get('max')) + 1):
+                    widths[get_column_letter(col)] = float(element.get('width'))
+            elif tag == 'sheetData':
+                break
+    return widths, right_to_left, freeze
@@ -0,0 +1,864 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+הפעולות של מערכת המילואים - בלי ממשק (בלי tkinter)
+כל פעולה מקבלת את ההחלטות שלה כפונקציות (מיפוי שמות, עדכון כפילות) ומחזירה
+סיכום כ-dict. את אותן פעולות מריצים הממשק (בתהליכון רקע) והשורת-פקודה.
+
+Progress - ערוץ ההתקדמות והביטול: שלב, שורות שעובדו, שורות לשנייה.
+ביטול נבדק בין שורות ולפני השמירה; הקובץ נשמר רק בסוף הפעולה,
+כך שפעולה שבוטלה לא משנה דבר.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+import normalize
+from backup_store import BackupStore, describe as describe_backup
+from btl_matching import match_btl_to_periods, reconcile_btl_with_periods
+from employee_aliases import AliasTable
+from input_files import (expand_files, parse_files, read_bonus_file, read_btl_file,
+                         read_mecano_file)
+from journal import last_operation, undo_last
+from mecano_parser import mecano_periods
+from name_resolution import NEW, collect_unknown_names, load_mapping_file, resolve_names
+from payment_list import rebuild_payment_list
+from period_ids import PeriodIdAllocator
+from record_index import BtlRecord, btl_index, period_index
+from row_writer import ROW_NEW, ROW_ORPHAN, ROW_UPDATED
+from sqlite_store import StoreSession
+from unpaid_report import build_unpaid_report
+from work_calendar import DayTypeCalendar
+from workbook_session import WorkbookSession
+
+# הודעות הפעולות (סיכום סנכרון, שגיאות שורה) - דרך logging ולא print, כך ש-stdout של
+# שורת הפקודה נשאר JSON בלבד. מי שמפעיל את הפעולות קובע לאן הן נכתבות
+logger = logging.getLogger(__name__)
+
+# לוח סוגי ימים (סכומים מצטברים) לספירת ימי עבודה - חגים מחושבים לכל שנה
+WORK_CALENDAR = DayTypeCalendar()
+
+PROGRESS_INTERVAL = 0.1  # שניות בין אירועי התקדמות
+
+
+class OperationCancelled(Exception):
+    """הפעולה בוטלה לפני השמירה - הקובץ לא השתנה"""
+
+
+class Progress:
+    """
+    דיווח התקדמות וביטול. listener(phase, done, total, rate) נקרא בכל שלב חדש
+    ולכל היותר פעם ב-PROGRESS_INTERVAL בתוך שלב.
+    """
+
+    def __init__(self, listener=None):
+        self.listener = listener
+        self.phase_name = ""
+        self.done = 0
+        self.total = None
+        self._cancel = threading.Event()
+        self._phase_started = time.monotonic()
+        self._last_event = 0
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check(self):
+        if self.cancelled:
+            raise OperationCancelled()
+
+    def phase(self, name, total=None):
+        """תחילת שלב (בודק ביטול לפני שנכנסים אליו)"""
+        self.check()
+        self.phase_name, self.done, self.total = name, 0, total
+        self._phase_started = time.monotonic()
+        self._emit()
+
+    def advance(self, count=1):
+        self.done += count
+        if time.monotonic() - self._last_event >= PROGRESS_INTERVAL:
+            self._emit()
+        self.check()
+
+    def rate(self):
+        elapsed = time.monotonic() - self._phase_started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def _emit(self):
+        self._last_event = time.monotonic()
+        if self.listener:
+            self.listener(self.phase_name, self.done, self.total, self.rate())
+
+
+def tracking_sheet_name(wb):
+    """זיהוי שם גיליון המעקב (תומך בשם ישן וחדש)"""
+    if '📊 מעקב מילואים ותשלומים' in wb.sheetnames:
+        return '📊 מעקב מילואים ותשלומים'
+    elif '2️⃣ תקופות מילואים' in wb.sheetnames:
+        return '2️⃣ תקופות מילואים'
+    else:
+        raise Exception("לא נמצא גיליון מעקב מילואים!")
+
+
+class MiluimOperations:
+    """
+    הפעולות מול קובץ המערכת (או מאגר ה-SQLite אם הופעל).
+    כל פעולה: גיבוי, סשן אחד, שמירה אחת בסוף - ומחזירה dict עם הסיכום.
+    """
+
+    def __init__(self, system_file, store_file=None, progress=None):
+        self.system_file = system_file
+        self.store_file = store_file
+        self.progress = progress or Progress()
+
+    # --- אחסון וגיבוי ---
+
+    def store_enabled(self):
+        return bool(self.store_file) and os.path.exists(self.store_file)
+
+    def data_file(self):
+        """הקובץ שהפעולות עובדות מולו - המאגר אם הופעל, אחרת קובץ המערכת"""
+        return self.store_file if self.store_enabled() else self.system_file
+
+    def open_session(self):
+        if self.store_enabled():
+            return StoreSession(self.store_file)
+        return WorkbookSession(self.system_file, use_cache=True)
+
+    def backup_store(self):
+        if self.store_enabled():
+            return BackupStore(self.store_file, root=os.path.join(
+                os.path.dirname(self.store_file), "backups", "sqlite"))
+        return BackupStore(self.system_file)
+
+    def backup_file(self, label=""):
+        """גיבוי למאגר (גיבוי זהה לא נשמר שוב). מחזיר את רשומת הגיבוי או None"""
+        return self.backup_store().snapshot(label)
+
+    def _save(self, session):
+        """שמירה בסוף הפעולה - אחרי נקודת הביטול האחרונה"""
+        self.progress.phase("Saving")
+        session.save()
+
+    # --- פעולות ---
+
+    def import_mecano(self, file_paths, ask_names=None, mapping_file=None):
+        """
+        ייבוא מקאנו - קובץ אחד או כמה. ask_names(names, suggestions, system_names) מחזירה
+        {שם: החלטה} או None לביטול; mapping_file - מיפוי שמות מוכן (לייבוא ללא שאלות)
+        """
+        progress = self.progress
+        df = pd.concat(parse_files(read_mecano_file, expand_files(file_paths), progress,
+                                   "Reading MECANO"), ignore_index=True)
+
+        # שלב 1+2: קיבוץ ימים רצופים ופיצול לפי חודשים קלנדריים (וקטורי)
+        df_periods_new = mecano_periods(df)
+
+        # ספירת סוגי ימים לכל התקופות בבת אחת
+        day_counts = WORK_CALENDAR.count_many(df_periods_new['התחלה'], df_periods_new['סיום'])
+
+        progress.phase("Loading system file")
+        session = self.open_session()
+        try:
+            # כינויים ידועים - לפני כל שאלה למשתמש
+            aliases = AliasTable.from_session(session)
+            df_periods_new['עובד'] = df_periods_new['עובד'].map(aliases.resolve)
+            periods = df_periods_new.to_dict('records')
+
+            tracking_sheet = tracking_sheet_name(session)
+
+            df_employees = session.frame('1️⃣ רשימת עובדים')
+            system_names = set(df_employees['שם מלא'].dropna().apply(normalize.normalize_name))
+            employee_rates = dict(zip(df_employees['שם מלא'].apply(normalize.normalize_name),
+                                      df_employees['תעריף יומי']))
+
+            # מיפוי כל השמות הלא מוכרים מראש - מסך אחד, לפני הכתיבה
+            unknown_names = collect_unknown_names(df_periods_new['עובד'], system_names)
+            preset = load_mapping_file(mapping_file) if mapping_file else None
+            decisions = resolve_names(
+                unknown_names, system_names, preset,
+                ask=None if ask_names is None else
+                lambda names, suggestions: ask_names(names, suggestions, system_names))
+            if decisions is None:
+                return {'cancelled': True}
+
+            self.backup_file("MECANO")
+            session.start_journal("MECANO")
+
+            # אינדקס התקופות הקיימות - מעבר רציף על הערכים בלבד
+            existing_periods = period_index(session.rows(tracking_sheet, max_col=5))
+
+            skipped = 0
+            new_employees = []
+            name_mappings = {}
+            skipped_names = set()
+            for emp_name, choice in decisions.items():
+                if choice == NEW:
+                    new_employees.append(emp_name)
+                    system_names.add(emp_name)
+                    name_mappings[emp_name] = emp_name
+                elif choice:
+                    name_mappings[emp_name] = choice
+                    aliases.add(emp_name, choice, source='מקאנו')
+                else:
+                    skipped_names.add(emp_name)
+
+            # סריקה אחת של המזהים הקיימים, ומשם הקצאה רציפה
+            period_ids = PeriodIdAllocator.from_values(
+                period_id for (period_id,) in session.rows(tracking_sheet, max_col=1))
+
+            progress.phase("Matching periods", len(periods))
+            new_rows = []
+            for period, counts in zip(periods, day_counts):
+                progress.advance()
+                emp_name = period['עובד']
+
+                if emp_name in skipped_names:
+                    skipped += 1
+                    continue
+
+                final_name = name_mappings.get(emp_name, emp_name)
+
+                key = existing_periods.key(final_name, period['התחלה'], period['סיום'])
+                if key in existing_periods:
+                    skipped += 1
+                    continue
+                # תקופה שנוספה עכשיו (שורה שעוד לא נכתבה) - כפילות שלה מדולגת
+                existing_periods.add(key, None)
+
+                start_str = normalize.format_date(period['התחלה'])
+                end_str = normalize.format_date(period['סיום'])
+
+                weekdays, fridays, saturdays, holidays = (int(c) for c in counts)
+                rate = employee_rates.get(final_name, 0)
+
+                new_rows.append([
+                    None,  # מזהה תקופה - מוקצה בהמשך לכל השורות יחד
+                    final_name,
+                    period['מחלקה'],
+                    start_str,
+                    end_str,
+                    period['התחלה'].strftime('%m/%Y'),
+                    period['ימים'],
+                    weekdays,
+                    fridays,
+                    saturdays,
+                    holidays,
+                    rate,
+                    weekdays * rate if weekdays > 0 else None,
+                ])
+
+            for values, period_id in zip(new_rows, period_ids.reserve(len(new_rows))):
+                values[0] = period_id
+
+            # כתיבה בבת אחת - ירוק לשורות חדשות
+            progress.phase("Writing")
+            session.writer(tracking_sheet).append_rows(new_rows, ROW_NEW)
+
+            if new_employees:
+                session.writer('1️⃣ רשימת עובדים').append_rows(
+                    [(None, None, None, emp_name, None, None, None, None, None, "פעיל")
+                     for emp_name in new_employees], ROW_NEW)
+
+            aliases.write(session)
+            self._save(session)
+        finally:
+            session.close()
+
+        return {
+            'records': len(df),
+            'periods': len(periods),
+            'added': len(new_rows),
+            'skipped': skipped,
+            'new_employees': len(new_employees),
+        }
+
+    def import_btl(self, file_paths, ask_duplicate):
+        """
+        ייבוא תשלומי ב"ל - קובץ אחד, כמה קבצים או תיקייה, בטעינה ושמירה אחת.
+        ask_duplicate(employee, start, existing, new) מחזירה "update" / "skip"
+        לרשומה קיימת (בקובץ המערכת או בקובץ קודם באותו ייבוא) עם סכום אחר
+        """
+        progress = self.progress
+        batches = parse_files(read_btl_file, expand_files(file_paths), progress, "Reading BTL files")
+
+        self.backup_file("BTL")
+
+        progress.phase("Loading system file")
+        session = self.open_session()
+        try:
+            session.start_journal("BTL")
+            aliases = AliasTable.from_session(session)
+
+            # רשומות קיימות + רשומות שנוספו מקבצים קודמים באותו ייבוא
+            existing = btl_index(session.rows('3️⃣ תשלומי ב"ל', max_col=10), aliases)
+
+            writer = session.writer('3️⃣ תשלומי ב"ל')
+
+            files = []
+            new_rows = []
+            # מנות ששורה קיימת עברה מהן למנה אחרת - גם הן מחושבות מחדש ברשימת התשלומים
+            previous_manas = set()
+
+            progress.phase("Importing rows", sum(len(batch.records) for batch in batches))
+            for file_path, mana_number, payment_date, records in batches:
+                stats = {'file': file_path, 'mana': mana_number,
+                         'payment_date': normalize.format_date(payment_date),
+                         'added': 0, 'updated': 0, 'skipped': 0, 'tagmul': 0, 'pitzuy': 0}
+                files.append(stats)
+                # שורות הקובץ נבדקות מול הקבצים הקודמים (כפילות בתוך קובץ - כמו קודם)
+                added_here = {}
+                for (tz, name, start_date, end_date, claim_type,
+                     tagmul, pitzuy) in records.itertuples(index=False):
+                    progress.advance()
+                    try:
+                        employee_name = aliases.resolve(name, tz)
+                        aliases.learn_id(tz, employee_name, source='ב"ל')
+
+                        # סכומים עם סימן (פוענחו בקריאת הקובץ) - תיקון שלילי מקוזז בסכומים
+                        if math.isnan(tagmul) or math.isnan(pitzuy):
+                            raise ValueError(f"invalid amount for {employee_name}")
+
+                        key = existing.find(employee_name, start_date, end_date, claim_type, tagmul)
+
+                        if key is not None:
+                            record = existing[key]
+                            existing_tagmul = record.tagmul or 0
+
+                            if abs(existing_tagmul - tagmul) < 1:
+                                stats['skipped'] += 1
+                                continue
+                            choice = ask_duplicate(employee_name, start_date, existing_tagmul, tagmul)
+                            if choice == "skip":
+                                stats['skipped'] += 1
+                                continue
+
+                            if record.stats:
+                                # הסכום הקודם נספר בקובץ קודם באותו ייבוא - מוחלף בחדש
+                                record.stats['tagmul'] -= record.tagmul
+                                record.stats['pitzuy'] -= record.pitzuy
+                            if record.new is not None:
+                                # שורה שעוד לא נכתבה - עדכון במקום
+                                values = new_rows[record.new]
+                                values[5], values[6], values[8] = tagmul, pitzuy, tagmul
+                                values[9], values[10] = mana_number, normalize.format_date(payment_date)
+                                values[11] = os.path.basename(file_path)
+                            else:
+                                # עדכון וצביעה בכתום
+                                writer.update(record.row, {
+                                    6: tagmul,
+                                    7: pitzuy,
+                                    9: tagmul,
+                                    10: mana_number,
+                                    11: normalize.format_date(payment_date),
+                                }, ROW_UPDATED)
+                                previous_manas.add(record.mana)
+                            existing[key] = record._replace(tagmul=tagmul, pitzuy=pitzuy,
+                                                            mana=mana_number, stats=stats)
+                            stats['updated'] += 1
+                            stats['tagmul'] += tagmul
+                            stats['pitzuy'] += pitzuy
+                            continue
+
+                        key = existing.key(employee_name, start_date, end_date, claim_type, tagmul)
+                        added_here[key] = BtlRecord(None, tagmul, pitzuy, mana_number, stats,
+                                                    new=len(new_rows))
+                        new_rows.append([
+                            tz, employee_name, start_date, end_date, claim_type,
+                            tagmul, pitzuy, 0, tagmul,
+                            mana_number, normalize.format_date(payment_date), os.path.basename(file_path),
+                        ])
+
+                        stats['tagmul'] += tagmul
+                        stats['pitzuy'] += pitzuy
+                        stats['added'] += 1
+
+                    except OperationCancelled:
+                        raise
+                    except Exception as e:
+                        logger.warning("Row error: %s", e)
+                        continue
+                existing.update(added_here)
+
+            # שורות חדשות בירוק - בבת אחת
+            progress.phase("Writing")
+            writer.append_rows(new_rows, ROW_NEW)
+
+            # רשימת תשלומים - חישוב מחדש של המנות מכל שורות ב"ל (כולל המנות שמהן עברו שורות)
+            progress.phase("Updating payment list")
+            payments = rebuild_payment_list(session, [stats['mana'] for stats in files],
+                                            moved_from=previous_manas)
+
+            aliases.write(session)
+            self._save(session)
+        finally:
+            session.close()
+
+        for stats in files:
+            stats['total'] = stats['tagmul'] + stats['pitzuy']
+        return {
+            'files': files,
+            'added': sum(stats['added'] for stats in files),
+            'updated': sum(stats['updated'] for stats in files),
+            'skipped': sum(stats['skipped'] for stats in files),
+            'tagmul': sum(stats['tagmul'] for stats in files),
+            'pitzuy': sum(stats['pitzuy'] for stats in files),
+            'total': sum(stats['total'] for stats in files),
+            'batches': payments['batches'],
+        }
+
+    def import_40_percent(self, file_paths):
+        """ייבוא קבצי תוספת 40% - קובץ אחד, כמה קבצים או תיקייה (רשומה קיימת - מדולגת)"""
+        progress = self.progress
+        batches = parse_files(read_bonus_file, expand_files(file_paths), progress,
+                              "Reading 40% files")
+
+        self.backup_file("40%")
+
+        progress.phase("Loading system file")
+        session = self.open_session()
+        try:
+            session.start_journal("40%")
+            aliases = AliasTable.from_session(session)
+
+            # רשומות קיימות + רשומות שנוספו מקבצים קודמים באותו ייבוא
+            existing = btl_index(session.rows('3️⃣ תשלומי ב"ל', max_col=10), aliases)
+
+            files = []
+            new_rows = []
+
+            progress.phase("Importing rows", sum(len(batch.records) for batch in batches))
+            for file_path, mana_number, payment_date, records in batches:
+                stats = {'file': file_path, 'mana': mana_number, 'added': 0, 'skipped': 0, 'total_40': 0}
+                files.append(stats)
+                # שורות הקובץ נבדקות מול הקבצים הקודמים (כפילות בתוך קובץ - כמו קודם)
+                added_here = {}
+                for tz, name, start_date, end_date, bonus_40 in records.itertuples(index=False):
+                    progress.advance()
+                    try:
+                        employee_name = aliases.resolve(name, tz)
+                        aliases.learn_id(tz, employee_name, source='ב"ל')
+
+                        claim_type = "תוספת 40%"
+
+                        if math.isnan(bonus_40):
+                            raise ValueError(f"invalid amount for {employee_name}")
+                        if bonus_40 == 0:
+                            continue
+
+                        if existing.find(employee_name, start_date, end_date, claim_type,
+                                         bonus_40) is not None:
+                            stats['skipped'] += 1
+                            continue
+
+                        key = existing.key(employee_name, start_date, end_date, claim_type, bonus_40)
+                        added_here[key] = BtlRecord(None, 0, 0, mana_number, new=len(new_rows))
+                        new_rows.append((
+                            tz, employee_name, start_date, end_date, claim_type,
+                            0, 0, bonus_40, bonus_40,
+                            mana_number, normalize.format_date(payment_date), os.path.basename(file_path),
+                        ))
+
+                        stats['total_40'] += bonus_40
+                        stats['added'] += 1
+
+                    except Exception as e:
+                        logger.warning("Row error: %s", e)
+                        continue
+                existing.update(added_here)
+
+            # שורות חדשות בירוק - בבת אחת
+            progress.phase("Writing")
+            session.writer('3️⃣ תשלומי ב"ל').append_rows(new_rows, ROW_NEW)
+
+            # רשימת תשלומים - חישוב מחדש של המנות מכל שורות ב"ל
+            progress.phase("Updating payment list")
+            payments = rebuild_payment_list(session, [stats['mana'] for stats in files])
+
+            aliases.write(session)
+            self._save(session)
+        finally:
+            session.close()
+
+        return {
+            'files': files,
+            'added': sum(stats['added'] for stats in files),
+            'skipped': sum(stats['skipped'] for stats in files),
+            'total_40': sum(stats['total_40'] for stats in files),
+            'batches': payments['batches'],
+        }
+
+    def calculate_all(self):
+        """חישוב מלא - לפי תקופות בודדות"""
+        progress = self.progress
+        self.backup_file("Calculate")
+
+        progress.phase("Loading system file")
+        session = self.open_session()
+        try:
+            session.start_journal("Calculate")
+            tracking_sheet = tracking_sheet_name(session)
+
+            # קריאת תעריפים
+            df_employees = session.frame('1️⃣ רשימת עובדים')
+            employee_data = {}
+            for _, emp in df_employees.iterrows():
+                name = normalize.normalize_name(emp['שם מלא'])
+                employee_data[name] = {
+                    'rate': emp.get('תעריף יומי', 0),
+                    'monthly': emp.get('משכורת חודשית', 0)
+                }
+
+            # קריאת תקופות - כל תקופה בנפרד
+            df_periods = session.frame(tracking_sheet)
+            df_btl = session.frame('3️⃣ תשלומי ב"ל')
+
+            # התאמת ב"ל לתקופות - חישוב אחד לכל הטבלה (לפי שם + תאריכים)
+            progress.phase("Matching BTL")
+            btl_totals = match_btl_to_periods(df_periods, df_btl)
+
+            summary_data = []
+
+            # לולאה על כל תקופה (לא קיבוץ!)
+            progress.phase("Calculating periods", len(df_periods))
+            for idx, period in df_periods.iterrows():
+                progress.advance()
+                emp = normalize.normalize_name(period['שם עובד'])
+                period_id = period['מזהה תקופה']
+                department = period.get('מחלקה', '')  # משיכת מחלקה
+                start_date = period['תאריך התחלה']
+                end_date = period['תאריך סיום']
+                month = period.get('חודש', '')
+                total_days = period['סה"כ ימים']
+                weekdays = period['ימי א-ה']
+
+                emp_info = employee_data.get(emp, {})
+                rate = emp_info.get('rate', 0)
+                monthly = emp_info.get('monthly', 0)
+
+                # חישוב תשלום מעסיק
+                if weekdays > 20:
+                    employer_payment = monthly
+                else:
+                    employer_payment = weekdays * rate
+
+                # משיכת תשלומי ב"ל - התאמה לפי תאריכים
+                btl_tagmul = btl_totals.at[idx, 'תגמול ₪']
+                btl_pitzuy = btl_totals.at[idx, 'פיצוי 20% ₪']
+                btl_40 = btl_totals.at[idx, 'תוספת 40% ₪']
+
+                # הפרש = תגמול ב"ל - תשלום מעסיק
+                # חיובי = לטובת העובד (ב"ל שילם יותר)
+                # שלילי = המעסיק שילם יותר
+                difference = btl_tagmul - employer_payment
+
+                summary_data.append({
+                    'מזהה': period_id,
+                    'עובד': emp,
+                    'מחלקה': department,  # הוספת מחלקה
+                    'חודש': month,
+                    'התחלה': start_date,
+                    'סיום': end_date,
+                    'ימים': total_days,
+                    'ימי א-ה': weekdays,
+                    'תעריף': rate,
+                    'תשלום מעסיק': employer_payment,
+                    'תגמול ב"ל': btl_tagmul,
+                    'פיצוי 20%': btl_pitzuy,
+                    'תוספת 40%': btl_40,
+                    'הפרש': difference
+                })
+
+            # ניקוי דוח מסכם
+            progress.phase("Writing")
+            session.truncate('4️⃣ דוח מסכם')
+
+            summary_rows = []
+            for item in summary_data:
+                # סטטוס לפי הפרש:
+                # הפרש = 0 → מאוזן
+                # הפרש > 0 → ב"ל שילם יותר → ממתין (צריך לשלם לעובד)
+                # הפרש < 0 → מעסיק שילם יותר → לא רלוונטי
+                if abs(item['הפרש']) < 1:
+                    status = "מאוזן"
+                elif item['הפרש'] > 0:
+                    status = "ממתין"
+                else:
+                    status = "לא רלוונטי"
+
+                summary_rows.append((
+                    item['עובד'],
+                    item['מזהה'],
+                    item['מחלקה'],
+                    item['חודש'],
+                    item['התחלה'],
+                    item['סיום'],
+                    item['ימים'],
+                    item['ימי א-ה'],
+                    item['תעריף'],
+                    item['תשלום מעסיק'],
+                    item['תגמול ב"ל'],
+                    item['פיצוי 20%'],
+                    item['תוספת 40%'],
+                    item['הפרש'],
+                    status,  # עמודה 15
+                ))
+
+            session.writer('4️⃣ דוח מסכם').append_rows(summary_rows, ROW_NEW)
+
+            self._save(session)
+        finally:
+            session.close()
+
+        return {
+            'periods': len(summary_data),
+            'employer': sum(x['תשלום מעסיק'] for x in summary_data),
+            'btl': sum(x['תגמול ב"ל'] for x in summary_data),
+            'difference': sum(x['הפרש'] for x in summary_data),
+        }
+
+    def sync_btl_to_periods(self):
+        """סנכרון נתוני ב"ל לטאב תקופות מילואים"""
+        progress = self.progress
+        if not os.path.exists(self.data_file()):
+            raise Exception("System file not found!")
+
+        self.backup_file("Sync")
+
+        # טעינה אחת - כתיבה, DataFrames וערכים מחושבים (לא נוסחאות)
+        progress.phase("Loading system file")
+        session = self.open_session()
+        try:
+            session.start_journal("Sync")
+
+            # זיהוי שם גיליון המעקב
+            tracking_sheet = tracking_sheet_name(session)
+
+            # קריאת נתונים
+            df_periods = session.frame(tracking_sheet)
+            df_btl = session.frame('3️⃣ תשלומי ב"ל')
+
+            updated_count = 0
+            not_found_count = 0
+            periods_without_btl = []
+            btl_without_periods = []
+
+            logger.info("\n%s\n🔄 סנכרון נתוני ב\"ל לתקופות מילואים\n%s", "=" * 60, "=" * 60)
+
+            # התאמה דו-כיוונית במעבר אחד: תקופות מותאמות, תקופות ללא ב"ל ושורות ב"ל יתומות
+            progress.phase("Matching BTL")
+            period_totals, orphan_btl_index = reconcile_btl_with_periods(df_periods, df_btl)
+
+            # שלב 1: עדכון התקופות לפי תוצאות ההתאמה
+            logger.info("\n📊 שלב 1: עדכון תקופות מילואים...")
+            progress.phase("Updating periods", len(df_periods))
+            periods_writer = session.writer(tracking_sheet)
+            for idx, period in df_periods.iterrows():
+                progress.advance()
+                period_id = period['מזהה תקופה']
+                emp = normalize.normalize_name(period['שם עובד'])
+                start_date = period['תאריך התחלה']
+                end_date = period['תאריך סיום']
+
+                if period_totals.at[idx, '_matches'] > 0:
+                    # עדכון השורה בטאב תקופות (idx+2 כי שורה 1 = כותרת)
+                    row = idx + 2
+
+                    # סיכום כל התשלומים לתקופה זו
+                    pitzuy = period_totals.at[idx, 'פיצוי 20% ₪']
+                    tagmul = period_totals.at[idx, 'תגמול ₪']
+                    bonus_40 = period_totals.at[idx, 'תוספת 40% ₪']
+
+                    # מועד תשלום - האחרון
+                    last_payment = period_totals.at[idx, '_last_payment']
+
+                    # חישוב הפרשים - קריאה מהגיליון עם ערכים מחושבים
+                    employer_payment_raw = session.cached_value(tracking_sheet, row, 13)
+
+                    # המרה למספר (טיפול בטקסט/None)
+                    if employer_payment_raw is None or str(employer_payment_raw).strip() == '':
+                        employer_payment = 0
+                    else:
+                        try:
+                            # ניסיון להמיר למספר
+                            employer_payment = float(str(employer_payment_raw).replace(',', ''))
+                        except:
+                            employer_payment = 0
+
+                    diff = tagmul - employer_payment
+
+                    # עדכון עמודות וצביעה בכתום
+                    periods_writer.update(row, {
+                        14: pitzuy,        # פיצוי 20%
+                        15: bonus_40,      # תוספת 40%
+                        16: tagmul,        # סה"כ תגמול
+                        17: last_payment,  # מועד תשלום
+                        18: diff,          # הפרש
+                    }, ROW_UPDATED, 14, 18)
+
+                    updated_count += 1
+                    if updated_count <= 5:  # הצג רק 5 ראשונים
+                        logger.info(f"   ✅ {period_id} | {emp[:20]:20} | תגמול: {tagmul:,.0f} ₪")
+                else:
+                    not_found_count += 1
+                    periods_without_btl.append({
+                        'מזהה': period_id,
+                        'עובד': emp,
+                        'התחלה': start_date,
+                        'סיום': end_date
+                    })
+                    if not_found_count <= 3:  # הצג רק 3 ראשונים
+                        logger.info(f"   ⚠️  {period_id} | {emp[:20]:20} | אין תשלום ב\"ל")
+
+            # שלב 2: תשלומי ב"ל ללא תקופה תואמת (מאותו מעבר התאמה)
+            logger.info("\n🔍 שלב 2: בדיקת תשלומי ב\"ל ללא תקופה...")
+            progress.phase("Checking BTL rows", len(orphan_btl_index))
+            btl_writer = session.writer('3️⃣ תשלומי ב"ל')
+            for idx in orphan_btl_index:
+                progress.advance()
+                btl = df_btl.loc[idx]
+                emp = normalize.normalize_name(btl['שם עובד'])
+                start_date = btl['תאריך התחלה']
+                end_date = btl['תאריך סיום']
+                tagmul = btl.get('תגמול ₪', 0)
+
+                # שורה יתומה - צביעה באדום!
+                btl_row = idx + 2  # שורה בטאב ב"ל
+
+                # צביעה אדומה בהירה
+                btl_writer.mark(btl_row, ROW_ORPHAN)
+
+                btl_without_periods.append({
+                    'עובד': emp,
+                    'התחלה': start_date,
+                    'סיום': end_date,
+                    'תגמול': tagmul,
+                    'שורה': btl_row
+                })
+
+                if len(btl_without_periods) <= 3:
+                    logger.info(f"   🔴 שורה {btl_row} | {emp[:20]:20} | {start_date} - {end_date}")
+
+            if len(btl_without_periods) > 3:
+                logger.info(f"   ... ועוד {len(btl_without_periods) - 3} שורות יתומות")
+
+            self._save(session)
+        finally:
+            session.close()
+
+        logger.info("\n%s\n✅ סנכרון הושלם!\n%s", "=" * 60, "=" * 60)
+        logger.info(f"\n📊 סיכום:\n"
+                    f"   ✅ תקופות שעודכנו: {updated_count}\n"
+                    f"   ⚠️  תקופות ללא ב\"ל: {not_found_count}\n"
+                    f"   🔍 תשלומי ב\"ל ללא תקופה: {len(btl_without_periods)}")
+
+        return {
+            'updated': updated_count,
+            'periods_without_btl': not_found_count,
+            'btl_without_periods': btl_without_periods,
+        }
+
+    def unpaid_report(self, output_dir=None):
+        """הפקת דוח הפרשים שטרם שולמו. מחזיר את מספר השורות ואת הקובץ (None אם אין)"""
+        progress = self.progress
+        if not os.path.exists(self.data_file()):
+            raise Exception("System file not found!")
+
+        # יצירת קובץ חדש - סריקה אחת וכתיבת השורות שטרם שולמו בלבד
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_dir = output_dir or os.path.dirname(self.system_file)
+        output_file = os.path.join(output_dir, f"דוח_הפרשים_לתשלום_{timestamp}.xlsx")
+
+        if self.store_enabled():
+            # הדוח נבנה מייצוא זמני של המאגר
+            progress.phase("Exporting storage")
+            source_file = os.path.join(output_dir, f"ייצוא_זמני_{timestamp}.xlsx")
+            session = StoreSession(self.store_file)
+            try:
+                session.export(source_file)
+            finally:
+                session.close()
+        else:
+            source_file = self.system_file
+        # קובץ המערכת - דרך המטמון (בלי פענוח כשלא השתנה); ייצוא זמני - סריקה בלבד
+        session = WorkbookSession(source_file, read_only=True,
+                                  use_cache=source_file == self.system_file)
+        try:
+            progress.phase("Scanning periods")
+            unpaid_count = build_unpaid_report(session, output_file, tracking_sheet_name)
+        finally:
+            session.close()
+            if source_file != self.system_file:
+                os.remove(source_file)
+
+        return {'items': unpaid_count, 'file': output_file if unpaid_count else None}
+
+    def clear_all(self):
+        """מחיקת כל הנתונים (חוץ מרשימת העובדים) - אחרי גיבוי"""
+        progress = self.progress
+        backup = self.backup_file("Clear & Restart")
+
+        progress.phase("Loading system file")
+        session = self.open_session()
+        try:
+            session.start_journal("Clear & Restart")
+
+            # בדיקה איזה גיליון קיים
+            periods_sheet = tracking_sheet_name(session)
+
+            progress.phase("Clearing")
+            # מחיקת תקופות מילואים
+            session.truncate(periods_sheet)
+
+            # מחיקת תשלומי ב"ל
+            if '3️⃣ תשלומי ב"ל' in session:
+                session.truncate('3️⃣ תשלומי ב"ל')
+
+            # מחיקת רשימת תשלומים
+            if '💵 רשימת תשלומים' in session:
+                session.truncate('💵 רשימת תשלומים')
+
+            # מחיקת דוח מסכם (אם קיים)
+            if '4️⃣ דוח מסכם' in session:
+                session.truncate('4️⃣ דוח מסכם')
+
+            self._save(session)
+        finally:
+            session.close()
+
+        return {'backup': describe_backup(backup)}
+
+    def last_operation(self):
+        """(שם, זמן) של הפעולה האחרונה שאפשר לבטל, או None"""
+        if self.store_enabled():
+            return None
+        return last_operation(self.system_file)
+
+    def undo_last(self):
+        """ביטול הפעולה האחרונה לפי היומן - רק התאים והשורות שהיא שינתה"""
+        if self.store_enabled():
+            raise Exception("Undo works on the Excel system file.\n"
+                            "With SQLite storage use Restore Backup.")
+        self.backup_file("Undo")
+        self.progress.phase("Undoing")
+        return {'undone': undo_last(self.system_file)}
+
+    def export_excel(self, output_file):
+        """ייצוא המאגר לקובץ Excel מעוצב (פריסת התבנית)"""
+        self.progress.phase("Exporting")
+        session = StoreSession(self.store_file)
+        try:
+            counts = session.export(output_file)
+        finally:
+            session.close()
+        return {'file': output_file, 'sheets': counts}
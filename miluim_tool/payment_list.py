@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+רשימת התשלומים (💵) כתצוגה נגזרת מגיליון תשלומי ב"ל
+כל מנה מחושבת מחדש מכל שורות ב"ל שלה ב-groupby אחד (תגמול, פיצוי, 40%, סה"כ,
+תאריך תשלום, מספר שורות) - במקום סכומים מצטברים שנדרסים בייבוא חוזר.
+מחושבות רק המנות שהייבוא נגע בהן (גם מנה ששורה קיימת עברה ממנה): ברשימה יש מנות ישנות
+שסכומיהן לא כולם בגיליון ב"ל, ושורה בלי מנה (הזנה ידנית) נשארת כמו שהיא.
+שורות הרשימה נמצאות לפי אינדקס מנה → שורה, ושורה שלא השתנתה לא נכתבת.
+"""
+
+import pandas as pd
+
+import normalize
+from row_writer import ROW_NEW, ROW_UPDATED
+
+BTL_SHEET = '3️⃣ תשלומי ב"ל'
+PAYMENTS_SHEET = '💵 רשימת תשלומים'
+
+# עמודות בגיליון ב"ל (1 = ת.ז.)
+_BTL_COLUMNS = {6: 'tagmul', 7: 'pitzuy', 8: 'bonus_40', 10: 'mana', 11: 'payment_date'}
+AMOUNT_FIELDS = ['tagmul', 'pitzuy', 'bonus_40', 'total']
+
+
+def mana_key(value):
+    """מספר מנה להשוואה: 1112 / 1112.0 / '1112' - אותה מנה. ריק - None"""
+    if value is None or pd.isna(value) or str(value).strip() == '':
+        return None
+    try:
+        number = float(value)
+        if number.is_integer():
+            return int(number)
+    except (TypeError, ValueError):
+        pass
+    return str(value).strip()
+
+
+def aggregate_payments(btl_rows):
+    """
+    שורות גיליון ב"ל (session.rows, 11 עמודות) לטבלה לפי מנה:
+    mana, payment_date, tagmul, pitzuy, bonus_40, total, rows - לפי סדר ההופעה
+    """
+    columns = sorted(_BTL_COLUMNS)
+    df = pd.DataFrame([[row[col - 1] for col in columns] for row in btl_rows],
+                      columns=[_BTL_COLUMNS[col] for col in columns])
+    df['key'] = df['mana'].map(mana_key)
+    df = df[df['key'].notna()]
+    for field in ('tagmul', 'pitzuy', 'bonus_40'):
+        df[field] = pd.to_numeric(df[field], errors='coerce').fillna(0)
+    batches = df.groupby('key', sort=False).agg(
+        mana=('mana', 'first'),
+        payment_date=('payment_date', 'first'),
+        tagmul=('tagmul', 'sum'),
+        pitzuy=('pitzuy', 'sum'),
+        bonus_40=('bonus_40', 'sum'),
+        rows=('mana', 'size'),
+    )
+    batches['total'] = batches['tagmul'] + batches['pitzuy'] + batches['bonus_40']
+    return batches
+
+
+def _btl_rows(session):
+    """שורות ב"ל מהסשן; נוסחה בעמודת סכום - הערך המחושב השמור בקובץ"""
+    for r, values in enumerate(session.rows(BTL_SHEET, max_col=11), 2):
+        if any(isinstance(values[col - 1], str) and values[col - 1].startswith('=')
+               for col in (6, 7, 8)):
+            values = list(values)
+            for col in (6, 7, 8):
+                if isinstance(values[col - 1], str) and values[col - 1].startswith('='):
+                    values[col - 1] = session.cached_value(BTL_SHEET, r, col)
+        yield values
+
+
+def _same(old, new):
+    if isinstance(old, (int, float)) and not isinstance(old, bool):
+        return abs(old - new) < 0.005
+    return False
+
+
+def rebuild_payment_list(session, manas=None, moved_from=()):
+    """
+    חישוב מחדש של שורות המנות manas (None - כל המנות) מגיליון ב"ל,
+    באותו סשן - כולל שורות שנכתבו בו. moved_from - מנות ששורות ב"ל עברו מהן למנה
+    אחרת: מחושבות מחדש גם הן, ומנה שלא נשארו לה שורות מתאפסת.
+    מחזיר {'updated', 'added', 'batches'}
+    """
+    batches = aggregate_payments(_btl_rows(session))
+    emptied = {mana_key(mana) for mana in moved_from} - set(batches.index) - {None}
+    if manas is not None:
+        wanted = {mana_key(mana) for mana in manas} | {mana_key(mana) for mana in moved_from}
+        batches = batches[batches.index.isin(wanted)]
+
+    # אינדקס מנה → (שורה, ערכים נוכחיים) - סריקה אחת של הרשימה
+    index = {}
+    for r, values in enumerate(session.rows(PAYMENTS_SHEET, max_col=6), 2):
+        key = mana_key(values[0])
+        if key is not None and key not in index:
+            index[key] = (r, values)
+
+    writer = session.writer(PAYMENTS_SHEET)
+    updated = 0
+    new_rows = []
+    for key, batch in batches.iterrows():
+        amounts = [float(batch[field]) for field in AMOUNT_FIELDS]
+        if key in index:
+            r, (_, payment_date, *old_amounts) = index[key]
+            if (normalize.normalize_date(payment_date) == normalize.normalize_date(batch['payment_date'])
+                    and all(_same(old, new) for old, new in zip(old_amounts, amounts))):
+                continue
+            writer.update(r, {2: batch['payment_date'], 3: amounts[0], 4: amounts[1],
+                              5: amounts[2], 6: amounts[3]}, ROW_UPDATED)
+            updated += 1
+        else:
+            new_rows.append([batch['mana'], batch['payment_date'], *amounts])
+    for key in emptied:
+        if key in index:
+            r, (_, _, *old_amounts) = index[key]
+            if not all(_same(old, 0.0) for old in old_amounts):
+                writer.update(r, {3: 0.0, 4: 0.0, 5: 0.0, 6: 0.0}, ROW_UPDATED)
+                updated += 1
+    writer.append_rows(new_rows, ROW_NEW)
+
+    summary = [
+        dict(mana=batch['mana'], payment_date=batch['payment_date'], rows=int(batch['rows']),
+             **{field: float(batch[field]) for field in AMOUNT_FIELDS})
+        for _, batch in batches.iterrows()
+    ]
+    return {'updated': updated, 'added': len(new_rows), 'batches': summary}
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+הקצאת מזהי תקופה (P0001, P0002, ...)
+סריקה אחת של עמודת המזהים לכל סשן, ומשם הקצאה רציפה בזיכרון
+"""
+
+PERIOD_PREFIX = 'P'
+MIN_DIGITS = 4
+
+
+def parse_period_id(value):
+    """מספר המזהה מתוך 'P0123', או None אם זה לא מזהה תקופה"""
+    if not value or not str(value).startswith(PERIOD_PREFIX):
+        return None
+    try:
+        return int(str(value).replace(PERIOD_PREFIX, ''))
+    except ValueError:
+        return None
+
+
+def format_period_id(number, min_digits=MIN_DIGITS):
+    """P0001 ... P9999, ומעבר לזה P10000 וכו' (הרוחב גדל לפי הצורך)"""
+    return f"{PERIOD_PREFIX}{number:0{min_digits}d}"
+
+
+class PeriodIdAllocator:
+    """מקצה מזהים - זוכר את המספר האחרון שהוקצה במקום לסרוק את הגיליון בכל פעם"""
+
+    def __init__(self, last_number=0, min_digits=MIN_DIGITS):
+        self.last_number = last_number
+        self.min_digits = min_digits
+
+    @classmethod
+    def from_values(cls, values, min_digits=MIN_DIGITS):
+        """סריקה אחת של ערכי עמודת המזהים ומציאת המקסימום"""
+        last_number = 0
+        for value in values:
+            number = parse_period_id(value)
+            if number is not None and number > last_number:
+                last_number = number
+        return cls(last_number, min_digits)
+
+    @classmethod
+    def from_sheet(cls, ws, column=1, min_digits=MIN_DIGITS):
+        return cls.from_values(
+            (value for (value,) in ws.iter_rows(min_row=2, min_col=column, max_col=column,
+                                                values_only=True)), min_digits)
+
+    def peek(self):
+        """המזהה הבא, בלי להקצות אותו"""
+        return format_period_id(self.last_number + 1, self.min_digits)
+
+    def next_id(self):
+        self.last_number += 1
+        return format_period_id(self.last_number, self.min_digits)
+
+    def reserve(self, count):
+        """שריון בלוק של מזהים רצופים לייבוא אצווה"""
+        first = self.last_number + 1
+        self.last_number += count
+        return [format_period_id(n, self.min_digits) for n in range(first, first + count)]
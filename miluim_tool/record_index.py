@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+אינדקס רשומות קיימות (תקופות מילואים, תשלומי ב"ל) לפי מפתח מורכב מוקלד:
+(קוד עובד, יום התחלה, יום סיום, קוד סוג תביעה) - מספרים קטנים במקום מחרוזת
+"שם|תאריך|תאריך|סוג" לכל רשומה. שם וסוג תביעה מקודדים פעם אחת למספר (אותו
+שם - אותו קוד), תאריך הוא מספר היום (date.toordinal). האינדקס נבנה פעם אחת
+בסשן ומתעדכן בכל שורה שנוספת; בדיקת קיום ושליפת שורה - O(1).
+"""
+
+from collections import namedtuple
+from datetime import date, datetime
+from functools import lru_cache
+
+import pandas as pd
+
+import normalize
+
+
+# רשומת ב"ל באינדקס: שורה בגיליון (row) או שורה שנוספה בייבוא הנוכחי ועוד לא נכתבה
+# (new - מיקומה ברשימת השורות החדשות; stats - סיכום הקובץ שהוסיף/עדכן אותה)
+BtlRecord = namedtuple('BtlRecord', 'row tagmul pitzuy mana stats new', defaults=(None, None))
+
+
+@lru_cache(maxsize=4096)
+def _text_ordinal(text):
+    """'dd/mm/YYYY' למספר היום; תאריך שלא מתפרש - הטקסט עצמו (השוואה כמו קודם)"""
+    if len(text) == 10 and text[2] == '/' and text[5] == '/':
+        try:
+            return date(int(text[6:]), int(text[3:5]), int(text[:2])).toordinal()
+        except ValueError:
+            pass
+    return text
+
+
+def date_ordinal(value):
+    """תאריך (datetime / Timestamp / טקסט בכל פורמט שהמערכת מכירה) למספר היום. ריק - 0"""
+    if isinstance(value, (datetime, date)) and not pd.isna(value):
+        return value.toordinal()
+    text = normalize.normalize_date(value)
+    return _text_ordinal(text) if text else 0
+
+
+class RecordIndex:
+    """
+    מפתח מורכב → ערך (מספר שורה או רשומה) - כמו dict, עם בניית המפתח.
+    key - מפתח לרשומה שמוסיפים (שם / סוג תביעה חדשים מקבלים קוד),
+    find - חיפוש רשומה קיימת בלי להקצות קודים, כך שחיפוש שלא מצא לא מגדיל את האינדקס
+    """
+
+    def __init__(self):
+        self._names = {}
+        self._kinds = {}
+        self._items = {}
+
+    @staticmethod
+    def _code(codes, text):
+        code = codes.get(text)
+        if code is None:
+            code = codes[text] = len(codes)
+        return code
+
+    @staticmethod
+    def _compose(name_code, start, end, kind_code, amount):
+        key = (name_code, date_ordinal(start), date_ordinal(end))
+        if kind_code is not None:
+            key += (kind_code,)
+        if amount < 0:
+            key += (round(amount * 100),)
+        return key
+
+    def key(self, employee, start, end, claim_type=None, amount=0):
+        """
+        employee - שם מנורמל (אחרי כינויים). תיקון (סכום שלילי) הוא רשומה נפרדת
+        מהתשלום שהוא מתקן - המפתח שלו כולל את הסכום באגורות
+        """
+        kind_code = None if claim_type is None else self._code(self._kinds, claim_type)
+        return self._compose(self._code(self._names, employee), start, end, kind_code, amount)
+
+    def find(self, employee, start, end, claim_type=None, amount=0):
+        """המפתח של רשומה קיימת (אותם פרמטרים כמו key), או None"""
+        name_code = self._names.get(employee)
+        kind_code = None if claim_type is None else self._kinds.get(claim_type)
+        if name_code is None or (claim_type is not None and kind_code is None):
+            return None
+        key = self._compose(name_code, start, end, kind_code, amount)
+        return key if key in self._items else None
+
+    def add(self, key, value):
+        self._items[key] = value
+
+    def update(self, other):
+        self._items.update(other)
+
+    def get(self, key, default=None):
+        return self._items.get(key, default)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __getitem__(self, key):
+        return self._items[key]
+
+    def __setitem__(self, key, value):
+        self._items[key] = value
+
+    def __len__(self):
+        return len(self._items)
+
+
+def period_index(rows):
+    """rows - ערכי גיליון התקופות מהשורה השנייה (session.rows, 5 עמודות). ערך - מספר השורה"""
+    index = RecordIndex()
+    for row, (_, emp, _, start, end) in enumerate(rows, 2):
+        index.add(index.key(normalize.normalize_name(emp), start, end), row)
+    return index
+
+
+def btl_index(rows, aliases=None):
+    """
+    rows - ערכי גיליון ב"ל מהשורה השנייה (session.rows, 10 עמודות).
+    ערך - BtlRecord של השורה
+    """
+    index = RecordIndex()
+    for row, (tz, emp, start_date, end_date, claim_type,
+              tagmul, pitzuy, bonus_40, _, mana) in enumerate(rows, 2):
+        if aliases is not None:
+            emp = aliases.resolve(emp, tz)
+        else:
+            emp = normalize.normalize_name(emp)
+        if emp:
+            tagmul = tagmul or 0
+            # הסכום של השורה: תגמול, או תוספת 40% בשורת תוספת
+            amount = tagmul if isinstance(tagmul, (int, float)) and tagmul else bonus_40
+            key = index.key(emp, start_date, end_date, str(claim_type or "").strip(),
+                            amount if isinstance(amount, (int, float)) else 0)
+            index.add(key, BtlRecord(row, tagmul, pitzuy, mana))
+    return index
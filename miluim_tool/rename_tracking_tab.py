@@ -5,10 +5,10 @@
 """
 
 from openpyxl import load_workbook
-from datetime import datetime
-import shutil
 import os
 
+from backup_store import BackupStore, describe
+
 SYSTEM_FILE = r"C:\Projects\LitayPandaMiluim\מערכת_מילואים_מלאה.xlsx"
 
 def rename_tab():
@@ -24,12 +24,8 @@ def rename_tab():
         return
     
     # גיבוי
-    backup_dir = os.path.join(os.path.dirname(SYSTEM_FILE), "backups")
-    os.makedirs(backup_dir, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_path = os.path.join(backup_dir, f"backup_before_rename_{timestamp}.xlsx")
-    shutil.copy2(SYSTEM_FILE, backup_path)
-    print(f"\n💾 גיבוי: {os.path.basename(backup_path)}")
+    backup = BackupStore(SYSTEM_FILE).snapshot("שינוי שם טאב")
+    print(f"\n💾 גיבוי: {describe(backup)}")
     
     # טעינה
     wb = load_workbook(SYSTEM_FILE)
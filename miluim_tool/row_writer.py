@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+כתיבת שורות בבת אחת עם צביעה לפי מצב השורה (חדש / עודכן / דולג / יתום)
+סגנון אחד משותף לכל מצב במקום PatternFill חדש לכל תא
+"""
+
+from openpyxl.styles import PatternFill
+
+from openpyxl_compat import apply_style, drop_rows, fill_handle, set_fill, style_of
+
+# מצבי שורה
+ROW_NEW = 'new'
+ROW_UPDATED = 'updated'
+ROW_SKIPPED = 'skipped'
+ROW_ORPHAN = 'orphan'
+
+STATE_COLORS = {
+    ROW_NEW: "D4EDDA",      # ירוק בהיר - שורה חדשה
+    ROW_UPDATED: "FFF3CD",  # כתום בהיר - עודכן
+    ROW_SKIPPED: "E2E3E5",  # אפור - דולג
+    ROW_ORPHAN: "FFE6E6",   # אדום בהיר - ב"ל ללא תקופה
+}
+
+STATE_FILLS = {
+    state: PatternFill(start_color=color, end_color=color, fill_type="solid")
+    for state, color in STATE_COLORS.items()
+}
+
+
+class RowWriter:
+    """
+    כותב שורות לגיליון אחד. רוחב השורה, השורה הבאה ומזהה הסגנון של כל מצב
+    מחושבים פעם אחת - בלי max_row / max_column ובלי רישום סגנון לכל תא.
+    journal - יומן הפעולה (journal.Journal): כל שינוי נרשם בו לפני שהוא נעשה.
+    """
+
+    def __init__(self, ws, width=None, journal=None):
+        self.ws = ws
+        self.journal = journal
+        self.width = width or ws.max_column
+        self.next_row = ws.max_row + 1
+        self._fill_ids = {}
+        self._new_styles = {}
+
+    def _fill_id(self, state):
+        # רישום ה-fill באוסף הסגנונות של החוברת - פעם אחת לכל מצב
+        if state not in self._fill_ids:
+            self._fill_ids[state] = fill_handle(self.ws.parent, STATE_FILLS[state])
+        return self._fill_ids[state]
+
+    def _new_style(self, state):
+        # סגנון מוכן לתא חדש: ברירת מחדל + צבע המצב
+        if state not in self._new_styles:
+            cell = self.ws.cell(self.next_row, 1)
+            cell.fill = STATE_FILLS[state]
+            self._new_styles[state] = style_of(cell)
+        return self._new_styles[state]
+
+    def append(self, values, state=ROW_NEW):
+        """הוספת שורה בסוף הגיליון וצביעתה (state=None - בלי צבע). מחזיר את מספר השורה"""
+        style = self._new_style(state) if state else None
+        row = self.next_row
+        if self.journal:
+            self.journal.appended(self.ws, row)
+        for col in range(1, max(self.width, len(values)) + 1):
+            cell = self.ws.cell(row, col)
+            # קודם הסגנון ואז הערך - כדי שתאריך יקבל את פורמט התאריך שלו
+            if style:
+                apply_style(cell, style)
+            if col <= len(values) and values[col - 1] is not None:
+                cell.value = values[col - 1]
+        self.next_row += 1
+        return row
+
+    def append_rows(self, rows, state=ROW_NEW):
+        """הוספת רשימת שורות (tuples) במצב אחד. מחזיר את מספר השורה הראשונה"""
+        first_row = self.next_row
+        for values in rows:
+            self.append(values, state)
+        return first_row
+
+    def update(self, row, values_by_col, state=ROW_UPDATED, first_col=1, last_col=None):
+        """עדכון עמודות בשורה קיימת ({עמודה: ערך}) וצביעת השורה (או טווח עמודות בה)"""
+        for col, value in values_by_col.items():
+            if self.journal:
+                self.journal.cell(self.ws, row, col)
+            self.ws.cell(row, col).value = value
+        self.mark(row, state, first_col, last_col)
+
+    def mark(self, row, state, first_col=1, last_col=None):
+        """צביעת שורה קיימת (או טווח עמודות בה) - שאר הסגנון של התא נשמר"""
+        fill_id = self._fill_id(state)
+        for col in range(first_col, (last_col or self.width) + 1):
+            if self.journal:
+                self.journal.cell(self.ws, row, col)
+            set_fill(self.ws.cell(row, col), fill_id)
+
+
+def truncate_sheet(ws, header_rows=1, journal=None):
+    """
+    מחיקת כל שורות הנתונים מתחת לכותרת בפעולה אחת (delete_rows לכל שורה מזיז
+    את כל התאים שמתחתיה). הכותרת, רוחב העמודות ואימות הנתונים נשארים.
+    מחזיר את מספר השורות שנמחקו.
+    """
+    if journal:
+        journal.removed_rows(ws, header_rows + 1)
+    removed = max(ws.max_row - header_rows, 0)
+    drop_rows(ws, header_rows + 1)
+    return removed
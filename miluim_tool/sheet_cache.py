@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+מטמון גיליונות מפוענחים - DataFrame (עמודות מוקלדות) וערכים מחושבים של כל גיליון
+נשמרים בתיקיית cache שליד הקובץ, וקריאה חוזרת של קובץ שלא השתנה נטענת מהמטמון
+בלי לפענח את ה-XML שוב.
+
+מפתח המטמון: נתיב הקובץ + גודל + זמן שינוי + טביעת SHA-256 של התוכן.
+קובץ שנגעו בו בלי לשנות את תוכנו (אותה טביעה) נשאר תקף; שינוי תוכן מבחוץ מוחק את המטמון.
+שמירה דרך הסשן לא מוחקת אותו: הסשן מעדכן את הרשומות לתוכן שנשמר (refresh),
+כך שהפעולה הבאה נטענת מהמטמון.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+
+MANIFEST = "manifest.json"
+
+
+def _content_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SheetCache:
+    """מטמון לקובץ אחד. התוקף נבדק פעם אחת לכל מופע (לכל סשן)"""
+
+    def __init__(self, path, cache_root=None):
+        self.path = os.path.abspath(path)
+        cache_root = cache_root or os.path.join(os.path.dirname(self.path), "cache")
+        path_key = hashlib.sha1(self.path.encode('utf-8')).hexdigest()[:16]
+        self.folder = os.path.join(cache_root, path_key)
+        self._checked = False
+        self._manifest = None
+
+    def _entry_path(self, sheet_name, kind):
+        sheet_key = hashlib.sha1(sheet_name.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.folder, f"{sheet_key}.{kind}.pkl")
+
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.folder, MANIFEST), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, manifest):
+        os.makedirs(self.folder, exist_ok=True)
+        tmp_path = os.path.join(self.folder, MANIFEST + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, os.path.join(self.folder, MANIFEST))
+
+    def _ensure_current(self):
+        """התאמת המטמון לתוכן הנוכחי של הקובץ - מטמון של תוכן אחר נמחק"""
+        if self._checked:
+            return
+        stat = os.stat(self.path)
+        manifest = self._read_manifest()
+        if not (manifest and manifest['size'] == stat.st_size
+                and manifest['mtime'] == stat.st_mtime_ns):
+            content_hash = _content_hash(self.path)
+            if not manifest or manifest['hash'] != content_hash:
+                self.invalidate()
+                manifest = None
+            manifest = {'path': self.path, 'size': stat.st_size, 'mtime': stat.st_mtime_ns,
+                        'hash': content_hash, 'entries': (manifest or {}).get('entries', [])}
+            self._write_manifest(manifest)
+        manifest.setdefault('entries', [])
+        self._manifest = manifest
+        self._checked = True
+
+    def entries(self):
+        """(גיליון, סוג) של הרשומות שבמטמון - גם אם הקובץ השתנה מאז"""
+        manifest = self._manifest or self._read_manifest() or {}
+        return [tuple(entry) for entry in manifest.get('entries', [])]
+
+    def load(self, sheet_name, kind):
+        """הערך השמור (frame / values / ...) או None"""
+        self._ensure_current()
+        try:
+            with open(self._entry_path(sheet_name, kind), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _write_entry(self, sheet_name, kind, value):
+        tmp_path = self._entry_path(sheet_name, kind) + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._entry_path(sheet_name, kind))
+
+    def store(self, sheet_name, kind, value):
+        self._ensure_current()
+        self._write_entry(sheet_name, kind, value)
+        if [sheet_name, kind] not in self._manifest['entries']:
+            self._manifest['entries'].append([sheet_name, kind])
+            self._write_manifest(self._manifest)
+
+    def refresh(self, values):
+        """
+        אחרי שמירת הקובץ: הרשומות מוחלפות בערכים של התוכן שנשמר
+        ({(גיליון, סוג): ערך}) - בלי לקרוא את הקובץ ובלי לחשב טביעה.
+        הטביעה תחושב רק אם הקובץ ישתנה מבחוץ (גודל / זמן שינוי אחרים)
+        """
+        shutil.rmtree(self.folder, ignore_errors=True)
+        os.makedirs(self.folder, exist_ok=True)
+        for (sheet_name, kind), value in values.items():
+            self._write_entry(sheet_name, kind, value)
+        stat = os.stat(self.path)
+        self._manifest = {'path': self.path, 'size': stat.st_size, 'mtime': stat.st_mtime_ns,
+                          'hash': None, 'entries': [list(key) for key in values]}
+        self._write_manifest(self._manifest)
+        self._checked = True
+
+    def invalidate(self):
+        """מחיקת המטמון של הקובץ"""
+        shutil.rmtree(self.folder, ignore_errors=True)
+        self._manifest = None
+        self._checked = False
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+מאגר SQLite מקומי (אופציונלי) במקום קובץ Excel אחד שנטען ונכתב כולו בכל פעולה.
+עובדים, תקופות, תשלומי ב"ל, מנות, דוח מסכם וכינויים נשמרים בטבלאות עם אינדקסים;
+קובץ ה-Excel המעוצב (פריסת create_new_template.py) נבנה מהמאגר רק בייצוא.
+
+StoreSession מספק את אותו ממשק כמו WorkbookSession (rows / frame / writer / truncate / save),
+ושורות הטבלה ממוספרות כמו שורות הגיליון - כך שהפעולות עצמן לא משתנות.
+
+הפעלה: python sqlite_store.py - העברת קובץ המערכת למאגר (נוצר ליד קובץ המערכת).
+כל עוד קובץ המאגר קיים - המערכת עובדת מולו.
+"""
+
+import os
+import re
+import sqlite3
+from copy import copy
+from datetime import date, datetime
+
+from create_new_template import build_template
+from employee_aliases import ALIAS_HEADERS, ALIAS_SHEET
+from row_writer import ROW_NEW, ROW_UPDATED, RowWriter
+from workbook_session import WorkbookSession, rows_to_frame
+
+SYSTEM_FILE = r"C:\Projects\LitayPandaMiluim\מערכת_מילואים_מלאה.xlsx"
+STORE_FILE = os.path.splitext(SYSTEM_FILE)[0] + ".sqlite"
+
+TRACKING_SHEET = '2️⃣ תקופות מילואים'
+TEMPLATE_TRACKING_SHEET = '📊 מעקב מילואים ותשלומים'
+SUMMARY_SHEET = '4️⃣ דוח מסכם'
+
+# גיליון → (טבלה, [(עמודה, כותרת בגיליון המערכת, כותרת בתבנית אם שונה)])
+# סדר העמודות = סדר העמודות בגיליון המערכת (הפעולות כותבות לפי מספר עמודה)
+SHEETS = {
+    '1️⃣ רשימת עובדים': ('employees', [
+        ('id_number', 'ת.ז.', None),
+        ('first_name', 'שם פרטי', None),
+        ('last_name', 'שם משפחה', None),
+        ('full_name', 'שם מלא', None),
+        ('department', 'מחלקה', None),
+        ('monthly_salary', 'משכורת חודשית', None),
+        ('daily_rate', 'תעריף יומי', None),
+        ('bank', 'בנק', None),
+        ('account', 'מספר חשבון', None),
+        ('status', 'סטטוס', None),
+    ]),
+    TRACKING_SHEET: ('periods', [
+        ('period_id', 'מזהה תקופה', None),
+        ('employee', 'שם עובד', None),
+        ('department', 'מחלקה', None),
+        ('start_date', 'תאריך התחלה', None),
+        ('end_date', 'תאריך סיום', None),
+        ('month', 'חודש', None),
+        ('total_days', 'סה"כ ימים', None),
+        ('weekdays', 'ימי א-ה', None),
+        ('fridays', 'ימי שישי', None),
+        ('saturdays', 'ימי שבת', None),
+        ('holidays', 'ימי חג', None),
+        ('daily_rate', 'תעריף יומי', None),
+        ('employer_payment', 'תשלום מעסיק (א-ה)', None),
+        ('pitzuy', 'פיצוי 20% למעסיק', None),
+        ('bonus_40', 'תוספת 40%', 'תוספת 40% ₪'),
+        ('tagmul', 'סה"כ תגמול מביטוח לאומי ₪', None),
+        ('btl_payment_date', 'מועד תשלום ביטוח לאומי', None),
+        ('difference', 'סכום הפרשים לעובד ₪', None),
+        ('payment_month', 'חודש ביצוע תשלום', None),
+        ('notes', '💰 הערות ', '💰 הערות'),
+    ]),
+    '3️⃣ תשלומי ב"ל': ('btl_payments', [
+        ('id_number', 'ת.ז.', None),
+        ('employee', 'שם עובד', None),
+        ('start_date', 'תאריך התחלה', None),
+        ('end_date', 'תאריך סיום', None),
+        ('claim_type', 'סוג תשלום', None),
+        ('tagmul', 'תגמול ₪', None),
+        ('pitzuy', 'פיצוי 20% ₪', None),
+        ('bonus_40', 'תוספת 40% ₪', None),
+        ('total', 'סה"כ לעובד ₪', None),
+        ('mana', 'מספר מנה', None),
+        ('payment_date', 'תאריך תשלום', None),
+        ('source_file', 'קובץ מקור', None),
+    ]),
+    '💵 רשימת תשלומים': ('payment_batches', [
+        ('mana', 'מנה', 'מספר מנה'),
+        ('payment_date', 'תאריך תשלום', None),
+        ('tagmul', 'תגמול ₪', None),
+        ('pitzuy', 'פיצוי 20% ₪', None),
+        ('bonus_40', 'תוספת 40% ₪', None),
+        ('total', 'סה"כ כולל ₪', 'סה"כ ₪'),
+        ('audit', 'ביקורת נתונים מול תקופות מילואים', None),
+    ]),
+    SUMMARY_SHEET: ('summary', [
+        ('employee', 'שם עובד', None),
+        ('period_id', 'מזהה תקופה', None),
+        ('department', 'מחלקה', None),
+        ('month', 'חודש', None),
+        ('start_date', 'תאריך התחלה', None),
+        ('end_date', 'תאריך סיום', None),
+        ('total_days', 'סה"כ ימים', None),
+        ('weekdays', 'ימי א-ה', None),
+        ('daily_rate', 'תעריף יומי', None),
+        ('employer_payment', 'תשלום מעסיק', None),
+        ('tagmul', 'תגמול ב"ל', None),
+        ('pitzuy', 'פיצוי 20%', None),
+        ('bonus_40', 'תוספת 40%', None),
+        ('difference', 'הפרש', None),
+        ('status', 'סטטוס', None),
+    ]),
+    ALIAS_SHEET: ('employee_aliases', [
+        (column, header, None) for column, header in
+        zip(('alias', 'kind', 'full_name', 'source', 'updated'), ALIAS_HEADERS)
+    ]),
+}
+
+INDEXES = [
+    ('employees', ('id_number',)),
+    ('employees', ('full_name',)),
+    ('periods', ('employee', 'start_date', 'end_date')),
+    ('periods', ('period_id',)),
+    ('periods', ('payment_month',)),
+    ('btl_payments', ('employee', 'start_date', 'end_date')),
+    ('btl_payments', ('id_number',)),
+    ('btl_payments', ('mana',)),
+    ('payment_batches', ('mana',)),
+    ('employee_aliases', ('alias',)),
+]
+
+# גיליונות מחושבים - לא מועברים מה-Excel, נבנים מחדש ב"חישוב מלא"
+DERIVED_SHEETS = {SUMMARY_SHEET}
+
+_ISO_DATETIME = re.compile(r'^\d{4}-\d{2}-\d{2}( \d{2}:\d{2}:\d{2}(\.\d+)?)?$')
+
+
+def _to_db(value):
+    """
+    ערך תא → ערך SQLite (תאריכים כטקסט ISO, ערכי numpy כערכי Python).
+    טקסט אמיתי שנראה כמו תאריך ISO נשמר כ-BLOB - כדי שלא יחזור כתאריך
+    """
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, str) and _ISO_DATETIME.match(value):
+        return value.encode('utf-8')
+    if hasattr(value, 'item'):  # numpy
+        return value.item()
+    return value
+
+
+def _from_db(value):
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    if isinstance(value, str) and _ISO_DATETIME.match(value):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def create_schema(conn):
+    for table, columns in SHEETS.values():
+        names = ", ".join(f'"{column}"' for column, _, _ in columns)
+        conn.execute(f'CREATE TABLE IF NOT EXISTS {table} '
+                     f'("row" INTEGER PRIMARY KEY, "state" TEXT, {names})')
+    for table, columns in INDEXES:
+        name = f"idx_{table}_{'_'.join(columns)}"
+        names = ", ".join(f'"{column}"' for column in columns)
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({names})')
+
+
+class StoreWriter:
+    """
+    המקבילה של RowWriter במאגר - אותן פעולות ואותם מספרי שורה.
+    מצב השורה (חדש / עודכן / יתום) נשמר בעמודת state וקובע את הצבע בייצוא.
+    """
+
+    def __init__(self, conn, sheet_name):
+        self.conn = conn
+        self.table, columns = SHEETS[sheet_name]
+        self.columns = [column for column, _, _ in columns]
+        self.width = len(self.columns)
+        last_row = conn.execute(f'SELECT MAX("row") FROM {self.table}').fetchone()[0]
+        self.next_row = (last_row or 1) + 1
+        names = ", ".join(f'"{column}"' for column in self.columns)
+        self._insert = (f'INSERT INTO {self.table} ("row", "state", {names}) '
+                        f'VALUES ({", ".join("?" * (self.width + 2))})')
+
+    def _record(self, values, state):
+        values = [_to_db(value) for value in list(values)[:self.width]]
+        return [self.next_row, state] + values + [None] * (self.width - len(values))
+
+    def append(self, values, state=ROW_NEW):
+        row = self.next_row
+        self.conn.execute(self._insert, self._record(values, state))
+        self.next_row += 1
+        return row
+
+    def append_rows(self, rows, state=ROW_NEW):
+        first_row = self.next_row
+        records = []
+        for values in rows:
+            records.append(self._record(values, state))
+            self.next_row += 1
+        self.conn.executemany(self._insert, records)
+        return first_row
+
+    def update(self, row, values_by_col, state=ROW_UPDATED, first_col=1, last_col=None):
+        assignments = [f'"{self.columns[col - 1]}" = ?' for col in values_by_col]
+        self.conn.execute(
+            f'UPDATE {self.table} SET {", ".join(assignments)}, "state" = ? WHERE "row" = ?',
+            [_to_db(value) for value in values_by_col.values()] + [state, row])
+
+    def mark(self, row, state, first_col=1, last_col=None):
+        self.conn.execute(f'UPDATE {self.table} SET "state" = ? WHERE "row" = ?', (state, row))
+
+
+class StoreSession:
+    """סשן עבודה מול המאגר - אותו ממשק כמו WorkbookSession"""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        create_schema(self.conn)
+        self.journal = None
+        self._frames = {}
+
+    @property
+    def sheetnames(self):
+        return list(SHEETS)
+
+    def __contains__(self, sheet_name):
+        return sheet_name in SHEETS
+
+    def start_journal(self, label):
+        """ביטול פעולה במאגר - דרך גיבוי המאגר (אין יומן תאים)"""
+        return None
+
+    def rows(self, sheet_name, min_row=2, max_col=None):
+        """ערכי השורות לפי מספר שורה - שורה חסרה מוחזרת כשורה ריקה, כמו בגיליון"""
+        table, columns = SHEETS[sheet_name]
+        width = max_col or len(columns)
+        names = ", ".join(f'"{column}"' for column, _, _ in columns[:width])
+        pad = (None,) * (width - len(columns[:width]))
+        if min_row <= 1:
+            yield tuple(header for _, header, _ in columns[:width]) + pad
+        expected = max(min_row, 2)
+        for row, *values in self.conn.execute(
+                f'SELECT "row", {names} FROM {table} WHERE "row" >= ? ORDER BY "row"', (expected,)):
+            for _ in range(expected, row):
+                yield (None,) * width
+            yield tuple(_from_db(value) for value in values) + pad
+            expected = row + 1
+
+    def frame(self, sheet_name):
+        if sheet_name not in self._frames:
+            self._frames[sheet_name] = rows_to_frame(self.rows(sheet_name, min_row=1))
+        return self._frames[sheet_name]
+
+    def cached_value(self, sheet_name, row, col):
+        table, columns = SHEETS[sheet_name]
+        found = self.conn.execute(f'SELECT "{columns[col - 1][0]}" FROM {table} WHERE "row" = ?',
+                                  (row,)).fetchone()
+        return _from_db(found[0]) if found else None
+
+    def writer(self, sheet_name, width=None):
+        return StoreWriter(self.conn, sheet_name)
+
+    def truncate(self, sheet_name):
+        table, _ = SHEETS[sheet_name]
+        return self.conn.execute(f'DELETE FROM {table}').rowcount
+
+    def save(self, path=None):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    # --- העברה וייצוא ---
+
+    def import_workbook(self, system_file):
+        """
+        העברת הנתונים מקובץ המערכת (ערכים מחושבים, לפי שמות הכותרות - גם בפריסת
+        התבנית). מספרי השורות נשמרים. מחזיר {גיליון: מספר שורות}.
+        """
+        source = WorkbookSession(system_file, read_only=True, use_cache=True)
+        counts = {}
+        try:
+            for sheet_name, (table, columns) in SHEETS.items():
+                source_name = sheet_name
+                if sheet_name == TRACKING_SHEET and sheet_name not in source:
+                    source_name = TEMPLATE_TRACKING_SHEET
+                if sheet_name in DERIVED_SHEETS or source_name not in source:
+                    continue
+                rows = iter(source.values(source_name))
+                headers = [str(h).strip() if h is not None else '' for h in next(rows, ())]
+                positions = []
+                for _, header, template_header in columns:
+                    names = {header.strip(), (template_header or header).strip()}
+                    positions.append(next((i for i, h in enumerate(headers) if h in names), None))
+
+                writer = StoreWriter(self.conn, sheet_name)
+                self.conn.execute(f'DELETE FROM {table}')
+                records = []
+                for row, values in enumerate(rows, 2):
+                    picked = [values[i] if i is not None and i < len(values) else None
+                              for i in positions]
+                    if any(value is not None and value != '' for value in picked):
+                        writer.next_row = row
+                        records.append(writer._record(picked, None))
+                self.conn.executemany(writer._insert, records)
+                counts[sheet_name] = len(records)
+        finally:
+            source.close()
+        self.conn.commit()
+        return counts
+
+    def export(self, path):
+        """
+        בניית קובץ Excel מעוצב בפריסת create_new_template.py מהמאגר.
+        עמודות שאין להן מקום בתבנית נוספות בסוף, וגיליונות שאינם בתבנית נוספים
+        עם אותו עיצוב כותרת. מחזיר {גיליון: מספר שורות}.
+        """
+        wb = build_template()
+        header_source = wb['1️⃣ רשימת עובדים'].cell(1, 1)
+        counts = {}
+        for sheet_name, (table, columns) in SHEETS.items():
+            target_name = TEMPLATE_TRACKING_SHEET if sheet_name == TRACKING_SHEET else sheet_name
+            if target_name in wb.sheetnames:
+                ws = wb[target_name]
+            else:
+                ws = wb.create_sheet(target_name)
+                ws.sheet_view.rightToLeft = True
+                if sheet_name == ALIAS_SHEET:
+                    ws.sheet_state = 'hidden'
+            headers = [cell.value for cell in ws[1] if cell.value is not None]
+
+            positions = []
+            for _, header, template_header in columns:
+                wanted = template_header or header
+                if wanted not in headers:
+                    headers.append(wanted)
+                    cell = ws.cell(1, len(headers))
+                    cell.value = wanted
+                    for attr in ('font', 'fill', 'alignment', 'border'):
+                        setattr(cell, attr, copy(getattr(header_source, attr)))
+                    ws.column_dimensions[cell.column_letter].width = 15
+                positions.append(headers.index(wanted))
+
+            writer = RowWriter(ws, width=len(headers))
+            names = ", ".join(f'"{column}"' for column, _, _ in columns)
+            count = 0
+            for state, *values in self.conn.execute(
+                    f'SELECT "state", {names} FROM {table} ORDER BY "row"'):
+                row_values = [None] * len(headers)
+                for position, value in zip(positions, values):
+                    row_values[position] = _from_db(value)
+                writer.append(row_values, state)
+                count += 1
+            counts[target_name] = count
+        wb.save(path)
+        return counts
+
+
+def migrate(system_file=SYSTEM_FILE, store_file=STORE_FILE):
+    """יצירת המאגר מקובץ המערכת"""
+    if os.path.exists(store_file):
+        raise Exception(f"המאגר כבר קיים: {store_file}")
+    session = StoreSession(store_file)
+    try:
+        return session.import_workbook(system_file)
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    try:
+        print("=" * 60)
+        print("🗄️ העברת קובץ המערכת למאגר SQLite")
+        print("=" * 60)
+        for sheet_name, count in migrate().items():
+            print(f"   {sheet_name}: {count} שורות")
+        print(f"\n✅ המאגר נוצר: {STORE_FILE}")
+        print("   מעכשיו המערכת עובדת מול המאגר. קובץ Excel - בכפתור הייצוא.")
+        input("\nלחץ Enter לסגירה...")
+    except Exception as e:
+        print(f"\n❌ שגיאה: {e}")
+        input("\nלחץ Enter לסגירה...")
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""הרצת הבדיקות: python -m pytest miluim_tool/tests"""
+
+import os
+import sys
+
+# המודולים בתיקייה מייבאים זה את זה ישירות (כמו ב-__main__.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""בדיקות למדיניות השמירה ולמאגר הגיבויים (backup_store)"""
+
+from datetime import datetime, timedelta
+
+from backup_store import TIME_FORMAT, BackupStore, select_retained
+
+NOW = datetime(2025, 6, 15, 12, 0)
+
+
+def entry(taken, source='a', name=None):
+    time = taken.strftime(TIME_FORMAT)
+    return {'id': name or f"{source}-{time}", 'source': source, 'time': time}
+
+
+def ids(entries):
+    return sorted(e['id'] for e in entries)
+
+
+def test_keeps_everything_from_today():
+    entries = [entry(NOW - timedelta(hours=h)) for h in range(5)]
+    assert ids(select_retained(entries, now=NOW)) == ids(entries)
+
+
+def test_latest_per_day_within_daily_window():
+    morning = entry(datetime(2025, 6, 10, 9, 0))
+    evening = entry(datetime(2025, 6, 10, 18, 0))
+    other_day = entry(datetime(2025, 6, 1, 9, 0))
+    assert ids(select_retained([morning, evening, other_day], now=NOW)) == ids([evening, other_day])
+
+
+def test_latest_per_month_before_daily_window():
+    early = entry(datetime(2025, 3, 2, 9, 0))
+    late = entry(datetime(2025, 3, 28, 9, 0))
+    april = entry(datetime(2025, 4, 5, 9, 0))
+    last_year = entry(datetime(2024, 3, 20, 9, 0))
+    assert ids(select_retained([early, late, april, last_year], now=NOW)) == \
+        ids([late, april, last_year])
+
+
+def test_daily_days_sets_the_window():
+    first = entry(datetime(2025, 6, 5, 9, 0))
+    second = entry(datetime(2025, 6, 6, 9, 0))
+    assert ids(select_retained([first, second], now=NOW, daily_days=30)) == ids([first, second])
+    assert ids(select_retained([first, second], now=NOW, daily_days=3)) == ids([second])
+
+
+def test_each_source_has_its_own_buckets():
+    a = entry(datetime(2025, 6, 10, 9, 0), source='a')
+    b = entry(datetime(2025, 6, 10, 8, 0), source='b')
+    legacy = {'id': 'old', 'time': datetime(2025, 6, 10, 7, 0).strftime(TIME_FORMAT)}
+    assert ids(select_retained([a, b, legacy], now=NOW)) == ids([a, b, legacy])
+
+
+def finish(store):
+    store.compress_pending()  # ממתין לדחיסה שרצה ברקע
+    return store
+
+
+def test_snapshot_dedupes_and_restores(tmp_path):
+    system_file = tmp_path / "system.sqlite"
+    system_file.write_bytes(b"first")
+    store = BackupStore(str(system_file))
+    first = store.snapshot("one")
+    assert store.snapshot("again") == first
+    system_file.write_bytes(b"second")
+    store.snapshot("two")
+    finish(store)
+    assert sorted(e['label'] for e in store.list_backups()) == ["one", "two"]
+    assert all(e['file'].endswith('.lz') for e in store.list_backups())
+
+    store.restore(first['id'])
+    assert system_file.read_bytes() == b"first"
+    finish(store)
+
+
+def test_backups_are_listed_per_system_file(tmp_path):
+    a_file, b_file = tmp_path / "a.sqlite", tmp_path / "b.sqlite"
+    a_file.write_bytes(b"same")
+    b_file.write_bytes(b"same")
+    a, b = BackupStore(str(a_file)), BackupStore(str(b_file))
+    a_entry = a.snapshot()
+    b_entry = b.snapshot()
+    finish(a)
+    assert [e['id'] for e in a.list_backups()] == [a_entry['id']]
+    assert [e['id'] for e in b.list_backups()] == [b_entry['id']]
+    # אותו תוכן - עותק שמור אחד
+    assert len(list((tmp_path / "backups" / "store").iterdir())) == 1
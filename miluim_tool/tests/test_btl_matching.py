@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""בדיקות להתאמת תשלומי ב"ל לתקופות (btl_matching)"""
+
+from datetime import datetime
+
+import pandas as pd
+
+from btl_matching import match_btl_to_periods, reconcile_btl_with_periods
+
+
+def periods(*rows):
+    return pd.DataFrame(rows, columns=['שם עובד', 'תאריך התחלה', 'תאריך סיום'])
+
+
+def btl(*rows):
+    return pd.DataFrame(rows, columns=['שם עובד', 'תאריך התחלה', 'תאריך סיום',
+                                       'תגמול ₪', 'פיצוי 20% ₪', 'תוספת 40% ₪'])
+
+
+def test_sums_every_btl_row_of_a_period():
+    result = match_btl_to_periods(
+        periods(['דנה לוי', '01/03/2025', '10/03/2025']),
+        btl(['דנה לוי', '01/03/2025', '10/03/2025', 1000.0, 200.0, 0.0],
+            ['דנה לוי', '01/03/2025', '10/03/2025', 0.0, 0.0, 400.0]))
+    row = result.iloc[0]
+    assert (row['תגמול ₪'], row['פיצוי 20% ₪'], row['תוספת 40% ₪']) == (1000, 200, 400)
+    assert row['_matches'] == 2
+
+
+def test_names_and_date_types_are_normalized():
+    result = match_btl_to_periods(
+        periods(['  דנה   לוי ', '01/03/2025', '10/03/2025']),
+        btl(['דנה לוי', datetime(2025, 3, 1), datetime(2025, 3, 10), 500.0, 0.0, 0.0]))
+    assert result.iloc[0]['תגמול ₪'] == 500
+    assert result.iloc[0]['_matches'] == 1
+
+
+def test_period_without_btl_gets_zeros():
+    result = match_btl_to_periods(
+        periods(['דנה לוי', '01/03/2025', '10/03/2025'],
+                ['משה כהן', '01/03/2025', '10/03/2025']),
+        btl(['דנה לוי', '01/03/2025', '11/03/2025', 500.0, 0.0, 0.0]))
+    assert list(result['_matches']) == [0, 0]
+    assert list(result['תגמול ₪']) == [0, 0]
+
+
+def test_result_keeps_the_periods_index():
+    df_periods = periods(['דנה לוי', '01/03/2025', '10/03/2025'],
+                         ['משה כהן', '05/04/2025', '06/04/2025'])
+    df_periods.index = [7, 3]
+    result = match_btl_to_periods(
+        df_periods, btl(['משה כהן', '05/04/2025', '06/04/2025', 300.0, 60.0, 0.0]))
+    assert list(result.index) == [7, 3]
+    assert result.loc[3, 'תגמול ₪'] == 300
+    assert result.loc[7, '_matches'] == 0
+
+
+def test_unparsed_btl_dates_match_nothing():
+    result = match_btl_to_periods(
+        periods(['דנה לוי', '01/03/2025', '10/03/2025']),
+        btl(['דנה לוי', 'לא תאריך', '10/03/2025', 500.0, 0.0, 0.0]))
+    assert result.iloc[0]['_matches'] == 0
+
+
+def test_reconcile_reports_orphans_in_sheet_order():
+    df_btl = btl(['דנה לוי', '01/03/2025', '10/03/2025', 1000.0, 0.0, 0.0],
+                 ['משה כהן', '01/03/2025', '10/03/2025', 700.0, 0.0, 0.0],
+                 ['דנה לוי', 'לא תאריך', '10/03/2025', 100.0, 0.0, 0.0])
+    df_btl['תאריך תשלום'] = ['15/04/2025', '15/04/2025', None]
+    totals, orphans = reconcile_btl_with_periods(
+        periods(['דנה לוי', '01/03/2025', '10/03/2025'],
+                ['רון לוי', '01/05/2025', '02/05/2025']),
+        df_btl)
+    assert list(orphans) == [1, 2]
+    assert list(totals['_matches']) == [1, 0]
+    assert totals.iloc[0]['תגמול ₪'] == 1000
+    assert totals.iloc[0]['_last_payment'] == '15/04/2025'
+    assert totals.iloc[1]['_last_payment'] is None
+
+
+def test_reconcile_last_payment_skips_empty_dates():
+    df_btl = btl(['דנה לוי', '01/03/2025', '10/03/2025', 1000.0, 0.0, 0.0],
+                 ['דנה לוי', '01/03/2025', '10/03/2025', 0.0, 0.0, 400.0],
+                 ['דנה לוי', '01/03/2025', '10/03/2025', 0.0, 50.0, 0.0])
+    df_btl['תאריך תשלום'] = ['15/04/2025', '20/06/2025', None]
+    totals, orphans = reconcile_btl_with_periods(
+        periods(['דנה לוי', '01/03/2025', '10/03/2025']), df_btl)
+    assert len(orphans) == 0
+    assert totals.iloc[0]['_matches'] == 3
+    assert totals.iloc[0]['_last_payment'] == '20/06/2025'
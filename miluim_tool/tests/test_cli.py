@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""בדיקות לשורת הפקודה (cli) - stdout הוא הסיכום ב-JSON בלבד"""
+
+import json
+from datetime import datetime
+
+import pytest
+from openpyxl import Workbook
+
+from cli import main
+from sqlite_store import SHEETS, TRACKING_SHEET
+
+BTL = '3️⃣ תשלומי ב"ל'
+
+
+def make_system(path):
+    wb = Workbook()
+    tracking = wb.active
+    tracking.title = TRACKING_SHEET
+    tracking.append([header for _, header, _ in SHEETS[TRACKING_SHEET][1]])
+    tracking.append([1, 'דנה לוי', 'כספים', datetime(2025, 3, 1), datetime(2025, 3, 10), '03/2025',
+                     10, 8, 1, 1, 0, 400, 3200])
+    tracking.append([2, 'משה כהן', 'תפעול', datetime(2025, 4, 1), datetime(2025, 4, 2), '04/2025',
+                     2, 2, 0, 0, 0, 400, 800])
+    btl = wb.create_sheet(BTL)
+    btl.append([header for _, header, _ in SHEETS[BTL][1]])
+    btl.append(['123', 'דנה לוי', '01/03/2025', '10/03/2025', 'מילואים', 3000, 600, 0, 3000,
+                1112, '15/04/2025', 'btl.xlsx'])
+    btl.append(['456', 'רון לוי', '01/05/2025', '02/05/2025', 'מילואים', 500, 100, 0, 500,
+                1112, '15/04/2025', 'btl.xlsx'])
+    wb.save(path)
+    return str(path)
+
+
+@pytest.mark.parametrize('flags', [[], ['--progress']])
+def test_sync_prints_only_json_on_stdout(tmp_path, capsys, flags):
+    system_file = make_system(tmp_path / "system.xlsx")
+    exit_code = main(['--system-file', system_file, *flags, 'sync'])
+    out = capsys.readouterr().out
+    summary = json.loads(out)
+    assert exit_code == 0
+    assert summary['command'] == 'sync'
+    assert (summary['updated'], summary['periods_without_btl']) == (1, 1)
+    assert [row['שורה'] for row in summary['btl_without_periods']] == [3]
+
+
+def test_error_is_reported_in_the_json_summary(tmp_path, capsys):
+    exit_code = main(['--system-file', str(tmp_path / "missing.xlsx"), 'sync'])
+    assert exit_code == 1
+    assert json.loads(capsys.readouterr().out)['error'] == "System file not found!"
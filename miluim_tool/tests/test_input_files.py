@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""בדיקות לזיהוי מבנה קובץ ב"ל (input_files.detect_payment_layout) ולקריאת הרשומות"""
+
+import pytest
+from openpyxl import Workbook
+
+from input_files import PEEK_ROWS, _is_label, detect_payment_layout, read_btl_file
+
+HEADER = ['זהות', 'שם פרטי', 'שם משפחה', 'תאריך שרות', 'תאריך סיום שרות', 'סוג תביעה', 'תגמול',
+          'פיצוי %20 למעסיק']
+RECORDS = [
+    ['211877550', 'אוראל', 'שווקי', '01/10/2025', '05/10/2025', 'מקור', '4,000', '800+'],
+    ['37643772', 'אורי', 'אשתר', '19/01/2025', '22/01/2025', 'מקור', '-300', '-60'],
+]
+
+
+def write_btl(path, cells, header_row, leading_blank=0):
+    """cells - {(שורה, עמודה): ערך} מעל הכותרת (ממוספרים מ-1), ואחריהם הכותרת והרשומות"""
+    wb = Workbook()
+    ws = wb.active
+    for (row, col), value in cells.items():
+        ws.cell(leading_blank + row, col, value)
+    for offset, values in enumerate([HEADER] + RECORDS):
+        for col, value in enumerate(values, 1):
+            ws.cell(leading_blank + header_row + offset, col, value)
+    wb.save(path)
+    return str(path)
+
+
+# הפורמט המוכר: מנה ב-B3, תאריך ב-B10, כותרת בשורה 12
+STANDARD = {(3, 1): 'מספר מנה', (3, 2): 777, (10, 1): 'תאריך תשלום', (10, 2): '15/03/2026'}
+
+
+def test_standard_layout(tmp_path):
+    path = write_btl(tmp_path / "btl.xlsx", STANDARD, header_row=12)
+    assert detect_payment_layout(path) == (11, 777, '15/03/2026')
+    batch = read_btl_file(path)
+    assert list(batch.records['tz']) == ['211877550', '37643772']
+    assert list(batch.records['tagmul']) == [4000, -300]
+
+
+def test_shifted_header_and_labels(tmp_path):
+    cells = {(2, 1): 'דוח תשלומים', (7, 3): 'מספר מנה:', (7, 5): 901,
+             (13, 2): 'תאריך התשלום', (13, 4): '20/03/2026'}
+    path = write_btl(tmp_path / "btl.xlsx", cells, header_row=15)
+    header_row, mana, payment_date = detect_payment_layout(path)
+    assert (header_row, mana, payment_date) == (14, 901, '20/03/2026')
+    batch = read_btl_file(path)
+    assert (batch.mana, batch.payment_date) == (901, '20/03/2026')
+    assert list(batch.records['name']) == ['אוראל שווקי', 'אורי אשתר']
+
+
+def test_extra_blank_leading_rows(tmp_path):
+    standard = read_btl_file(write_btl(tmp_path / "standard.xlsx", STANDARD, header_row=12))
+    path = write_btl(tmp_path / "blank.xlsx", STANDARD, header_row=12, leading_blank=3)
+    assert detect_payment_layout(path) == (14, 777, '15/03/2026')
+    assert read_btl_file(path).records.equals(standard.records)
+
+
+def test_fallback_to_fixed_positions_without_labels(tmp_path):
+    # 'מנהל' / 'הזמנה' אינן התווית 'מנה'; בלי תוויות - B3 ו-B10 של הפורמט המוכר
+    cells = {(1, 1): 'מנהל', (1, 2): 'ישראל ישראלי', (2, 1): 'הזמנה', (2, 2): 5555,
+             (3, 1): 'סכום', (3, 2): 777, (10, 1): 'הערה', (10, 2): '15/03/2026'}
+    path = write_btl(tmp_path / "btl.xlsx", cells, header_row=12)
+    assert detect_payment_layout(path) == (11, 777, '15/03/2026')
+
+
+def test_label_found_next_to_a_decoy(tmp_path):
+    cells = {**STANDARD, (1, 1): 'מנהל', (1, 2): 'ישראל ישראלי', (2, 1): 'הזמנה', (2, 2): 5555}
+    path = write_btl(tmp_path / "btl.xlsx", cells, header_row=12)
+    assert detect_payment_layout(path)[1] == 777
+
+
+def test_header_beyond_peek_rows(tmp_path):
+    path = write_btl(tmp_path / "btl.xlsx", STANDARD, header_row=PEEK_ROWS + 5)
+    with pytest.raises(Exception, match="header not found"):
+        detect_payment_layout(path)
+
+
+@pytest.mark.parametrize('cell, label, expected', [
+    ('מספר מנה', ('מנה',), True),
+    ('מנה:', ('מנה',), True),
+    ('המנה', ('מנה',), True),
+    ('מנהל', ('מנה',), False),
+    ('הזמנה', ('מנה',), False),
+    ('המנה הזו שולמה באיחור של חודשיים', ('מנה',), False),
+    ('תאריך התשלום', ('תאריך', 'תשלום'), True),
+    ('תאריך', ('תאריך', 'תשלום'), False),
+    (777, ('מנה',), False),
+])
+def test_is_label(cell, label, expected):
+    assert _is_label(cell, label) == expected
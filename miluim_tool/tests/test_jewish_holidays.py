@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""בדיקות ללוח החגים המחושב (jewish_holidays) - מול תאריכים מלוח השנה המפורסם"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from jewish_holidays import (holiday_eve_ordinals, holiday_ordinals, holidays_for_year,
+                             is_holiday, is_holiday_eve)
+
+PUBLISHED = {
+    2024: [date(2024, 4, 23), date(2024, 4, 29), date(2024, 5, 14), date(2024, 6, 12),
+           date(2024, 10, 3), date(2024, 10, 4), date(2024, 10, 12), date(2024, 10, 17),
+           date(2024, 10, 24)],
+    2025: [date(2025, 4, 13), date(2025, 4, 19), date(2025, 5, 1), date(2025, 6, 2),
+           date(2025, 9, 23), date(2025, 9, 24), date(2025, 10, 2), date(2025, 10, 7),
+           date(2025, 10, 14)],
+    2026: [date(2026, 4, 2), date(2026, 4, 8), date(2026, 4, 22), date(2026, 5, 22),
+           date(2026, 9, 12), date(2026, 9, 13), date(2026, 9, 21), date(2026, 9, 26),
+           date(2026, 10, 3)],
+}
+
+
+@pytest.mark.parametrize('year', sorted(PUBLISHED))
+def test_holidays_match_published_calendar(year):
+    assert [day for day, _ in holidays_for_year(year)] == PUBLISHED[year]
+
+
+def test_holiday_names_in_order():
+    names = [name for _, name in holidays_for_year(2025)]
+    assert names == ['פסח', 'שביעי של פסח', 'יום העצמאות', 'שבועות', 'ראש השנה א',
+                     'ראש השנה ב', 'יום כיפור', 'סוכות', 'שמיני עצרת']
+
+
+@pytest.mark.parametrize('year', range(2000, 2051))
+def test_rosh_hashana_never_on_sunday_wednesday_friday(year):
+    rosh_hashana = holidays_for_year(year)[4][0]
+    assert rosh_hashana.weekday() not in (6, 2, 4)
+
+
+@pytest.mark.parametrize('year', range(2000, 2051))
+def test_independence_day_never_on_friday_saturday_monday(year):
+    atzmaut = holidays_for_year(year)[2][0]
+    assert atzmaut.weekday() not in (4, 5, 0)
+
+
+def test_ordinal_sets_and_predicates_agree():
+    holidays = holiday_ordinals(2025)
+    eves = holiday_eve_ordinals(2025)
+    day = date(2025, 1, 1)
+    while day.year == 2025:
+        assert is_holiday(day) == (day.toordinal() in holidays)
+        assert is_holiday_eve(day) == (day.toordinal() in eves)
+        day += timedelta(days=1)
+
+
+def test_holiday_eves():
+    assert is_holiday_eve(date(2025, 4, 12))     # ערב פסח
+    assert is_holiday_eve(date(2025, 9, 22))     # ערב ראש השנה
+    assert is_holiday_eve(date(2025, 4, 30))     # ערב יום העצמאות (שהוקדם)
+    assert not is_holiday_eve(date(2025, 9, 23))  # ראש השנה ב - יום חג, לא ערב
+    assert len(holiday_eve_ordinals(2025)) == 8
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""בדיקות ליומן הפעולות ולביטול הפעולה האחרונה (journal)"""
+
+import os
+import shutil
+
+import pytest
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+from journal import journal_dir, last_operation, undo_last
+from workbook_session import WorkbookSession
+
+SHEET = 'נתונים'
+
+
+def make_workbook(path, rows):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = SHEET
+    ws.append(['שם', 'סכום'])
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+    return str(path)
+
+
+def sheet_values(path):
+    wb = load_workbook(path)
+    values = [list(row) for row in wb[SHEET].iter_rows(values_only=True)]
+    wb.close()
+    return values
+
+
+def run_operation(path, label, updates=None, appended=()):
+    session = WorkbookSession(path)
+    session.start_journal(label)
+    writer = session.writer(SHEET)
+    for row, values in (updates or {}).items():
+        writer.update(row, values)
+    for values in appended:
+        writer.append(values)
+    session.save()
+    session.close()
+
+
+def test_undo_restores_cells_and_drops_appended_rows(tmp_path):
+    path = make_workbook(tmp_path / "system.xlsx", [['דנה', 100], ['משה', 200]])
+    before = sheet_values(path)
+    run_operation(path, "ייבוא", updates={2: {2: 150}}, appended=[['רון', 300], ['נועה', 400]])
+    assert sheet_values(path)[1] == ['דנה', 150]
+    assert len(sheet_values(path)) == 5
+    assert last_operation(path)[0] == "ייבוא"
+
+    assert undo_last(path) == "ייבוא"
+    assert sheet_values(path) == before
+    assert last_operation(path) is None
+    with pytest.raises(Exception, match="אין פעולה לביטול"):
+        undo_last(path)
+
+
+def cell_styles(path):
+    wb = load_workbook(path)
+    styles = [(cell.value, cell.font.b, cell.font.color and cell.font.color.rgb, cell.border.left.style,
+               cell.alignment.horizontal, cell.fill.fgColor.rgb, cell.number_format)
+              for row in wb[SHEET].iter_rows() for cell in row]
+    wb.close()
+    return styles
+
+
+def test_undo_truncate_restores_values_and_full_style(tmp_path):
+    path = make_workbook(tmp_path / "system.xlsx", [['דנה', 100], ['משה', 200], ['רון', 300]])
+    wb = load_workbook(path)
+    ws = wb[SHEET]
+    ws['A2'].font = Font(bold=True, color='FFFF0000')
+    ws['A2'].border = Border(left=Side(style='thin'))
+    ws['A3'].font = Font(bold=True, color='FFFF0000')
+    ws['B2'].alignment = Alignment(horizontal='center')
+    ws['B3'].fill = PatternFill('solid', start_color='FF00FF00')
+    ws['B4'].number_format = '#,##0.00'
+    wb.save(path)
+    before = cell_styles(path)
+
+    session = WorkbookSession(path)
+    session.start_journal("ניקוי")
+    session.truncate(SHEET)
+    session.save()
+    session.close()
+    assert len(sheet_values(path)) == 1
+
+    assert undo_last(path) == "ניקוי"
+    assert cell_styles(path) == before
+
+
+def test_undo_several_operations_in_order(tmp_path):
+    path = make_workbook(tmp_path / "system.xlsx", [['דנה', 100]])
+    original = sheet_values(path)
+    run_operation(path, "ראשונה", updates={2: {2: 1}})
+    after_first = sheet_values(path)
+    run_operation(path, "שנייה", appended=[['רון', 2]])
+    assert undo_last(path) == "שנייה"
+    assert sheet_values(path) == after_first
+    assert undo_last(path) == "ראשונה"
+    assert sheet_values(path) == original
+
+
+def test_operation_without_changes_keeps_previous_undo(tmp_path):
+    path = make_workbook(tmp_path / "system.xlsx", [['דנה', 100]])
+    original = sheet_values(path)
+    run_operation(path, "עדכון", updates={2: {2: 1}})
+    run_operation(path, "ללא שינוי")
+    assert last_operation(path)[0] == "עדכון"
+    undo_last(path)
+    assert sheet_values(path) == original
+
+
+def test_undo_refused_after_outside_edit(tmp_path):
+    path = make_workbook(tmp_path / "system.xlsx", [['דנה', 100]])
+    run_operation(path, "עדכון", updates={2: {2: 1}})
+    wb = load_workbook(path)
+    wb[SHEET]['A2'] = 'נערך ידנית'
+    wb.save(path)
+    with pytest.raises(Exception, match="השתנה"):
+        undo_last(path)
+
+
+def test_two_workbooks_in_one_folder_keep_separate_journals(tmp_path):
+    a = make_workbook(tmp_path / "a.xlsx", [['דנה', 100]])
+    b = make_workbook(tmp_path / "b.xlsx", [['משה', 200]])
+    a_before = sheet_values(a)
+    run_operation(a, "פעולה על A", updates={2: {2: 1}})
+    run_operation(b, "פעולה על B", appended=[['רון', 300]])
+    b_after = sheet_values(b)
+    assert journal_dir(a) != journal_dir(b)
+
+    # הפעולה האחרונה בתיקייה היא של B - הביטול של A מבטל רק את הפעולה של A
+    assert last_operation(a)[0] == "פעולה על A"
+    assert undo_last(a) == "פעולה על A"
+    assert sheet_values(a) == a_before
+    assert sheet_values(b) == b_after
+    assert last_operation(b)[0] == "פעולה על B"
+
+
+def test_journal_of_another_file_is_never_applied(tmp_path):
+    a = make_workbook(tmp_path / "a.xlsx", [['דנה', 100]])
+    b = make_workbook(tmp_path / "b.xlsx", [['משה', 200]])
+    run_operation(b, "פעולה על B", updates={2: {2: 1}})
+    # יומן של B שהועתק לתיקיית היומן של A
+    os.makedirs(journal_dir(a))
+    for name in os.listdir(journal_dir(b)):
+        shutil.copy(os.path.join(journal_dir(b), name), journal_dir(a))
+    shutil.copy(b, a)  # גם טביעת הקובץ זהה
+    a_before = sheet_values(a)
+
+    assert last_operation(a) is None
+    with pytest.raises(Exception, match="קובץ מערכת אחר"):
+        undo_last(a)
+    assert sheet_values(a) == a_before
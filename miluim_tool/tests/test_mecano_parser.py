@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""בדיקות לעיבוד קובץ מקאנו לתקופות (mecano_parser)"""
+
+from datetime import datetime
+
+import pandas as pd
+
+from mecano_parser import PERIOD_COLUMNS, group_consecutive_days, mecano_periods, split_periods_by_month
+
+
+def attendance(*rows):
+    """(שם, מחלקה, 'dd/mm/YYYY') לטבלת מקאנו עם 'תאריך' מפוענח"""
+    df = pd.DataFrame(rows, columns=['שם עובד', 'מחלקה', 'תאריך'])
+    df['תאריך'] = pd.to_datetime(df['תאריך'], format='%d/%m/%Y')
+    return df
+
+
+def periods_as_tuples(df):
+    return [(row['עובד'], row['מחלקה'], row['התחלה'].strftime('%d/%m/%Y'),
+             row['סיום'].strftime('%d/%m/%Y'), int(row['ימים'])) for _, row in df.iterrows()]
+
+
+def test_consecutive_days_form_one_period_and_gaps_split():
+    df = attendance(['דנה לוי', 'כספים', '03/03/2025'],
+                    ['דנה לוי', 'כספים', '01/03/2025'],
+                    ['דנה לוי', 'כספים', '02/03/2025'],
+                    ['דנה לוי', 'כספים', '05/03/2025'])
+    assert periods_as_tuples(mecano_periods(df)) == [
+        ('דנה לוי', 'כספים', '01/03/2025', '03/03/2025', 3),
+        ('דנה לוי', 'כספים', '05/03/2025', '05/03/2025', 1),
+    ]
+
+
+def test_employees_do_not_join_and_keep_first_department():
+    df = attendance(['משה כהן', 'תפעול', '02/03/2025'],
+                    ['דנה לוי', 'כספים', '01/03/2025'],
+                    ['משה כהן', 'מכירות', '01/03/2025'],
+                    ['דנה  לוי ', None, '02/03/2025'])
+    raw = group_consecutive_days(df)
+    assert list(raw.columns) == ['עובד', 'מחלקה', 'התחלה', 'סיום']
+    assert [(r['עובד'], r['מחלקה'], r['התחלה'].day, r['סיום'].day) for _, r in raw.iterrows()] == [
+        ('דנה לוי', 'כספים', 1, 2),
+        ('משה כהן', 'מכירות', 1, 2),
+    ]
+
+
+def test_rows_without_name_or_date_are_dropped():
+    df = attendance(['דנה לוי', 'כספים', '01/03/2025'],
+                    [None, 'כספים', '02/03/2025'],
+                    ['  ', 'כספים', '02/03/2025'],
+                    ['דנה לוי', 'כספים', None])
+    assert periods_as_tuples(mecano_periods(df)) == [
+        ('דנה לוי', 'כספים', '01/03/2025', '01/03/2025', 1)]
+
+
+def test_period_crossing_months_is_split_per_month():
+    days = pd.date_range('2025-01-30', '2025-03-02').strftime('%d/%m/%Y')
+    df = attendance(*[['דנה לוי', 'כספים', day] for day in days])
+    result = mecano_periods(df)
+    assert list(result.columns) == PERIOD_COLUMNS
+    assert periods_as_tuples(result) == [
+        ('דנה לוי', 'כספים', '30/01/2025', '31/01/2025', 2),
+        ('דנה לוי', 'כספים', '01/02/2025', '28/02/2025', 28),
+        ('דנה לוי', 'כספים', '01/03/2025', '02/03/2025', 2),
+    ]
+
+
+def test_split_keeps_source_order_and_skips_reversed_periods():
+    source, starts, ends, days = split_periods_by_month(
+        [datetime(2024, 12, 31), datetime(2025, 3, 5), datetime(2024, 2, 28)],
+        [datetime(2025, 1, 1), datetime(2025, 3, 4), datetime(2024, 3, 1)])
+    assert list(source) == [0, 0, 2, 2]
+    assert list(days) == [1, 1, 2, 1]
+    assert str(starts[3]) == '2024-03-01' and str(ends[2]) == '2024-02-29'
+
+
+def test_empty_file():
+    result = mecano_periods(attendance())
+    assert list(result.columns) == PERIOD_COLUMNS
+    assert len(result) == 0
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""בדיקות להצעת התאמה ולפתרון שמות לא מוכרים (name_resolution)"""
+
+import pytest
+
+from name_resolution import NEW, SKIP, collect_unknown_names, resolve_names, suggest_match
+
+SYSTEM_NAMES = ['יוסף כהן', 'אבי כהן', 'דנה לוין', 'כהן משה', 'אורי דוד', 'ישראל כהן',
+                'רונית לוי']
+
+
+@pytest.mark.parametrize('name, expected', [
+    ('משה כהן', 'כהן משה'),     # אותן מילים בסדר אחר
+    ('יוסי כהן', 'יוסף כהן'),   # שם פרטי מקוצר, אותו שם משפחה
+    ('אבי כהנ', 'אבי כהן'),     # שגיאת כתיב באות אחת
+    ('דנה לוי', 'דנה לוין'),
+])
+def test_confident_suggestions(name, expected):
+    assert suggest_match(name, SYSTEM_NAMES) == expected
+
+
+@pytest.mark.parametrize('name', [
+    'רון לוי',         # שם משפחה משותף בלבד - בן משפחה, לא אותו עובד
+    'ישראל ישראלי',    # שם פרטי משותף בלבד
+    'אורי לוי',        # מילה משותפת אחת לכל מועמד, דמיון נמוך
+    'שלמה פרץ',
+])
+def test_no_confident_match_skips(name):
+    assert suggest_match(name, SYSTEM_NAMES) is None
+
+
+def test_extra_middle_name_matches_full_name():
+    assert suggest_match('משה לוי', ['משה כהן לוי', 'משה לוין']) == 'משה כהן לוי'
+    assert suggest_match('אורי דוד עברי', ['אורי דוד']) == 'אורי דוד'
+
+
+def test_no_system_names():
+    assert suggest_match('דנה לוי', []) is None
+
+
+def test_collect_unknown_names_once_in_order():
+    assert collect_unknown_names(['ב', 'א', '', 'ב', 'ג', 'א'], {'ג'}) == ['ב', 'א']
+
+
+def test_resolve_names_preset_then_one_ask():
+    asked = []
+
+    def ask(names, suggestions):
+        asked.append((names, suggestions))
+        return {'יוסי כהן': 'יוסף כהן'}
+
+    decisions = resolve_names(['דנה חדשה', 'יוסי כהן', 'שם שגוי', 'שלמה פרץ'], SYSTEM_NAMES,
+                              preset={'דנה חדשה': NEW, 'שם שגוי': 'לא ברשימה'}, ask=ask)
+    assert asked == [(['יוסי כהן', 'שם שגוי', 'שלמה פרץ'],
+                      {'יוסי כהן': 'יוסף כהן', 'שם שגוי': None, 'שלמה פרץ': None})]
+    assert decisions == {'דנה חדשה': NEW, 'יוסי כהן': 'יוסף כהן', 'שם שגוי': SKIP,
+                         'שלמה פרץ': SKIP}
+
+
+def test_resolve_names_without_ask_skips_pending():
+    assert resolve_names(['יוסי כהן'], SYSTEM_NAMES) == {'יוסי כהן': SKIP}
+
+
+def test_resolve_names_cancel():
+    assert resolve_names(['יוסי כהן'], SYSTEM_NAMES, ask=lambda names, suggestions: None) is None
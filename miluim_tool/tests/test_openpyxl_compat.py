@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""בדיקות לשכבת התאימות ל-openpyxl - המסלול המהיר והמסלול הציבורי נותנים אותה תוצאה"""
+
+import pytest
+from openpyxl import Workbook
+from openpyxl.styles import Font, PatternFill
+
+import openpyxl_compat
+
+
+@pytest.fixture(params=[True, False], ids=['fast', 'public'])
+def path(request, monkeypatch):
+    if request.param and not openpyxl_compat.FAST_PATH:
+        pytest.skip("openpyxl version without the fast path")
+    monkeypatch.setattr(openpyxl_compat, 'FAST_PATH', request.param)
+    return request.param
+
+
+def test_style_key_is_hashable_and_shared(path):
+    ws = Workbook().active
+    ws['A1'].font = Font(bold=True)
+    ws['A2'].font = Font(bold=True)
+    ws['A3'].font = Font(italic=True)
+    ws['A4'] = 1
+    keys = {openpyxl_compat.style_key(ws[f'A{row}']) for row in (1, 2, 3)}
+    assert len(keys) == 2
+    assert openpyxl_compat.style_key(ws['A4']) is None
+
+
+def test_style_and_fill_copy(path):
+    wb = Workbook()
+    ws = wb.active
+    ws['A1'].font = Font(bold=True)
+    openpyxl_compat.apply_style(ws['B1'], openpyxl_compat.style_of(ws['A1']))
+    openpyxl_compat.set_fill(ws['B1'], openpyxl_compat.fill_handle(
+        wb, PatternFill('solid', start_color='FF00FF00')))
+    assert ws['B1'].font.b
+    assert ws['B1'].fill.fgColor.rgb == 'FF00FF00'
+    assert not ws['A1'].fill.fill_type
+
+
+def test_drop_rows(path):
+    ws = Workbook().active
+    for row in range(1, 7):
+        ws.append([row, row * 10])
+    openpyxl_compat.drop_rows(ws, 5, 6)
+    assert [ws.cell(row, 1).value for row in range(1, 7)] == [1, 2, 3, 4, None, None]
+    openpyxl_compat.drop_rows(ws, 2)
+    assert [ws.cell(row, 2).value for row in range(1, 5)] == [10, None, None, None]
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""בדיקות לפעולות מול קובץ מערכת קטן (operations) - ייבוא ב"ל ורשימת התשלומים"""
+
+from openpyxl import Workbook, load_workbook
+
+from operations import MiluimOperations
+from payment_list import BTL_SHEET, PAYMENTS_SHEET
+from sqlite_store import SHEETS
+
+EMPLOYEES = '1️⃣ רשימת עובדים'
+INPUT_HEADER = ['זהות', 'שם פרטי', 'שם משפחה', 'תאריך שרות', 'תאריך סיום שרות', 'סוג תביעה',
+                'תגמול', 'פיצוי %20 למעסיק']
+
+
+def make_system(path, btl_rows, payment_rows):
+    wb = Workbook()
+    employees = wb.active
+    employees.title = EMPLOYEES
+    employees.append([header for _, header, _ in SHEETS[EMPLOYEES][1]])
+    employees.append(['11915519', 'אורי', 'אשתר', 'אורי אשתר'])
+    employees.append(['25147505', 'משה', 'בורך', 'משה בורך'])
+    btl = wb.create_sheet(BTL_SHEET)
+    btl.append([header for _, header, _ in SHEETS[BTL_SHEET][1]])
+    for row in btl_rows:
+        btl.append(row)
+    payments = wb.create_sheet(PAYMENTS_SHEET)
+    payments.append([header for _, header, _ in SHEETS[PAYMENTS_SHEET][1]])
+    for row in payment_rows:
+        payments.append(row)
+    wb.save(path)
+    return str(path)
+
+
+def make_btl_file(path, mana, payment_date, records):
+    """קובץ ב"ל בפורמט המוכר: מנה ב-B3, תאריך ב-B10, כותרת בשורה 12"""
+    wb = Workbook()
+    ws = wb.active
+    ws['A3'], ws['B3'] = 'מספר מנה', mana
+    ws['A10'], ws['B10'] = 'תאריך תשלום', payment_date
+    ws.append([])
+    for row, values in enumerate([INPUT_HEADER] + records, 12):
+        for col, value in enumerate(values, 1):
+            ws.cell(row, col, value)
+    wb.save(path)
+    return str(path)
+
+
+def sheet_rows(path, sheet, max_col):
+    wb = load_workbook(path)
+    rows = [list(row) for row in wb[sheet].iter_rows(min_row=2, max_col=max_col, values_only=True)]
+    wb.close()
+    return rows
+
+
+def test_updated_row_moving_to_another_mana_rebuilds_both(tmp_path):
+    system_file = make_system(tmp_path / "system.xlsx", [
+        ['11915519', 'אורי אשתר', '16/01/2025', '18/01/2025', 'מקור', 821, 164, 0, 821,
+         203, '15/04/2025', 'a.xlsx'],
+        ['25147505', 'משה בורך', '01/02/2025', '03/02/2025', 'מקור', 900, 180, 0, 900,
+         203, '15/04/2025', 'a.xlsx'],
+    ], [[203, '15/04/2025', 1721, 344, 0, 2065]])
+    btl_file = make_btl_file(tmp_path / "mana_1200.xlsx", 1200, '01/05/2025', [
+        ['11915519', 'אורי', 'אשתר', '16/01/2025', '18/01/2025', 'מקור', '1,000', '200'],
+    ])
+
+    result = MiluimOperations(system_file).import_btl(
+        [btl_file], lambda employee, start, old, new: "update")
+
+    assert (result['added'], result['updated']) == (0, 1)
+    assert sheet_rows(system_file, BTL_SHEET, 10)[0][5:] == [1000, 200, 0, 1000, 1200]
+    assert sheet_rows(system_file, PAYMENTS_SHEET, 6) == [
+        [203, '15/04/2025', 900, 180, 0, 1080],
+        [1200, '01/05/2025', 1000, 200, 0, 1200],
+    ]
+    assert {batch['mana'] for batch in result['batches']} == {203, 1200}
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""בדיקות לחישוב רשימת התשלומים מגיליון ב"ל (payment_list)"""
+
+from openpyxl import Workbook, load_workbook
+
+from payment_list import BTL_SHEET, PAYMENTS_SHEET, aggregate_payments, mana_key, rebuild_payment_list
+from workbook_session import WorkbookSession
+
+
+def btl_row(mana, tagmul=0, pitzuy=0, bonus_40=0, payment_date='15/04/2025'):
+    """שורת ב"ל (11 עמודות): ת.ז., שם, התחלה, סיום, סוג, תגמול, פיצוי, 40%, סה"כ, מנה, תאריך"""
+    return ['123', 'דנה לוי', '01/03/2025', '10/03/2025', 'מילואים', tagmul, pitzuy, bonus_40,
+            None, mana, payment_date]
+
+
+def test_mana_key():
+    assert mana_key(1112) == mana_key(1112.0) == mana_key('1112') == mana_key(' 1112 ') == 1112
+    assert mana_key('א-12') == 'א-12'
+    assert mana_key(None) is None
+    assert mana_key('  ') is None
+    assert mana_key(float('nan')) is None
+
+
+def test_aggregate_per_mana_in_order():
+    batches = aggregate_payments([
+        btl_row(1112, 1000, 200),
+        btl_row(900, 500, 100, payment_date='01/02/2025'),
+        btl_row('1112', 0, 0, 400),
+        btl_row(None, 9999),
+        btl_row(1112, 'לא מספר', 50),
+    ])
+    assert list(batches.index) == [1112, 900]
+    first = batches.loc[1112]
+    assert (first['tagmul'], first['pitzuy'], first['bonus_40'], first['total']) == (1000, 250, 400, 1650)
+    assert first['rows'] == 3
+    assert first['payment_date'] == '15/04/2025'
+    assert batches.loc[900, 'total'] == 600
+
+
+def make_system(path, btl_rows, payment_rows):
+    wb = Workbook()
+    btl = wb.active
+    btl.title = BTL_SHEET
+    btl.append(['ת.ז.', 'שם', 'התחלה', 'סיום', 'סוג', 'תגמול', 'פיצוי', '40%', 'סה"כ', 'מנה',
+                'תאריך תשלום', 'קובץ'])
+    for row in btl_rows:
+        btl.append(row)
+    payments = wb.create_sheet(PAYMENTS_SHEET)
+    payments.append(['מנה', 'תאריך', 'תגמול', 'פיצוי', '40%', 'סה"כ', 'ביקורת'])
+    for row in payment_rows:
+        payments.append(row)
+    wb.save(path)
+    return str(path)
+
+
+def payment_rows(path):
+    wb = load_workbook(path)
+    rows = [list(row[:6]) for row in wb[PAYMENTS_SHEET].iter_rows(min_row=2, values_only=True)]
+    wb.close()
+    return rows
+
+
+def rebuild(path, manas=None, moved_from=()):
+    session = WorkbookSession(path)
+    result = rebuild_payment_list(session, manas, moved_from)
+    session.save()
+    session.close()
+    return result
+
+
+def test_rebuild_updates_only_requested_manas(tmp_path):
+    path = make_system(tmp_path / "system.xlsx",
+                       [btl_row(1112, 1000, 200), btl_row(1112, 0, 0, 400), btl_row(410, 2090)],
+                       [[1112, '15/04/2025', 1000, 200, 0, 1200],
+                        [410, '01/01/2024', 6209, 0, 0, 6209],
+                        [None, 'ידני', 5, 0, 0, 5]])
+    result = rebuild(path, manas=['1112', 777])
+    assert (result['updated'], result['added']) == (1, 0)
+    assert [batch['mana'] for batch in result['batches']] == [1112]
+    assert payment_rows(path) == [[1112, '15/04/2025', 1000, 200, 400, 1600],
+                                  [410, '01/01/2024', 6209, 0, 0, 6209],
+                                  [None, 'ידני', 5, 0, 0, 5]]
+
+
+def test_rebuild_appends_new_manas_and_skips_unchanged_rows(tmp_path):
+    path = make_system(tmp_path / "system.xlsx",
+                       [btl_row(1112, 1000, 200), btl_row(1200, 300, payment_date='01/05/2025')],
+                       [[1112, '15/04/2025', 1000, 200, 0, 1200]])
+    result = rebuild(path)
+    assert (result['updated'], result['added']) == (0, 1)
+    assert payment_rows(path) == [[1112, '15/04/2025', 1000, 200, 0, 1200],
+                                  [1200, '01/05/2025', 300, 0, 0, 300]]
+
+    # ייבוא חוזר - אותן שורות, שום דבר לא נכתב מחדש
+    result = rebuild(path)
+    assert (result['updated'], result['added']) == (0, 0)
+
+
+def test_rebuild_includes_manas_rows_moved_from(tmp_path):
+    # שורה של מנה 203 עודכנה למנה 1200 - מנה 203 מחושבת מחדש בלי השורה
+    path = make_system(tmp_path / "system.xlsx",
+                       [btl_row(203, 800, 160), btl_row(1200, 1000, 200, payment_date='01/05/2025')],
+                       [[203, '15/04/2025', 1800, 360, 0, 2160]])
+    result = rebuild(path, manas=[1200], moved_from={203})
+    assert (result['updated'], result['added']) == (1, 1)
+    assert payment_rows(path) == [[203, '15/04/2025', 800, 160, 0, 960],
+                                  [1200, '01/05/2025', 1000, 200, 0, 1200]]
+
+
+def test_mana_left_without_rows_is_zeroed(tmp_path):
+    path = make_system(tmp_path / "system.xlsx",
+                       [btl_row(1200, 1000, 200, payment_date='01/05/2025')],
+                       [[203, '15/04/2025', 1000, 200, 0, 1200],
+                        [410, '01/01/2024', 6209, 0, 0, 6209]])
+    result = rebuild(path, manas=[1200, 410], moved_from={203})
+    assert (result['updated'], result['added']) == (1, 1)
+    # 410 - מנה ישנה בלי שורות ב"ל שלא הייתה בה העברה: לא משתנה
+    assert payment_rows(path) == [[203, '15/04/2025', 0, 0, 0, 0],
+                                  [410, '01/01/2024', 6209, 0, 0, 6209],
+                                  [1200, '01/05/2025', 1000, 200, 0, 1200]]
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""בדיקות לאינדקס הרשומות הקיימות (record_index)"""
+
+from datetime import date, datetime
+
+import pandas as pd
+
+from record_index import BtlRecord, RecordIndex, btl_index, date_ordinal, period_index
+
+
+def test_date_ordinal_accepts_every_date_form():
+    expected = date(2025, 3, 1).toordinal()
+    for value in (datetime(2025, 3, 1), date(2025, 3, 1), pd.Timestamp('2025-03-01'),
+                  '01/03/2025', '01.03.2025', '01/03/25'):
+        assert date_ordinal(value) == expected
+
+
+def test_date_ordinal_empty_and_unparsed():
+    assert date_ordinal(None) == 0
+    assert date_ordinal(pd.NaT) == 0
+    assert date_ordinal('') == 0
+    assert date_ordinal('לא תאריך') == 'לא תאריך'
+    assert date_ordinal('31/02/2025') == '31/02/2025'
+
+
+def test_key_codes_names_and_claim_types():
+    index = RecordIndex()
+    key = index.key('דנה לוי', '01/03/2025', datetime(2025, 3, 10), 'מילואים')
+    assert key == index.key('דנה לוי', datetime(2025, 3, 1), '10/03/2025', 'מילואים')
+    assert key != index.key('דנה לוי', '01/03/2025', '10/03/2025', 'תוספת')
+    assert key != index.key('משה כהן', '01/03/2025', '10/03/2025', 'מילואים')
+    assert len(index.key('דנה לוי', '01/03/2025', '10/03/2025')) == 3
+
+
+def test_negative_amount_is_a_separate_record():
+    index = RecordIndex()
+    payment = index.key('דנה לוי', '01/03/2025', '10/03/2025', 'מילואים', 500)
+    correction = index.key('דנה לוי', '01/03/2025', '10/03/2025', 'מילואים', -120.5)
+    assert payment != correction
+    assert correction[-1] == -12050
+    assert correction == index.key('דנה לוי', '01/03/2025', '10/03/2025', 'מילואים', -120.5)
+
+
+def test_mapping_interface():
+    index = RecordIndex()
+    key = index.key('דנה לוי', '01/03/2025', '10/03/2025')
+    assert key not in index and index.get(key) is None
+    index.add(key, 2)
+    index[index.key('משה כהן', '01/03/2025', '10/03/2025')] = 3
+    assert key in index and index[key] == 2 and len(index) == 2
+    index.update({key: 5})
+    assert index.get(key) == 5
+
+
+def test_find_does_not_allocate_codes():
+    index = RecordIndex()
+    key = index.key('דנה לוי', '01/03/2025', '10/03/2025', 'מילואים', 500)
+    index.add(key, 2)
+    assert index.find('דנה לוי', datetime(2025, 3, 1), '10/03/2025', 'מילואים', 500) == key
+    assert index.find('דנה לוי', '01/03/2025', '10/03/2025', 'מילואים', -120) is None
+    assert index.find('משה כהן', '01/03/2025', '10/03/2025', 'מילואים', 500) is None
+    assert index.find('דנה לוי', '01/03/2025', '10/03/2025', 'תוספת', 500) is None
+    assert len(index._names) == 1 and len(index._kinds) == 1
+
+
+def test_period_index_rows_from_two():
+    index = period_index([
+        (1, 'דנה  לוי', 'כספים', '01/03/2025', '10/03/2025'),
+        (2, 'משה כהן', 'תפעול', datetime(2025, 4, 1), datetime(2025, 4, 2)),
+    ])
+    assert index[index.key('דנה לוי', datetime(2025, 3, 1), '10/03/2025')] == 2
+    assert index[index.key('משה כהן', '01/04/2025', '02/04/2025')] == 3
+
+
+class Aliases:
+    def resolve(self, name, id_number=None):
+        return {'123': 'דנה לוי'}.get(id_number, ' '.join(str(name or '').split()))
+
+
+def test_btl_index_amounts_and_aliases():
+    rows = [
+        ('123', 'דנה', '01/03/2025', '10/03/2025', 'מילואים', 1000, 200, 0, 1000, 203),
+        ('123', 'דנה', '01/03/2025', '10/03/2025', 'תוספת', None, None, 400, 400, 204),
+        ('123', 'דנה', '01/03/2025', '10/03/2025', 'מילואים', -150, 0, 0, -150, 205),
+        ('', None, '01/03/2025', '10/03/2025', 'מילואים', 10, 0, 0, 10, 206),
+    ]
+    index = btl_index(rows, Aliases())
+    assert len(index) == 3
+    assert index[index.key('דנה לוי', '01/03/2025', '10/03/2025', 'מילואים')] == BtlRecord(2, 1000, 200, 203)
+    assert index[index.key('דנה לוי', '01/03/2025', '10/03/2025', 'תוספת')] == BtlRecord(3, 0, None, 204)
+    assert index[index.key('דנה לוי', '01/03/2025', '10/03/2025', 'מילואים', -150)] == BtlRecord(4, -150, 0, 205)
+
+
+def test_btl_index_without_aliases_uses_the_sheet_name():
+    index = btl_index([('123', ' דנה לוי ', '01/03/2025', '10/03/2025', ' מילואים ', 1000, 0, 0,
+                        1000, 203)])
+    assert index.get(index.key('דנה לוי', '01/03/2025', '10/03/2025', 'מילואים')) == BtlRecord(2, 1000, 0, 203)
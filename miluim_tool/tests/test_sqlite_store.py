@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""בדיקות למאגר SQLite: העברה מקובץ המערכת, כתיבה דרך StoreWriter וייצוא (sqlite_store)"""
+
+from datetime import date, datetime
+
+import numpy as np
+from openpyxl import Workbook, load_workbook
+
+from employee_aliases import ALIAS_SHEET
+from row_writer import ROW_NEW, ROW_UPDATED, STATE_COLORS
+from sqlite_store import (SHEETS, TEMPLATE_TRACKING_SHEET, TRACKING_SHEET, StoreSession, _from_db,
+                          _to_db)
+
+EMPLOYEES = '1️⃣ רשימת עובדים'
+BTL = '3️⃣ תשלומי ב"ל'
+
+
+def test_values_round_trip():
+    for value in (datetime(2025, 3, 1, 8, 30), 'דנה לוי', '01/03/2025', 12.5, 7, None):
+        assert _from_db(_to_db(value)) == value
+    assert _from_db(_to_db(date(2025, 3, 1))) == datetime(2025, 3, 1)
+    assert _to_db(np.int64(5)) == 5 and type(_to_db(np.int64(5))) is int
+
+
+def test_text_that_looks_like_an_iso_date_stays_text():
+    for text in ('2025-03-01', '2025-03-01 10:00:00'):
+        value = _from_db(_to_db(text))
+        assert value == text and isinstance(value, str)
+
+
+def make_system(path):
+    """קובץ מערכת: רשימת עובדים בפריסת המערכת, מעקב בפריסת התבנית, ב"ל עם שורה ריקה"""
+    wb = Workbook()
+    employees = wb.active
+    employees.title = EMPLOYEES
+    employees.append(['ת.ז.', 'שם מלא', 'מחלקה', 'עמודה לא מוכרת'])
+    employees.append(['123', 'דנה לוי', 'כספים', 'x'])
+
+    tracking = wb.create_sheet(TEMPLATE_TRACKING_SHEET)
+    tracking.append(['מזהה תקופה', 'שם עובד', 'תאריך התחלה', 'תאריך סיום', 'תגמול ב"ל ₪',
+                     'תוספת 40% ₪', '💰 הערות'])
+    tracking.append([1, 'דנה לוי', datetime(2025, 3, 1), datetime(2025, 3, 10), 999, 400,
+                     '2025-03-01'])
+
+    btl = wb.create_sheet(BTL)
+    btl.append([header for _, header, _ in SHEETS[BTL][1]])
+    btl.append(['123', 'דנה לוי', '01/03/2025', '10/03/2025', 'מילואים', 1000])
+    btl.append([None] * 3)
+    btl.append(['456', 'משה כהן', '05/04/2025', '06/04/2025', 'מילואים', 300])
+    wb.save(path)
+    return str(path)
+
+
+def open_store(tmp_path):
+    system_file = make_system(tmp_path / "system.xlsx")
+    session = StoreSession(str(tmp_path / "system.sqlite"))
+    counts = session.import_workbook(system_file)
+    return session, counts
+
+
+def test_import_matches_headers_in_both_layouts(tmp_path):
+    session, counts = open_store(tmp_path)
+    try:
+        assert counts == {EMPLOYEES: 1, TRACKING_SHEET: 1, BTL: 2}
+        employee = next(session.rows(EMPLOYEES))
+        assert employee[0] == '123' and employee[3] == 'דנה לוי' and employee[4] == 'כספים'
+
+        period = next(session.rows(TRACKING_SHEET))
+        columns = [column for column, _, _ in SHEETS[TRACKING_SHEET][1]]
+        assert period[columns.index('start_date')] == datetime(2025, 3, 1)
+        assert period[columns.index('bonus_40')] == 400    # 'תוספת 40% ₪' בתבנית
+        assert period[columns.index('notes')] == '2025-03-01'  # '💰 הערות' בלי רווח
+        assert period[columns.index('tagmul')] is None     # 'תגמול ב"ל ₪' אינה עמודה במאגר
+    finally:
+        session.close()
+
+
+def test_rows_keep_sheet_row_numbers(tmp_path):
+    session, _ = open_store(tmp_path)
+    try:
+        rows = list(session.rows(BTL, max_col=2))
+        assert rows == [('123', 'דנה לוי'), (None, None), ('456', 'משה כהן')]
+        assert [row[:2] for row in session.rows(BTL, min_row=4)] == [('456', 'משה כהן')]
+        header = next(session.rows(BTL, min_row=1, max_col=14))
+        assert header[0] == 'ת.ז.' and header[12:] == (None, None)
+        assert session.cached_value(BTL, 4, 6) == 300
+        assert session.cached_value(BTL, 3, 6) is None
+        assert list(session.frame(BTL)['שם עובד'].fillna('')) == ['דנה לוי', '', 'משה כהן']
+    finally:
+        session.close()
+
+
+def test_writer_then_export(tmp_path):
+    session, _ = open_store(tmp_path)
+    writer = session.writer(BTL)
+    assert writer.append(['789', 'רון לוי', '01/05/2025', '02/05/2025', 'מילואים', 50]) == 5
+    writer.update(2, {6: 1100, 10: 1200}, ROW_UPDATED)
+    session.save()
+    session.close()
+
+    session = StoreSession(str(tmp_path / "system.sqlite"))
+    try:
+        assert [row[5] for row in session.rows(BTL)] == [1100, None, 300, 50]
+        counts = session.export(str(tmp_path / "export.xlsx"))
+    finally:
+        session.close()
+    assert counts[BTL] == 3
+    assert counts[TEMPLATE_TRACKING_SHEET] == 1
+
+    wb = load_workbook(tmp_path / "export.xlsx")
+    btl = wb[BTL]
+    assert [btl.cell(row, 2).value for row in range(2, 5)] == ['דנה לוי', 'משה כהן', 'רון לוי']
+    assert (btl.cell(2, 6).value, btl.cell(2, 10).value) == (1100, 1200)
+    assert btl.cell(2, 1).fill.fgColor.rgb.endswith(STATE_COLORS[ROW_UPDATED])
+    assert btl.cell(4, 1).fill.fgColor.rgb.endswith(STATE_COLORS[ROW_NEW])
+    assert not btl.cell(3, 1).fill.fill_type
+
+    tracking = wb[TEMPLATE_TRACKING_SHEET]
+    headers = [cell.value for cell in tracking[1]]
+    period = dict(zip(headers, next(tracking.iter_rows(min_row=2, values_only=True))))
+    assert period['תאריך התחלה'] == datetime(2025, 3, 1)
+    assert period['תוספת 40% ₪'] == 400
+    assert period['💰 הערות'] == '2025-03-01'
+    assert wb[ALIAS_SHEET].sheet_state == 'hidden'
+    wb.close()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""בדיקות ללוח סוגי הימים (work_calendar) - מול ספירה יום-יום"""
+
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from work_calendar import DayTypeCalendar
+
+
+def count_day_by_day(start, end, holidays):
+    counts = [0, 0, 0, 0]
+    day = start
+    while day <= end:
+        if day.toordinal() in holidays:
+            counts[3] += 1
+        elif day.weekday() == 5:
+            counts[2] += 1
+        elif day.weekday() == 4:
+            counts[1] += 1
+        else:
+            counts[0] += 1
+        day += timedelta(days=1)
+    return tuple(counts)
+
+
+def fixed_holidays(*days):
+    ordinals = frozenset(day.toordinal() for day in days)
+    return lambda year: frozenset(o for o in ordinals if date.fromordinal(o).year == year)
+
+
+def test_plain_week():
+    calendar = DayTypeCalendar(holiday_provider=lambda year: frozenset())
+    # ראשון 2.3.2025 עד שבת 8.3.2025
+    assert calendar.count(datetime(2025, 3, 2), datetime(2025, 3, 8)) == (5, 1, 1, 0)
+
+
+def test_holiday_takes_precedence_over_friday_and_saturday():
+    provider = fixed_holidays(date(2025, 3, 7), date(2025, 3, 8), date(2025, 3, 4))
+    calendar = DayTypeCalendar(holiday_provider=provider)
+    assert calendar.count(datetime(2025, 3, 2), datetime(2025, 3, 8)) == (4, 0, 0, 3)
+
+
+def test_end_before_start_is_empty():
+    calendar = DayTypeCalendar(holiday_provider=lambda year: frozenset())
+    assert calendar.count(datetime(2025, 3, 8), datetime(2025, 3, 2)) == (0, 0, 0, 0)
+
+
+def test_count_many_matches_day_by_day_across_years():
+    holidays = [date(2024, 4, 23), date(2024, 12, 31), date(2025, 1, 1), date(2025, 4, 13),
+                date(2026, 9, 12)]
+    calendar = DayTypeCalendar(holiday_provider=fixed_holidays(*holidays))
+    ordinals = {day.toordinal() for day in holidays}
+    periods = [(date(2024, 4, 20), date(2024, 4, 30)),
+               (date(2024, 12, 25), date(2025, 1, 5)),
+               (date(2025, 1, 1), date(2025, 1, 1)),
+               (date(2025, 4, 1), date(2026, 9, 30))]
+    starts = pd.to_datetime([start for start, _ in periods])
+    ends = pd.to_datetime([end for _, end in periods])
+    result = calendar.count_many(starts, ends)
+    assert result.shape == (4, 4)
+    for (start, end), counts in zip(periods, result):
+        assert tuple(counts) == count_day_by_day(start, end, ordinals)
+
+
+def test_range_grows_when_later_periods_fall_outside():
+    calls = []
+
+    def provider(year):
+        calls.append(year)
+        return frozenset()
+
+    calendar = DayTypeCalendar(holiday_provider=provider)
+    calendar.count(datetime(2025, 3, 2), datetime(2025, 3, 8))
+    calendar.count(datetime(2025, 11, 1), datetime(2025, 11, 2))
+    assert calls == [2025]  # שנה שלמה - אותו טווח
+    assert calendar.count(datetime(2023, 12, 31), datetime(2024, 1, 6)) == (5, 1, 1, 0)
+    assert calendar.count(datetime(2025, 3, 2), datetime(2025, 3, 8)) == (5, 1, 1, 0)
+
+
+def test_empty_input():
+    calendar = DayTypeCalendar()
+    assert calendar.count_many([], []).shape == (0, 4)
+
+
+def test_default_provider_uses_generated_holidays():
+    # פסח 2025 (ראשון 13.4) ושביעי של פסח (שבת 19.4)
+    assert DayTypeCalendar().count(datetime(2025, 4, 13), datetime(2025, 4, 19)) == (4, 1, 0, 2)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+דוח הפרשים שטרם שולמו - מ-snapshot אחד של גיליון המעקב (סריקה בקריאה בלבד,
+או מהמטמון) וכתיבה זורמת של השורות הפתוחות בלבד (עם הכותרת והעיצוב) לקובץ חדש
+"""
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formula.translate import Translator
+from openpyxl.utils import get_column_letter
+
+PERIOD_ID_COL = 1
+PAYMENT_MONTH_COL = 20  # עמודה T - חודש ביצוע תשלום
+
+
+def is_unpaid(values):
+    """שורה עם מזהה תקופה וללא חודש ביצוע תשלום"""
+    period_id = values[PERIOD_ID_COL - 1] if len(values) >= PERIOD_ID_COL else None
+    payment_month = values[PAYMENT_MONTH_COL - 1] if len(values) >= PAYMENT_MONTH_COL else None
+    return bool(period_id) and (not payment_month or str(payment_month).strip() == '')
+
+
+def _is_local_formula(value):
+    """נוסחה שמפנה רק לתאים באותו גיליון - רק אותה מזיזים עם השורה"""
+    return isinstance(value, str) and value.startswith('=') and '!' not in value
+
+
+def build_unpaid_report(session, output_path, pick_sheet):
+    """
+    בניית הדוח מ-snapshot של גיליון המעקב (session - WorkbookSession; עם מטמון -
+    בלי לפענח את הקובץ כשלא השתנה). pick_sheet(session) מחזירה את שם הגיליון.
+    נוסחאות בתוך הגיליון מוזזות לשורה החדשה שלהן. הקובץ נכתב רק אם יש שורות פתוחות.
+    מחזיר את מספר השורות בדוח.
+    """
+    sheet_name = pick_sheet(session)
+    snapshot = session.snapshot(sheet_name)
+    widths, right_to_left, freeze = snapshot.layout
+
+    wb_out = Workbook(write_only=True)
+    ws_out = wb_out.create_sheet(sheet_name)
+    for letter, width in widths.items():
+        ws_out.column_dimensions[letter].width = width
+    ws_out.sheet_view.rightToLeft = right_to_left
+    if freeze:
+        ws_out.freeze_panes = freeze
+
+    out_row = 0
+    unpaid = 0
+    for row_idx, cells in enumerate(snapshot.rows, 1):
+        values = [value for value, _ in cells]
+        if row_idx > 1:
+            if not is_unpaid(values):
+                continue
+            unpaid += 1
+        out_row += 1
+
+        row_out = []
+        for col_idx, (value, style) in enumerate(cells, 1):
+            if out_row != row_idx and _is_local_formula(value):
+                letter = get_column_letter(col_idx)
+                value = Translator(value, origin=f"{letter}{row_idx}").translate_formula(
+                    f"{letter}{out_row}")
+            cell = WriteOnlyCell(ws_out, value)
+            if style is not None:
+                (cell.font, cell.fill, cell.border,
+                 cell.alignment, cell.number_format, cell.protection) = snapshot.styles[style]
+            row_out.append(cell)
+        ws_out.append(row_out)
+
+    if unpaid:
+        wb_out.save(output_path)
+    return unpaid
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+לוח סוגי ימים עם סכומים מצטברים (prefix sums)
+ספירת ימי א-ה / שישי / שבת / חג לתקופה בארבע חיסורים במקום מעבר יום-יום
+"""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from jewish_holidays import holiday_ordinals
+
+# date(1970, 1, 1).toordinal()
+EPOCH_ORDINAL = 719163
+
+# סדר העמודות בתוצאה - זהה ל-count_work_days
+WEEKDAYS, FRIDAYS, SATURDAYS, HOLIDAYS = range(4)
+
+
+def _to_ordinals(values):
+    """המרת מערך תאריכים (datetime / Timestamp / datetime64 / מחרוזת ISO) למספרי ordinal"""
+    days = pd.to_datetime(pd.Series(values)).to_numpy(dtype='datetime64[D]')
+    return days.astype(np.int64) + EPOCH_ORDINAL
+
+
+class DayTypeCalendar:
+    """
+    לוח מחושב מראש של סכומים מצטברים לכל סוג יום.
+    חג קודם לשבת ולשישי (כמו בספירה המקורית). הטווח מתרחב אוטומטית
+    לשנים שלמות כשמבקשים תאריך מחוץ לו; ימי החג נלקחים לכל שנה מ-holiday_provider.
+    """
+
+    def __init__(self, holiday_provider=holiday_ordinals):
+        self.holiday_provider = holiday_provider
+        self._first = None
+        self._last = None
+        self._cumulative = None
+
+    def _build(self, first, last):
+        ordinals = np.arange(first, last + 1, dtype=np.int64)
+        weekday = (ordinals - 1) % 7  # 0 = שני ... 4 = שישי, 5 = שבת
+        holidays = set()
+        for year in range(date.fromordinal(first).year, date.fromordinal(last).year + 1):
+            holidays |= self.holiday_provider(year)
+        is_holiday = np.isin(ordinals, np.fromiter(holidays, dtype=np.int64))
+        is_saturday = (weekday == 5) & ~is_holiday
+        is_friday = (weekday == 4) & ~is_holiday
+        is_weekday = ~(is_holiday | is_saturday | is_friday)
+
+        day_types = np.stack([is_weekday, is_friday, is_saturday, is_holiday]).astype(np.int64)
+        cumulative = np.zeros((4, len(ordinals) + 1), dtype=np.int64)
+        np.cumsum(day_types, axis=1, out=cumulative[:, 1:])
+
+        self._first, self._last, self._cumulative = first, last, cumulative
+
+    def _ensure_range(self, first, last):
+        if self._cumulative is not None and self._first <= first and last <= self._last:
+            return
+        if self._cumulative is not None:
+            first, last = min(first, self._first), max(last, self._last)
+        # הרחבה לשנים שלמות כדי לא לבנות מחדש על כל תקופה
+        first = date(date.fromordinal(first).year, 1, 1).toordinal()
+        last = date(date.fromordinal(last).year, 12, 31).toordinal()
+        self._build(first, last)
+
+    def count_many(self, starts, ends):
+        """
+        ספירה לכל זוג (התחלה, סיום) - מערך בגודל (n, 4):
+        ימי א-ה, ימי שישי, ימי שבת, ימי חג. תקופה שהסיום שלה לפני ההתחלה = אפסים.
+        """
+        start_ord = _to_ordinals(starts)
+        end_ord = _to_ordinals(ends)
+        if len(start_ord) == 0:
+            return np.zeros((0, 4), dtype=np.int64)
+
+        end_ord = np.maximum(end_ord, start_ord - 1)
+        self._ensure_range(int(start_ord.min()), int(end_ord.max()))
+
+        lo = start_ord - self._first
+        hi = end_ord - self._first + 1
+        return (self._cumulative[:, hi] - self._cumulative[:, lo]).T
+
+    def count(self, start_date, end_date):
+        """(ימי א-ה, ימי שישי, ימי שבת, ימי חג) לתקופה אחת"""
+        weekdays, fridays, saturdays, holidays = self.count_many([start_date], [end_date])[0]
+        return int(weekdays), int(fridays), int(saturdays), int(holidays)
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+סשן עבודה על קובץ המערכת - פענוח אחד של הקובץ לכל פעולה
+מספק גם גיליונות openpyxl לכתיבה וגם DataFrames של אותם גיליונות
+"""
+
+import math
+from collections import namedtuple
+from copy import copy
+from datetime import date, datetime
+
+from openpyxl import load_workbook
+from openpyxl.utils import get_column_letter
+from pandas.io.parsers import TextParser
+
+from journal import Journal
+from openpyxl_compat import read_only_layout, style_key
+from row_writer import RowWriter, truncate_sheet
+from sheet_cache import SheetCache
+
+# גיליון עם נוסחאות, סגנונות ופריסה - להעתקה לקובץ אחר (דוח) בלי לפענח את הקובץ שוב.
+# layout - (רוחב עמודות, מימין לשמאל, הקפאה); styles - רשימת (font, fill, border,
+# alignment, number_format, protection); rows - שורות של (ערך, מספר סגנון או None)
+SheetSnapshot = namedtuple('SheetSnapshot', 'layout styles rows')
+
+
+def _convert_value(value):
+    """המרת ערך תא כמו pd.read_excel (ריק → '', מספר שלם → int)"""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _is_formula(value):
+    return isinstance(value, str) and value.startswith('=')
+
+
+def _saved_value(value, formulas=False):
+    """
+    ערך תא כפי שייקרא מהקובץ אחרי שמירה ב-openpyxl: מספר עשרוני ב-16 ספרות,
+    תאריך כ-datetime, נוסחה - בלי ערך מחושב (None), או הנוסחה עצמה עם formulas
+    """
+    if _is_formula(value):
+        return value if formulas else None
+    if hasattr(value, 'to_pydatetime'):  # pandas Timestamp
+        return value.to_pydatetime()
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    if hasattr(value, 'item'):  # numpy
+        value = value.item()
+    if isinstance(value, float):
+        return float("%.16g" % value) if math.isfinite(value) else None
+    return value
+
+
+def sheet_snapshot(ws, read_only=False):
+    """
+    SheetSnapshot של גיליון - גיליון לקריאה בלבד, או גיליון של חוברת פתוחה לכתיבה
+    (אחרי שמירה: הערכים כפי שייקראו מהקובץ שנשמר)
+    """
+    if read_only:
+        ws.reset_dimensions()
+        layout = read_only_layout(ws)
+    else:
+        # הגדרת עמודה אחת יכולה לכסות טווח (min..max) - כמו בקובץ
+        widths = {get_column_letter(col): dim.width for dim in ws.column_dimensions.values()
+                  if dim.width and dim.min for col in range(dim.min, (dim.max or dim.min) + 1)}
+        layout = (widths, bool(ws.sheet_view.rightToLeft), ws.freeze_panes)
+    styles, style_index, rows = [], {}, []
+    for cells in ws.iter_rows():
+        row = []
+        for cell in cells:
+            key = style_key(cell)
+            if key is not None and key not in style_index:
+                style_index[key] = len(styles)
+                styles.append((copy(cell.font), copy(cell.fill), copy(cell.border),
+                               copy(cell.alignment), cell.number_format, copy(cell.protection)))
+            value = cell.value if read_only else _saved_value(cell.value, formulas=True)
+            row.append((value, style_index.get(key) if key is not None else None))
+        while row and row[-1] == (None, None):
+            row.pop()
+        rows.append(row)
+    while rows and not rows[-1]:
+        rows.pop()
+    return SheetSnapshot(layout, styles, rows)
+
+
+def rows_to_frame(rows):
+    """
+    DataFrame משורות ערכים (השורה הראשונה - כותרות), כמו pd.read_excel:
+    ערכים מומרים, שורות ריקות בסוף נחתכות ושורות ריקות באמצע נשמרות
+    """
+    data = []
+    last_row_with_data = -1
+    for row_idx, row in enumerate(rows):
+        converted = [_convert_value(value) for value in row]
+        while converted and converted[-1] == "":
+            converted.pop()
+        if converted:
+            last_row_with_data = row_idx
+        data.append(converted)
+    data = data[:last_row_with_data + 1]
+
+    if data:
+        width = max(len(row) for row in data)
+        data = [row + [""] * (width - len(row)) for row in data]
+
+    return TextParser(data, header=0, skip_blank_lines=False).read()
+
+
+class WorkbookSession:
+    """
+    פתיחת קובץ המערכת פעם אחת בתחילת פעולה.
+    ה-DataFrames נבנים מאותו workbook שנטען לכתיבה ולא מקריאה נוספת של הקובץ.
+    תאי נוסחה מקבלים את הערך המחושב השמור בקובץ - מעבר קריאה בלבד על הגיליון,
+    רק כאשר יש בו נוסחאות.
+    read_only=True - מצב סריקה בלבד (openpyxl read_only): פענוח זורם וחסכוני
+    בזיכרון, בלי אפשרות שמירה. data_only=True - ערכים מחושבים במקום נוסחאות.
+    start_journal - רישום השינויים של הפעולה ליומן, לביטול הפעולה האחרונה.
+    use_cache=True - DataFrames, ערכים מחושבים, שמות הגיליונות ו-snapshot נטענים ממטמון
+    (sheet_cache) כשהקובץ לא השתנה; הקובץ עצמו נטען רק כשצריך גיליון openpyxl.
+    save() מעדכן את המטמון לתוכן שנשמר מהחוברת שבזיכרון - בלי למחוק אותו.
+    """
+
+    def __init__(self, path, read_only=False, data_only=False, use_cache=False):
+        self.path = path
+        self.read_only = read_only
+        self.data_only = data_only
+        self.cache = SheetCache(path) if use_cache else None
+        self._wb = None
+        self._dirty = False  # נכתב משהו בסשן - ה-DataFrames כבר לא משקפים את הקובץ
+        self._frames = {}
+        self._values = {}
+        self._values_wb = None
+        self._requested = set()  # (גיליון, סוג) שנקראו בסשן - מתעדכנים במטמון בשמירה
+        self.journal = None
+
+    @property
+    def wb(self):
+        if self._wb is None:
+            self._wb = load_workbook(self.path, read_only=self.read_only, data_only=self.data_only)
+        return self._wb
+
+    def _cached(self, sheet_name, kind, build):
+        """ערך מהמטמון, או build() ושמירה במטמון (רק כל עוד הסשן לא כתב לקובץ)"""
+        self._requested.add((sheet_name, kind))
+        if self.cache is None or self._dirty:
+            return build()
+        value = self.cache.load(sheet_name, kind)
+        if value is None:
+            value = build()
+            self.cache.store(sheet_name, kind, value)
+        return value
+
+    def start_journal(self, label):
+        """פתיחת יומן לפעולה - נשמר יחד עם הקובץ ב-save()"""
+        self.journal = Journal(label)
+        return self.journal
+
+    def __getitem__(self, sheet_name):
+        return self.wb[sheet_name]
+
+    def __contains__(self, sheet_name):
+        return sheet_name in self.sheetnames
+
+    @property
+    def sheetnames(self):
+        return self._cached('', 'sheetnames', lambda: self.wb.sheetnames)
+
+    def rows(self, sheet_name, min_row=2, max_col=None):
+        """
+        מעבר רציף על ערכי השורות (tuples) בלי גישת ws.cell לכל תא.
+        עם max_col - כל שורה מרופדת ב-None עד max_col עמודות.
+        """
+        ws = self.wb[sheet_name]
+        if self.read_only:
+            ws.reset_dimensions()
+        for values in ws.iter_rows(min_row=min_row, max_col=max_col, values_only=True):
+            if max_col and len(values) < max_col:
+                values += (None,) * (max_col - len(values))
+            yield values
+
+    def values(self, sheet_name):
+        """ערכים מחושבים (data_only) של גיליון - רשימת שורות, נטען פעם אחת"""
+        if sheet_name not in self._values:
+            self._values[sheet_name] = self._cached(sheet_name, 'values',
+                                                    lambda: self._read_values(sheet_name))
+        return self._values[sheet_name]
+
+    def _read_values(self, sheet_name):
+        if self._values_wb is None:
+            self._values_wb = load_workbook(self.path, read_only=True,
+                                            data_only=True, keep_links=False)
+        ws = self._values_wb[sheet_name]
+        ws.reset_dimensions()
+        return list(ws.iter_rows(values_only=True))
+
+    def cached_value(self, sheet_name, row, col):
+        """ערך מחושב של תא בודד (row/col מתחילים מ-1)"""
+        rows = self.values(sheet_name)
+        if row - 1 < len(rows) and col - 1 < len(rows[row - 1]):
+            return rows[row - 1][col - 1]
+        return None
+
+    def frame(self, sheet_name):
+        """DataFrame של גיליון - אותה תוצאה כמו pd.read_excel(SYSTEM_FILE, sheet_name=...)"""
+        if sheet_name not in self._frames:
+            self._frames[sheet_name] = self._cached(sheet_name, 'frame',
+                                                    lambda: self._build_frame(sheet_name))
+        return self._frames[sheet_name]
+
+    def _build_frame(self, sheet_name):
+        rows = (
+            [self.cached_value(sheet_name, row_idx, col_idx) if _is_formula(value) else value
+             for col_idx, value in enumerate(row, 1)]
+            for row_idx, row in enumerate(self.rows(sheet_name, min_row=1), 1))
+        return rows_to_frame(rows)
+
+    def snapshot(self, sheet_name):
+        """SheetSnapshot של גיליון - נוסחאות, סגנונות ופריסה (למשל לדוח בקובץ חדש)"""
+        return self._cached(sheet_name, 'snapshot',
+                            lambda: sheet_snapshot(self.wb[sheet_name], self.read_only))
+
+    def _saved_rows(self, sheet_name):
+        return [tuple(_saved_value(value) for value in row)
+                for row in self.wb[sheet_name].iter_rows(values_only=True)]
+
+    def _saved_entries(self):
+        """רשומות המטמון לתוכן שנשמר עכשיו - מהחוברת שבזיכרון, בלי לקרוא את הקובץ"""
+        saved = {}
+        for sheet_name, kind in set(self.cache.entries()) | self._requested:
+            if kind == 'sheetnames':
+                saved[(sheet_name, kind)] = self.wb.sheetnames
+            elif sheet_name not in self.wb.sheetnames:
+                continue
+            elif kind == 'values':
+                saved[(sheet_name, kind)] = self._saved_rows(sheet_name)
+            elif kind == 'frame':
+                saved[(sheet_name, kind)] = rows_to_frame(self._saved_rows(sheet_name))
+            elif kind == 'snapshot':
+                saved[(sheet_name, kind)] = sheet_snapshot(self.wb[sheet_name])
+        return saved
+
+    def writer(self, sheet_name, width=None):
+        """RowWriter לגיליון - מחובר ליומן הפעולה אם נפתח"""
+        self._dirty = True
+        return RowWriter(self.wb[sheet_name], width, journal=self.journal)
+
+    def truncate(self, sheet_name):
+        """מחיקת שורות הנתונים בגיליון (נרשם ביומן הפעולה אם נפתח)"""
+        self._dirty = True
+        return truncate_sheet(self.wb[sheet_name], journal=self.journal)
+
+    def save(self, path=None):
+        if self.read_only:
+            raise Exception("הקובץ נפתח לקריאה בלבד - אי אפשר לשמור")
+        self.wb.save(path or self.path)
+        if self.cache is not None and path is None:
+            self.cache.refresh(self._saved_entries())
+        if self.journal and path is None:
+            self.journal.commit(self.path)
+            self.journal = None
+
+    def close(self):
+        if self._wb is not None:
+            self._wb.close()
+        if self._values_wb is not None:
+            self._values_wb.close()
+            self._values_wb = None